@@ -6,11 +6,7 @@ def main():
     b = 30
     c = ((b-a)**2)
     print((not ((b-6)>25) or ((2**8)==c)))
-    d = input()
-    try:
-        d = int(d)
-    except ValueError:
-        d = float(d)
+    d = float(input())
     return (((b*a)/c)+d)
 
 
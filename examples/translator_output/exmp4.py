@@ -2,11 +2,7 @@ import sys
 
 
 def main(arg1=0,arg2=0,arg3=0):
-    v = input()
-    try:
-        v = int(v)
-    except ValueError:
-        v = float(v)
+    v = float(input())
     print(((v*0.543)+(5.228**(54/23.5543))))
 
 
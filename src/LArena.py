@@ -0,0 +1,202 @@
+from array import array
+
+from LParser import Node, iterable
+
+# Struct-of-arrays AST backend. Every node is a row of parallel columns:
+#
+#   kind    id in 'kinds' (0 is reserved for a missing child, None)
+#   first   row of the first child, -1 for leaves and childless nodes
+#   next    row of the next sibling, -1 for the last child
+#   value   index in 'values' for leaves, -1 for interior nodes
+#   offset  source offset of the first token, -1 when unknown
+#
+# and line numbers of the rows which know them are kept in 'lines'.
+# A node costs ~17 bytes of columns instead of a python object and a tuple.
+#
+# 'NodeView' is a cursor over one row. It is a 'Node' for the rest of the
+# code: '.name', '.value' (children are views too), '.lineno', '.index' and
+# child lookup by name work as usual, so the translator, renderers and other
+# passes walk an arena without 'Node' objects being built. Views are created
+# on access and compare equal when they point to the same row.
+
+
+##########################
+#####     ARENA      #####
+##########################
+class LArena:
+    def __init__(self) -> None:
+        self.kind = array("H")
+        self.first = array("i")
+        self.next = array("i")
+        self.value = array("i")
+        self.offset = array("i")
+        self.lines = {}             # row -> lineno
+        self.kinds = [None]         # kind id -> node name
+        self.kind_ids = {}          # node name -> kind id
+        self.values = []            # leaf values
+        self.value_ids = {}         # (type, value) -> index in 'values'
+        self.root = -1
+
+    def __len__(self):
+        return len(self.kind)
+
+    #===== Building =====#
+    def append(self, kind, value=-1, offset=-1):
+        row = len(self.kind)
+        self.kind.append(kind)
+        self.first.append(-1)
+        self.next.append(-1)
+        self.value.append(value)
+        self.offset.append(offset)
+        return row
+
+    def add_row(self, name, value, lineno=None, index=None):
+        # 'value' is a tuple of child rows (None for a missing child) or a leaf value
+        kind = self.kind_ids.get(name)
+        if kind is None:
+            kind = self.kind_ids[name] = len(self.kinds)
+            self.kinds.append(name)
+        if isinstance(value, tuple):
+            row = self.append(kind, -1, -1 if index is None else index)
+            previous = -1
+            for child in value:
+                child = self.append(0) if child is None else child
+                if previous == -1:
+                    self.first[row] = child
+                else:
+                    self.next[previous] = child
+                previous = child
+        else:
+            key = (type(value), value)
+            value_id = self.value_ids.get(key)
+            if value_id is None:
+                value_id = self.value_ids[key] = len(self.values)
+                self.values.append(value)
+            row = self.append(kind, value_id, -1 if index is None else index)
+        if lineno is not None:
+            self.lines[row] = lineno
+        self.root = row
+        return row
+
+    def add(self, name, value, lineno=None, index=None):
+        # node factory for 'LParser(text, arena=...)', takes what 'Node' takes
+        if isinstance(value, Node):
+            value = (value,)
+        if isinstance(value, tuple):
+            value = tuple(None if child is None else child.row for child in value)
+        return NodeView(self, self.add_row(name, value, lineno, index))
+
+    #===== Access =====#
+    def view(self, row=None):
+        return NodeView(self, self.root if row is None else row)
+
+    def children(self, row):
+        rows = []
+        child = self.first[row]
+        while child != -1:
+            rows.append(child)
+            child = self.next[child]
+        return rows
+
+    def nbytes(self):
+        # memory held by columns
+        return sum(column.itemsize * len(column) for column in (self.kind, self.first, self.next, self.value, self.offset))
+
+    #===== Conversion =====#
+    @classmethod
+    def from_node(cls, ast: Node):
+        arena = cls()
+        # postorder: children rows exist before their parent is added
+        rows = []
+        stack = [(ast, False)]
+        while stack:
+            node, visited = stack.pop()
+            if node is None:
+                rows.append(None)
+                continue
+            if not iterable(node.value):
+                rows.append(arena.add_row(node.name, node.value, node.lineno, node.index))
+                continue
+            if visited:
+                count = len(node.value)
+                children = tuple(rows[len(rows)-count:]) if count else ()
+                del rows[len(rows)-count:]
+                rows.append(arena.add_row(node.name, children, node.lineno, node.index))
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.value))
+        arena.root = rows[0]
+        return arena
+
+    def to_node(self, row=None) -> Node:
+        row = self.root if row is None else row
+        built = {}
+        stack = [(row, False)]
+        while stack:
+            current, visited = stack.pop()
+            name = self.kinds[self.kind[current]]
+            offset = self.offset[current]
+            position = (self.lines.get(current), offset if offset != -1 else None)
+            if self.value[current] != -1:
+                built[current] = Node(name, self.values[self.value[current]], *position)
+                continue
+            children = self.children(current)
+            if visited:
+                built[current] = Node(name, tuple(
+                    None if self.kind[child] == 0 else built.pop(child) for child in children
+                ), *position)
+                continue
+            stack.append((current, True))
+            stack.extend((child, False) for child in children if self.kind[child] != 0)
+        return built[row]
+
+
+##########################
+#####     VIEWS      #####
+##########################
+class NodeView(Node):
+    __slots__ = ("arena", "row")
+
+    def __init__(self, arena: LArena, row: int):
+        self.arena = arena
+        self.row = row
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and self.row == other.row and self.arena is other.arena
+
+    def __hash__(self):
+        return hash(self.row)
+
+    def __repr__(self):
+        return f"<{__name__}.NodeView[{self.name!r}] row {self.row}>"
+
+    @property
+    def name(self):
+        return self.arena.kinds[self.arena.kind[self.row]]
+
+    @property
+    def value(self):
+        arena = self.arena
+        value = arena.value[self.row]
+        if value != -1:
+            return arena.values[value]
+        kind, next_ = arena.kind, arena.next
+        children = []
+        child = arena.first[self.row]
+        while child != -1:
+            children.append(NodeView(arena, child) if kind[child] else None)
+            child = next_[child]
+        return tuple(children)
+
+    @property
+    def lineno(self):
+        return self.arena.lines.get(self.row)
+
+    @property
+    def index(self):
+        offset = self.arena.offset[self.row]
+        return offset if offset != -1 else None
+
+    @property
+    def shash(self):
+        return None
@@ -0,0 +1,829 @@
+import sys, getopt, os, math, functools, shutil, hashlib, subprocess, tempfile
+
+from LParser import Node
+from LTypes import LTypeInference, INT, FLOAT, BOOL
+from LSemantic import LSemantic
+from LWalk import walk, fold
+
+# C99 backend. Emits one C file from the same tree as 'LTranslator', with
+# the same observable behaviour as translated python: same output of
+# 'write', same "returned: ..." line, exit code 1 where python raises.
+#
+# C types come from type inference: INT is 'long long', FLOAT is 'double',
+# conditions are 'int'. Values whose int/float kind is known only at runtime
+# (NUM, UNKNOWN: results of 'read', mixed assignments, functions which may
+# return None) are tagged 'lval' values, so 3 is still printed as "3" and
+# 3.0 as "3.0". Floats are printed like python 'repr'.
+#
+# Known differences from python: ints wrap around at 64 bits, arguments of
+# 'main' are parsed as numbers instead of being strings, there is no
+# recursion limit, negative base in fractional power fails instead of giving
+# a complex number, calls of undefined functions (even python builtins as
+# 'print') end the program like a NameError caught by the python entry point.
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def named(obj_, name_):
+    return isinstance(obj_, Node) and obj_.name == name_
+
+def ctype(type_):
+    # 'i' long long, 'f' double, 'b' int (condition), 'v' lval
+    return {INT: "i", FLOAT: "f", BOOL: "b"}.get(type_, "v")
+
+C_TYPES = {"i": "long long", "f": "double", "b": "int", "v": "lval"}
+C_ZERO = {"i": "0", "f": "0.0", "b": "0", "v": "lv_none()"}
+LLONG_MAX = (1 << 63) - 1
+
+# markers of walks: before the right operand of '&&'/'||', between branches
+# of 'if', after them and after the body of 'while'
+RIGHT = Node("RIGHT", None)
+ELSE = Node("ELSE", None)
+END_IF = Node("END_IF", None)
+END_WHILE = Node("END_WHILE", None)
+
+
+##########################
+#####    RUNTIME     #####
+##########################
+C_RUNTIME = r"""#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <math.h>
+
+enum { L_NONE, L_INT, L_FLOAT, L_BOOL };
+/* bools are ints in arithmetic, as in python */
+#define LV_INT(a) ((a).t == L_INT || (a).t == L_BOOL)
+typedef struct { int t; long long i; double f; } lval;
+
+enum { L_EQU, L_NEQ, L_LEQ, L_LES, L_GEQ, L_GRT };
+
+static void l_fail(const char *kind, const char *message) {
+    fflush(stdout);
+    fprintf(stderr, "%s: %s\n", kind, message);
+    exit(1);
+}
+
+/* NameError is caught by the entry point of translated python */
+static lval l_undefined(void) {
+    printf("Entry point 'main' not defined\n");
+    fflush(stdout);
+    exit(0);
+}
+
+/* read of a local not assigned yet: UnboundLocalError, a NameError too */
+static void l_bound(int assigned) {
+    if (!assigned) l_undefined();
+}
+
+static lval lv_int(long long i) { lval v; v.t = L_INT; v.i = i; v.f = 0.0; return v; }
+static lval lv_float(double f) { lval v; v.t = L_FLOAT; v.i = 0; v.f = f; return v; }
+static lval lv_none(void) { lval v; v.t = L_NONE; v.i = 0; v.f = 0.0; return v; }
+static lval lv_bool(int b) { lval v; v.t = L_BOOL; v.i = b != 0; v.f = 0.0; return v; }
+
+static void lv_check(lval a) {
+    if (a.t == L_NONE) l_fail("TypeError", "unsupported operand type(s): 'NoneType'");
+}
+static double lv_f(lval a) { lv_check(a); return LV_INT(a) ? (double)a.i : a.f; }
+static long long lv_i(lval a) {
+    if (!LV_INT(a)) l_fail("TypeError", "int expected");
+    return a.i;
+}
+
+static double l_div(double a, double b) {
+    if (b == 0.0) l_fail("ZeroDivisionError", "division by zero");
+    return a / b;
+}
+
+static long long l_ipow(long long base, long long exp) {
+    unsigned long long result = 1, x = (unsigned long long)base;
+    while (exp > 0) {
+        if (exp & 1) result *= x;
+        x *= x;
+        exp >>= 1;
+    }
+    return (long long)result;
+}
+
+static double l_fpow(double a, double b) {
+    double result;
+    if (a == 0.0 && b < 0) l_fail("ZeroDivisionError", "0.0 cannot be raised to a negative power");
+    if (a < 0 && isfinite(b) && b != floor(b)) l_fail("ValueError", "negative number cannot be raised to a fractional power");
+    result = pow(a, b);
+    if (isinf(result) && isfinite(a) && isfinite(b)) l_fail("OverflowError", "Numerical result out of range");
+    return result;
+}
+
+static lval lv_add(lval a, lval b) {
+    lv_check(a); lv_check(b);
+    if (LV_INT(a) && LV_INT(b)) return lv_int((long long)((unsigned long long)a.i + (unsigned long long)b.i));
+    return lv_float(lv_f(a) + lv_f(b));
+}
+static lval lv_sub(lval a, lval b) {
+    lv_check(a); lv_check(b);
+    if (LV_INT(a) && LV_INT(b)) return lv_int((long long)((unsigned long long)a.i - (unsigned long long)b.i));
+    return lv_float(lv_f(a) - lv_f(b));
+}
+static lval lv_mul(lval a, lval b) {
+    lv_check(a); lv_check(b);
+    if (LV_INT(a) && LV_INT(b)) return lv_int((long long)((unsigned long long)a.i * (unsigned long long)b.i));
+    return lv_float(lv_f(a) * lv_f(b));
+}
+static lval lv_div(lval a, lval b) { return lv_float(l_div(lv_f(a), lv_f(b))); }
+static lval lv_pow(lval a, lval b) {
+    lv_check(a); lv_check(b);
+    if (LV_INT(a) && LV_INT(b) && b.i >= 0) return lv_int(l_ipow(a.i, b.i));
+    return lv_float(l_fpow(lv_f(a), lv_f(b)));
+}
+static lval lv_neg(lval a) {
+    lv_check(a);
+    return LV_INT(a) ? lv_int((long long)(0ULL - (unsigned long long)a.i)) : lv_float(-a.f);
+}
+
+static int lv_cmp(lval a, lval b, int op) {
+    double x, y;
+    if (a.t == L_NONE || b.t == L_NONE) {
+        if (op == L_EQU) return a.t == b.t;
+        if (op == L_NEQ) return a.t != b.t;
+        l_fail("TypeError", "'NoneType' can't be compared");
+    }
+    if (LV_INT(a) && LV_INT(b)) {
+        switch (op) {
+            case L_EQU: return a.i == b.i;
+            case L_NEQ: return a.i != b.i;
+            case L_LEQ: return a.i <= b.i;
+            case L_LES: return a.i < b.i;
+            case L_GEQ: return a.i >= b.i;
+            default:    return a.i > b.i;
+        }
+    }
+    x = lv_f(a);
+    y = lv_f(b);
+    switch (op) {
+        case L_EQU: return x == y;
+        case L_NEQ: return x != y;
+        case L_LEQ: return x <= y;
+        case L_LES: return x < y;
+        case L_GEQ: return x >= y;
+        default:    return x > y;
+    }
+}
+
+static int lv_truth(lval a) {
+    return LV_INT(a) ? a.i != 0 : a.t == L_FLOAT ? a.f != 0.0 : 0;
+}
+
+/* shortest digits which read back as the same double, laid out as python 'repr' */
+static void l_format_float(char *out, double x) {
+    char buffer[40], digits[24];
+    char *p, *mantissa_end;
+    int precision, exponent, count = 0, i;
+    if (isnan(x)) { strcpy(out, "nan"); return; }
+    if (isinf(x)) { strcpy(out, x > 0 ? "inf" : "-inf"); return; }
+    for (precision = 0; precision < 17; precision++) {
+        snprintf(buffer, sizeof buffer, "%.*e", precision, x);
+        if (strtod(buffer, NULL) == x) break;
+    }
+    p = buffer;
+    if (*p == '-') *out++ = *p++;
+    mantissa_end = strchr(p, 'e');
+    for (; p < mantissa_end; p++)
+        if (isdigit((unsigned char)*p)) digits[count++] = *p;
+    digits[count] = '\0';
+    exponent = atoi(mantissa_end + 1);
+    if (exponent < -4 || exponent >= 16) {
+        *out++ = digits[0];
+        if (count > 1) {
+            *out++ = '.';
+            for (i = 1; i < count; i++) *out++ = digits[i];
+        }
+        sprintf(out, "e%c%02d", exponent < 0 ? '-' : '+', exponent < 0 ? -exponent : exponent);
+    } else if (exponent < 0) {
+        *out++ = '0';
+        *out++ = '.';
+        for (i = -1; i > exponent; i--) *out++ = '0';
+        for (i = 0; i < count; i++) *out++ = digits[i];
+        *out = '\0';
+    } else {
+        for (i = 0; i <= exponent; i++) *out++ = i < count ? digits[i] : '0';
+        *out++ = '.';
+        if (count > exponent + 1)
+            for (i = exponent + 1; i < count; i++) *out++ = digits[i];
+        else
+            *out++ = '0';
+        *out = '\0';
+    }
+}
+
+static void l_write_int(long long i) { printf("%lld\n", i); }
+static void l_write_bool(int b) { puts(b ? "True" : "False"); }
+static void l_write_float(double f) {
+    char buffer[40];
+    l_format_float(buffer, f);
+    puts(buffer);
+}
+static void l_write_val(lval a) {
+    if (a.t == L_NONE) puts("None");
+    else if (a.t == L_BOOL) l_write_bool((int)a.i);
+    else if (a.t == L_INT) l_write_int(a.i);
+    else l_write_float(a.f);
+}
+
+/* number of a string as 'int(s)' or 'float(s)' of python would give */
+static lval l_number(const char *text) {
+    char buffer[4096], *start = buffer, *end;
+    long long i;
+    double f;
+    size_t length;
+    strncpy(buffer, text, sizeof buffer - 1);
+    buffer[sizeof buffer - 1] = '\0';
+    while (isspace((unsigned char)*start)) start++;
+    length = strlen(start);
+    while (length && isspace((unsigned char)start[length - 1])) start[--length] = '\0';
+    if (length) {
+        i = strtoll(start, &end, 10);
+        if (*end == '\0') return lv_int(i);
+        f = strtod(start, &end);
+        if (*end == '\0') return lv_float(f);
+    }
+    l_fail("ValueError", "could not convert string to float");
+    return lv_none();
+}
+
+static lval l_read(void) {
+    char line[4096];
+    if (!fgets(line, sizeof line, stdin)) l_fail("EOFError", "EOF when reading a line");
+    return l_number(line);
+}
+
+static lval l_arg(int argc, char **argv, int i) {
+    return i < argc ? l_number(argv[i]) : lv_int(0);
+}
+
+static void l_write_returned(lval a) {
+    printf("returned: ");
+    if (lv_truth(a)) l_write_val(a);
+    else puts("0");
+}
+"""
+
+
+##########################
+#####   TRANSLATOR   #####
+##########################
+class LCTranslatorError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+class LCTranslator:
+    indent = " "*4
+    arith = {"ADD": ("+", "lv_add"), "SUB": ("-", "lv_sub"), "MUL": ("*", "lv_mul")}
+    compare = {"EQU": "==", "NEQ": "!=", "LEQ": "<=", "LES": "<", "GEQ": ">=", "GRT": ">"}
+
+    def __init__(self) -> None:
+        self.lines = []
+        self.types = None
+        self.semantic = None
+        self.fname = None
+        self.fdef = None
+        self.pre = []           # statements of hoisted operands
+        self.pres = []          # 'pre' of enclosing short-circuits, while their right side is walked
+        self.values = []        # (C code, ctype) of walked operands
+        self.out = []           # lines of walked statements
+        self.temps = 0
+        self.effect_cache = {}  # node -> (calls, may fail), per function
+        self.unbound = set()    # variables read where they may be unassigned, per function
+
+    def translate(self, ast: Node, semantic: LSemantic|None=None):
+        self.semantic = semantic or LSemantic().analyze(ast)
+        self.types = LTypeInference().infer(ast, self.semantic)
+        # the last definition of a name wins, as in python
+        fdefs = [node for node in ast.value if named(node, "FDEF") and self.semantic.functions[node.FNAME.value] == node]
+        lines = C_RUNTIME.split("\n")
+        lines.extend(self.signature(fdef) + ";" for fdef in fdefs)
+        lines.append("")
+        for fdef in fdefs:
+            lines.extend(self.FDEF(fdef))
+        lines.extend(self.entry_point())
+        self.lines = lines
+        return lines
+
+    #===== Conversions =====#
+    def convert(self, code, from_, to):
+        if from_ == to:
+            return code
+        if to == "v":
+            return {"i": f"lv_int({code})", "f": f"lv_float({code})", "b": f"lv_bool({code})"}[from_]
+        if to == "f" and from_ in ("i", "b"):
+            return f"(double)({code})"
+        if to == "i" and from_ == "b":
+            return code
+        if to == "f" and from_ == "v":
+            return f"lv_f({code})"
+        if to == "i" and from_ == "v":
+            return f"lv_i({code})"
+        raise LCTranslatorError(f"Can't convert {C_TYPES[from_]!r} into {C_TYPES[to]!r}")
+
+    def var_ctype(self, var):
+        return ctype(self.types.var_type(self.fname, var))
+
+    #===== Definitions =====#
+    def signature(self, fdef):
+        fname = fdef.FNAME.value
+        params = [f"{C_TYPES[ctype(self.types.var_type(fname, arg))]} v_{arg}" for arg in self.semantic.params[fdef]]
+        return f"static {C_TYPES[ctype(self.types.return_type(fname))]} l_{fname}({', '.join(params) or 'void'})"
+
+    def FDEF(self, node):
+        self.fdef = node
+        self.fname = node.FNAME.value
+        self.temps = 0
+        self.effect_cache = {}
+        self.unbound = self.unbound_reads(node)
+        params = set(self.semantic.params[node])
+        local = sorted((self.semantic.assigned[node] | self.semantic.used[node]) - params)
+        lines = [self.signature(node) + " {"]
+        for var in local:
+            lines.append(f"{self.indent}{C_TYPES[self.var_ctype(var)]} v_{var} = {C_ZERO[self.var_ctype(var)]};")
+        for var in sorted(self.unbound):
+            lines.append(f"{self.indent}int d_{var} = 0;")
+        lines.extend(self.block(node.FBODY, 1))
+        return_ctype = ctype(self.types.return_type(self.fname))
+        if return_ctype == "v":
+            # falls through: python function returns None
+            lines.append(f"{self.indent}return lv_none();")
+        lines.extend(["}", ""])
+        return lines
+
+    def entry_point(self):
+        main = self.semantic.function("main")
+        lines = ["int main(int argc, char **argv) {"]
+        lines.append(f"{self.indent}static char buffer[1 << 16];")
+        lines.append(f"{self.indent}setvbuf(stdout, buffer, _IOFBF, sizeof buffer);")
+        if main is None:
+            lines.append(f"{self.indent}(void)argc; (void)argv;")
+            lines.append(f"{self.indent}puts(\"Entry point 'main' not defined\");")
+        else:
+            self.fname = "main"
+            args = [
+                self.convert(f"l_arg(argc, argv, {number})", "v", self.var_ctype(arg))
+                for number, arg in enumerate(self.semantic.params[main], 1)
+            ]
+            if not args:
+                lines.append(f"{self.indent}(void)argc; (void)argv;")
+            result = self.convert(f"l_main({', '.join(args)})", ctype(self.types.return_type("main")), "v")
+            lines.append(f"{self.indent}l_write_returned({result});")
+        lines.extend([f"{self.indent}return 0;", "}", ""])
+        return lines
+
+    #===== Definite assignment =====#
+    # Locals of python are unbound until assigned, a read before fails. A
+    # variable read where some path may not have assigned it gets a flag
+    # 'd_<var>', set by its assignments and checked by all its reads
+    def unbound_reads(self, fdef):
+        # -> variables with such a read. Statements are walked with variables
+        # surely assigned so far, None after 'return' (code after it is never
+        # run). Markers after branches of 'if' and body of 'while' merge them
+        assigned, unbound = set(self.semantic.params[fdef]), set()
+        def enter(node, frame):
+            nonlocal assigned
+            if node is ELSE:
+                frame[1], assigned = assigned, frame[0]
+                return []
+            if node is END_IF:
+                then, other = frame[1], assigned
+                assigned = other if then is None else then if other is None else then & other
+                return []
+            if node is END_WHILE:
+                # the body may not run, later iterations only add assignments
+                assigned = frame
+                return []
+            if assigned is None:
+                return []
+            name = node.name
+            if name == "FBODY" or name == "BRANCH":
+                return None
+            if name == "VARASGN":
+                self.reads(node.value[1], assigned, unbound)
+                assigned = assigned | {node.VAR.value}
+            elif name == "READ":
+                assigned = assigned | {node.VAR.value}
+            elif name == "RETURN":
+                self.reads(node.value[0], assigned, unbound)
+                assigned = None
+            elif name == "IF":
+                self.reads(node.COND.value[0], assigned, unbound)
+                frame = [assigned, None]
+                return [(node.BRANCH0, None), (ELSE, frame), (node.BRANCH1, None), (END_IF, frame)]
+            elif name == "WHILE":
+                self.reads(node.COND.value[0], assigned, unbound)
+                return [(node.BRANCH, None), (END_WHILE, assigned)]
+            else:
+                self.reads(node.value[0] if name == "WRITE" else node, assigned, unbound)
+            return []
+        walk(fdef.FBODY, enter)
+        # never assigned ones fail on every read anyway (see 'value')
+        return unbound & self.semantic.assigned[fdef]
+
+    def reads(self, node, assigned, unbound):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if named(node, "VAR"):
+                if node.value not in assigned:
+                    unbound.add(node.value)
+            elif isinstance(node, Node) and type(node.value) is tuple:
+                stack.extend(node.value)
+
+    def bound(self, node):
+        # flag set by an assignment, if the variable has one
+        return [f"d_{node.VAR.value} = 1;"] if node.VAR.value in self.unbound else []
+
+    #===== Statements =====#
+    # Walked with an explicit stack like in 'LTranslator', lines go into
+    # 'self.out'. Strings in pairs are lines closing blocks
+    def block(self, node, level):
+        self.out = []
+        walk(node, self.statement, context=level)
+        return self.out
+
+    def statement(self, node, level):
+        # expressions put hoisted operands into 'self.pre', they go before the statement
+        pad = self.indent*level
+        if type(node) is str:
+            self.out.append(pad + node)
+            return []
+        if node.name == "FBODY" or node.name == "BRANCH":
+            return None
+        self.pre = []
+        if named(node, "VARASGN"):
+            code, type_ = self.expression(node.value[1])
+            lines = [f"v_{node.VAR.value} = {self.convert(code, type_, self.var_ctype(node.VAR.value))};", *self.bound(node)]
+        elif named(node, "READ"):
+            lines = [f"v_{node.VAR.value} = {self.convert('l_read()', 'v', self.var_ctype(node.VAR.value))};", *self.bound(node)]
+        elif named(node, "WRITE"):
+            code, type_ = self.expression(node.value[0])
+            writer = {"i": "l_write_int", "f": "l_write_float", "b": "l_write_bool", "v": "l_write_val"}[type_]
+            lines = [f"{writer}({code});"]
+        elif named(node, "RETURN"):
+            code, type_ = self.expression(node.value[0])
+            lines = [f"return {self.convert(code, type_, ctype(self.types.return_type(self.fname)))};"]
+        elif named(node, "IF"):
+            cond, _ = self.expression(node.COND.value[0])
+            self.out.extend(pad + line for line in [*self.pre, f"if ({cond}) {{"])
+            pairs = [(node.BRANCH0, level+1)]
+            if node.BRANCH1.value is not None:
+                pairs.extend([("} else {", level), (node.BRANCH1, level+1)])
+            return pairs + [("}", level)]
+        elif named(node, "WHILE"):
+            cond, _ = self.expression(node.COND.value[0])
+            if not self.pre:
+                self.out.append(f"{pad}while ({cond}) {{")
+            else:
+                # hoisted operands are evaluated again before every check
+                self.out.append(f"{pad}while (1) {{")
+                self.out.extend(pad + self.indent + line for line in [*self.pre, f"if (!{cond}) break;"])
+            return [(node.BRANCH, level+1), ("}", level)]
+        else:
+            code, _ = self.expression(node)
+            lines = [f"(void)({code});"]
+        self.out.extend(pad + line for line in [*self.pre, *lines])
+        return []
+
+    #===== Evaluation order =====#
+    # C leaves order of operands and arguments unspecified, python evaluates
+    # them from left to right. It is seen only when an operand calls a
+    # function (it may write) and another one calls or may fail. Such
+    # operands are evaluated into temporaries first, in python order.
+    def effects(self, node):
+        # -> (calls a function, calls or may fail)
+        result = self.effect_cache.get(node)
+        return fold(node, self.effect, self.effect_cache.get) if result is None else result
+
+    def effect(self, node, children):
+        if node.name in ("INT", "FLOAT", "FNAME"):
+            result = (False, False)
+        elif node.name == "VAR":
+            result = (False, node.value not in self.semantic.assigned[self.fdef] or node.value in self.unbound)
+        else:
+            if node.name == "FCALL":
+                children = children[1:]
+            calls = node.name == "FCALL" or any(call for call, _ in children)
+            fails = (
+                calls or any(fail for _, fail in children) or node.name in ("DIV", "POW")
+                or ctype(self.types.expr_type(node, self.fname)) == "v"
+            )
+            result = (calls, fails)
+        self.effect_cache[node] = result
+        return result
+
+    def hoisted(self, children):
+        # -> for every operand, whether it goes into a temporary
+        if len(children) < 2:
+            return [False]*len(children)
+        effects = [self.effects(child) for child in children]
+        flags = []
+        for position, (calls, fails) in enumerate(effects):
+            later = effects[position+1:]
+            flags.append(fails and any(fail for _, fail in later) and (calls or any(call for call, _ in later)))
+        return flags
+
+    def hoist(self, code, type_):
+        name = f"t_{self.temps}"
+        self.temps += 1
+        self.pre.append(f"{C_TYPES[type_]} {name} = {code};")
+        return name
+
+    def operands(self, count):
+        # values of the last 'count' operands left
+        if not count:
+            return []
+        operands = self.values[-count:]
+        del self.values[-count:]
+        return operands
+
+    #===== Expressions =====#
+    # Walked with an explicit stack: (C code, ctype) of finished operands wait
+    # on 'self.values' for their parent, context of a node tells whether the
+    # parent hoists it. An operand is hoisted right after its subtree, before
+    # the next one is entered, so temporaries keep python order
+    def expression(self, node):
+        # -> (C code, ctype), ctype is the one of inferred type of the node
+        self.values = []
+        walk(node, self.enter, self.leave, False)
+        return self.values.pop()
+
+    def enter(self, node, hoisted):
+        if node is RIGHT:
+            # hoisted operands of the right side of '&&'/'||' go into its branch
+            self.pres.append(self.pre)
+            self.pre = []
+            return []
+        name = node.name
+        if name == "AND" or name == "OR":
+            return [(node.value[0], False), (RIGHT, False), (node.value[1], False)]
+        if name == "FCALL":
+            if self.semantic.function(node.FNAME.value) is None:
+                # arguments are not evaluated
+                return []
+            children = node.value[1:]
+        elif type(node.value) is tuple:
+            children = node.value
+        else:
+            return []
+        return list(zip(children, self.hoisted(children)))
+
+    def leave(self, node, hoisted):
+        if node is RIGHT:
+            return
+        code, type_ = self.value(node)
+        self.values.append((self.hoist(code, type_) if hoisted else code, type_))
+
+    def value(self, node):
+        type_ = ctype(self.types.expr_type(node, self.fname))
+        if named(node, "INT"):
+            if node.value > LLONG_MAX:
+                raise LCTranslatorError(f"Integer {node.value} doesn't fit into 'long long'")
+            return f"{node.value}LL", "i"
+        if named(node, "FLOAT"):
+            value = float(node.value)
+            # literal too big for a double is inf in python as well
+            return (repr(value) if math.isfinite(value) else "HUGE_VAL"), "f"
+        if named(node, "VAR"):
+            if node.value not in self.semantic.assigned[self.fdef]:
+                # never assigned: python looks for a global and fails with NameError
+                return "l_undefined()", "v"
+            if node.value in self.unbound:
+                return f"(l_bound(d_{node.value}), v_{node.value})", self.var_ctype(node.value)
+            return f"v_{node.value}", self.var_ctype(node.value)
+        if named(node, "FCALL"):
+            return self.call(node, type_), type_
+        if node.name in ("AND", "OR"):
+            return self.short_circuit(node), "b"
+        operands = self.operands(len(node.value))
+        if node.name in self.compare:
+            return self.comparison(node.name, *operands), "b"
+        if node.name == "NOT":
+            return f"(!{operands[0][0]})", "b"
+        args = [self.convert(code, operand_type, type_) for code, operand_type in operands]
+        if node.name == "NEG":
+            return (f"lv_neg({args[0]})" if type_ == "v" else f"(-{args[0]})"), type_
+        if node.name in self.arith:
+            op, function = self.arith[node.name]
+            return (f"{function}({args[0]}, {args[1]})" if type_ == "v" else f"({args[0]} {op} {args[1]})"), type_
+        if node.name == "DIV":
+            if type_ == "v":
+                return f"lv_div({args[0]}, {args[1]})", type_
+            return f"l_div({self.convert(operands[0][0], operands[0][1], 'f')}, {self.convert(operands[1][0], operands[1][1], 'f')})", "f"
+        if node.name == "POW":
+            function = {"i": "l_ipow", "f": "l_fpow", "v": "lv_pow"}[type_]
+            return f"{function}({args[0]}, {args[1]})", type_
+        raise LCTranslatorError(f"Node[{node.name!r}] can't be translated into C")
+
+    def short_circuit(self, node):
+        # right operand is evaluated only when needed, so are its hoisted operands
+        op = "&&" if node.name == "AND" else "||"
+        (left, _), (right, _) = self.operands(2)
+        inner, self.pre = self.pre, self.pres.pop()
+        if not inner:
+            return f"({left} {op} {right})"
+        result = self.hoist(left, "b")
+        self.pre.append(f"if ({'' if op == '&&' else '!'}{result}) {{")
+        self.pre.extend(self.indent + line for line in [*inner, f"{result} = {right};"])
+        self.pre.append("}")
+        return result
+
+    def comparison(self, name, left, right):
+        (a, a_type), (b, b_type) = left, right
+        if "v" in (a_type, b_type):
+            return f"lv_cmp({self.convert(a, a_type, 'v')}, {self.convert(b, b_type, 'v')}, L_{name})"
+        if a_type in ("i", "b") and b_type in ("i", "b"):
+            return f"({a} {self.compare[name]} {b})"
+        return f"({self.convert(a, a_type, 'f')} {self.compare[name]} {self.convert(b, b_type, 'f')})"
+
+    def call(self, node, type_):
+        callee = self.semantic.function(node.FNAME.value)
+        if callee is None:
+            # NameError before arguments are evaluated. Typed as UNKNOWN by inference, so lval
+            return "l_undefined()"
+        params = self.semantic.params[callee]
+        operands = self.operands(len(node.value) - 1)
+        if len(params) != len(operands):
+            # TypeError in python, after arguments are evaluated
+            evaluated = "".join(f"(void)({code}), " for code, _ in operands)
+            return f"({evaluated}l_fail(\"TypeError\", \"wrong number of arguments\"), {C_ZERO[type_]})"
+        args = [
+            self.convert(code, arg_type, ctype(self.types.var_type(callee.FNAME.value, param)))
+            for param, (code, arg_type) in zip(params, operands)
+        ]
+        return f"l_{node.FNAME.value}({', '.join(args)})"
+
+
+##########################
+#####     DRIVER     #####
+##########################
+class LCCompileError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+# always passed, the runtime relies on them. -fwrapv: int overflow wraps
+# instead of being undefined, as the runtime helpers do
+REQUIRED_CFLAGS = ["-std=c99", "-fwrapv"]
+# used when neither 'cflags' nor CFLAGS env variable is given
+DEFAULT_CFLAGS = ["-O2"]
+
+def cache_dir():
+    return os.environ.get("LCC_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "l-lang", "cc")
+
+def find_cc():
+    cc = os.environ.get("CC") or shutil.which("cc")
+    if cc is None:
+        raise LCCompileError("C compiler not found, install 'cc' or set CC env variable")
+    return cc
+
+@functools.lru_cache(maxsize=None)
+def cc_version(cc):
+    # part of the cache key, binaries of an upgraded compiler are built again
+    try:
+        result = subprocess.run([cc, "--version"], capture_output=True)
+    except OSError as error:
+        raise LCCompileError(f"'{cc}' can't be run: {error}")
+    return result.stdout.decode(errors="replace") + result.stderr.decode(errors="replace")
+
+def compile_c(code: str, cc:str|None=None, cflags:list[str]|None=None, cache:str|None=None):
+    # -> path of the binary. 'cflags' (or CFLAGS) go after the required flags.
+    # Binaries are cached by hash of compiler and its version, flags and
+    # code, so unchanged programs are not compiled again
+    cc = cc or find_cc()
+    cflags = cflags if cflags is not None else os.environ.get("CFLAGS", "").split() or DEFAULT_CFLAGS
+    cflags = [*REQUIRED_CFLAGS, *cflags]
+    cache = cache or cache_dir()
+    key = hashlib.sha256("\0".join([cc, cc_version(cc), *cflags, code]).encode("utf-8")).hexdigest()[:32]
+    binary = os.path.join(cache, key)
+    if os.path.exists(binary):
+        return binary
+
+    os.makedirs(cache, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cache) as temp:
+        source = os.path.join(temp, "program.c")
+        with open(source, "w", encoding="utf-8") as fp:
+            fp.write(code)
+        output = os.path.join(temp, "program")
+        result = subprocess.run([cc, *cflags, "-o", output, source, "-lm"], capture_output=True)
+        if result.returncode:
+            raise LCCompileError(f"'{cc}' failed:\n{result.stderr.decode(errors='replace').strip()}")
+        # atomic, concurrent compilations of one program don't see a partial binary
+        os.replace(output, binary)
+    return binary
+
+
+##########################
+#### ARGUMENTS PARSER ####
+##########################
+def make_options(opts, args):
+    options = {
+        'inputfile': None,
+        'outputfile': None,
+        'binary': None,
+        'run': False,
+        'args': [],
+    }
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print_help()
+            exit(0)
+        elif opt in ["-o", "--output"]:
+            if arg == "":
+                print("Output file can't be empty")
+                exit(1)
+            options['outputfile'] = f"{arg}.c"
+        elif opt in ["-b", "--binary"]:
+            if arg == "":
+                print("Binary file can't be empty")
+                exit(1)
+            options['binary'] = arg
+        elif opt in ["-x", "--run"]:
+            options['run'] = True
+    if not args:
+        print("Input file not specified. Use 'LCTranslator.py -h' for help")
+        exit(1)
+    options['inputfile'] = args[0]
+    options['args'] = args[1:]
+    return options
+
+def print_help():
+    print("NAME:")
+    print("\tLCTranslator - translator into C99 for non-exsitend L lang")
+
+    print("SYNOPSIS:")
+    print("\tLCTranslator [options]... input_file [program_args]...")
+
+    print("DESCRIPTION:")
+    print("\tWrite C code to the standard output, or build and run it.\n")
+    print("\tOptions:")
+    print("\t  -h,    --help\t\t\tDisplay info about program.")
+    print("\t  -o[=], --output[=]\t\tOutput C file. If not specified, printed into stdout.")
+    print("\t  -b[=], --binary[=]\t\tBuild the program with 'cc' (CC and CFLAGS env variables are used)")
+    print("\t\t\t\t\tand copy the binary into this file. Binaries are cached in LCC_CACHE")
+    print("\t\t\t\t\t(default '~/.cache/l-lang/cc').")
+    print("\t  -x,    --run\t\t\tBuild the program and run it with program_args.")
+
+    print("\tArguments:")
+    print("\t  input_file\t\t\tRequired. File with L lang source to be translated.")
+    print("\t  program_args\t\t\tArguments of 'main' for '-x', parsed as numbers.\n")
+
+
+if __name__ == "__main__":
+    from LLang import parse, LSyntaxError
+
+    try:
+        # options end at input_file, the rest belongs to the program
+        opts, args = getopt.getopt(sys.argv[1:], "ho:b:x", ["help", "output=", "binary=", "run"])
+    except getopt.GetoptError as e:
+        print(e)
+        print("use 'LCTranslator -h' for help")
+        exit(2)
+
+    options = make_options(opts, args)
+    try:
+        with open(options['inputfile'], encoding="utf-8") as fp:
+            text = fp.read()
+        parsed = parse(text)
+    except IOError as error:
+        print(error)
+        exit(0)
+    except LSyntaxError as error:
+        for message in error.errors:
+            print(message)
+        exit(0)
+
+    semantic = LSemantic(text).analyze(parsed.ast)
+    try:
+        code = "\n".join(LCTranslator().translate(parsed.ast, semantic))
+    except LCTranslatorError as error:
+        print(error)
+        exit(1)
+    for warn in parsed.warns + semantic.errors + semantic.warns:
+        print(f"WARNING::{warn}", file=sys.stderr)
+
+    if options['outputfile']:
+        os.makedirs(os.path.dirname(os.path.abspath(options['outputfile'])), exist_ok=True)
+        with open(options['outputfile'], "w", encoding="utf-8") as fp:
+            fp.write(code)
+        print(f"Code translated into {os.path.abspath(options['outputfile'])}")
+    elif not options['binary'] and not options['run']:
+        print(code)
+
+    if options['binary'] or options['run']:
+        try:
+            binary = compile_c(code)
+        except LCCompileError as error:
+            print(error)
+            exit(1)
+        if options['binary']:
+            shutil.copyfile(binary, options['binary'])
+            shutil.copymode(binary, options['binary'])
+        if options['run']:
+            sys.stdout.flush()
+            exit(subprocess.run([binary, *options['args']]).returncode)
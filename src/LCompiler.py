@@ -0,0 +1,139 @@
+import os, asyncio, weakref
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from LLang import compile_text, LSyntaxError
+from LStats import LStats
+
+# Reentrant compile core and asyncio API on top of it.
+#
+# What is shared between requests: lexer and parser tables, built once when
+# classes of 'LLexer' and 'LParser' are created, read-only afterwards.
+# What is not: instances. sly keeps the state of a running lex/parse on them
+# ('text', 'lineno', state and symbol stacks), 'LParser' keeps 'text', 'warns'
+# and 'errors', 'LTranslator' keeps its output. So every request gets its own
+# instances ('LLang' creates them per call, cheap) and all results go into
+# its 'CompileContext'.
+# 'compile_context' touches nothing else and can run in any number of
+# threads or processes at once.
+
+
+##########################
+#####    CONTEXT     #####
+##########################
+class CompileContext:
+    # one compile request: source and options in, results out.
+    # Holds plain data only, so it travels to process workers and back
+    def __init__(self, text, source=None, runtime=False, source_map=False, infer_types=True) -> None:
+        self.text = text
+        self.source = source            # file name for source map and messages
+        self.runtime = runtime
+        self.with_source_map = source_map
+        self.infer_types = infer_types
+        self.errors = []                # syntax errors, nothing is translated then
+        self.warns = []                 # parser and semantic warnings
+        self.lines = None               # translated python
+        self.source_map = None
+        self.times = {}                 # stage -> seconds
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def code(self):
+        return "".join(line + "\n" for line in self.lines) if self.lines is not None else None
+
+
+def compile_context(context: CompileContext):
+    stats = LStats(trace_memory=False)
+    try:
+        result = compile_text(
+            context.text, stats=stats, runtime=context.runtime,
+            source_map=context.with_source_map, infer_types=context.infer_types,
+        )
+    except LSyntaxError as error:
+        context.errors = error.errors
+        return context
+    finally:
+        context.times = {record["stage"]: record["wall_time"] for record in stats.stages}
+    context.warns = result.warns
+    if context.with_source_map:
+        context.source_map = result.source_map(context.source)
+    # tagged lines are dropped, plain strings are cheaper to send between processes
+    context.lines = [str(line) for line in result.lines]
+    return context
+
+
+##########################
+#####   ASYNC API    #####
+##########################
+class LCompiler:
+    # Compiles in an executor, so the event loop is never blocked by lexing,
+    # parsing or translation. 'executor' is "thread", "process" or an Executor
+    # instance (not closed by the compiler). Threads keep latency low but share
+    # one GIL; processes compile in parallel at the cost of sending source and
+    # result between processes.
+    #
+    # At most 'max_pending' requests are in the executor at once, other
+    # callers wait in 'compile' until a slot is free. Producers awaiting
+    # 'compile' are slowed down to the speed of the workers instead of
+    # queueing unbounded work. Slots are counted per event loop, so one
+    # compiler can serve several 'asyncio.run' in turn.
+    def __init__(self, executor: str|Executor="thread", workers:int|None=None, max_pending:int|None=None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        if isinstance(executor, Executor):
+            self.executor, self.owns_executor = executor, False
+        elif executor == "thread":
+            self.executor, self.owns_executor = ThreadPoolExecutor(self.workers, thread_name_prefix="lcompiler"), True
+        elif executor == "process":
+            self.executor, self.owns_executor = ProcessPoolExecutor(self.workers), True
+        else:
+            raise ValueError(f"Unknown executor {executor!r}. 'thread', 'process' or an Executor are allowed")
+        self.max_pending = max_pending or self.workers * 2
+        self.semaphores = weakref.WeakKeyDictionary()  # event loop -> its semaphore
+        self.pending = 0
+
+    def slots(self):
+        # semaphore of the running loop, an asyncio one can't be shared between loops
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.max_pending)
+        return semaphore
+
+    async def compile(self, source: str, filename:str|None=None, **options) -> CompileContext:
+        # options are the ones of 'CompileContext': runtime, source_map, infer_types
+        context = CompileContext(source, filename, **options)
+        async with self.slots():
+            return await self.run(compile_context, context)
+
+    async def compile_file(self, path, **options) -> CompileContext:
+        # file is read in the executor as well, within the slot of its compile
+        async with self.slots():
+            text = await self.run(read_text, path)
+            return await self.run(compile_context, CompileContext(text, path, **options))
+
+    async def run(self, function, *args):
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        if self.owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def aclose(self):
+        # waits for queued compiles in a thread, other coroutines keep running
+        await asyncio.to_thread(self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
+
+
+def read_text(path):
+    with open(path, encoding="utf-8") as fp:
+        return fp.read()
@@ -0,0 +1,220 @@
+import sys, getopt, random
+
+# Generator of synthetic, valid and runnable L programs.
+#
+# Generated programs always terminate: functions call only earlier defined
+# ones (call chains are at most 'call_depth' long) and every 'while' is
+# a counted loop with a small literal bound. Variables are assigned before
+# use, divisors are '(e * e + 1)' and assigned values are squashed by
+# 'v / (v * v + 1)', so there is no division by zero and no overflow.
+
+
+##########################
+#####   GENERATOR    #####
+##########################
+class LGenerator:
+    indent = " "*4
+
+    def __init__(self, seed=0, functions=10, statements=6, expr_depth=3,
+                 fanout=2, nesting=2, args=2, call_depth=3, writes=True):
+        self.random = random.Random(seed)
+        self.functions = functions
+        self.statements = statements
+        self.expr_depth = expr_depth
+        self.fanout = fanout
+        self.nesting = nesting
+        self.args = args
+        self.call_depth = call_depth
+        self.writes = writes
+        self.defined = []  # (fname, number of args, call height)
+        self.locals = 0
+        self.loops = 0
+        self.calls = 0
+        self.height = 0
+
+    #===== Whole programs =====#
+    def program(self):
+        return "".join(self.chunks())
+
+    def chunks(self, size=None):
+        # yields function sources until 'functions' are defined or 'size' chars generated
+        generated = 0
+        while (generated < size) if size is not None else (len(self.defined) < self.functions):
+            chunk = self.function()
+            generated += len(chunk)
+            yield chunk
+        yield self.main()
+
+    def write(self, fp, size=None):
+        for chunk in self.chunks(size):
+            fp.write(chunk)
+
+    #===== Definitions =====#
+    def function(self):
+        fname = f"f{len(self.defined)}"
+        nargs = self.random.randint(0, self.args)
+        scope = [f"a{i}" for i in range(nargs)]
+        self.calls = 0
+        self.height = 0
+        self.loops = 0
+        self.locals = 0
+        body = self.block(scope, self.statements, self.nesting, 1)
+        result = self.expression(scope, self.expr_depth)
+        lines = [
+            f"function {fname}({', '.join(scope[:nargs])}) {{",
+            *body,
+            f"{self.indent}r = {result};",
+            f"{self.indent}return r / (r * r + 1);",
+            "}", "", "",
+        ]
+        self.defined.append((fname, nargs, self.height + 1))
+        return "\n".join(lines)
+
+    def main(self):
+        self.calls = 0
+        self.height = 0
+        self.loops = 0
+        self.locals = 0
+        scope = []
+        lines = ["function main() {"]
+        lines.extend(self.block(scope, self.statements, self.nesting, 1))
+        for fname, nargs, _ in self.defined[-self.fanout:] if self.fanout else []:
+            args = ", ".join(self.leaf(scope) for _ in range(nargs))
+            lines.append(f"{self.indent}write({fname}({args}));")
+        lines.extend([f"{self.indent}return 0;", "}", ""])
+        return "\n".join(lines)
+
+    #===== Statements =====#
+    def block(self, scope, count, nesting, level):
+        scope = list(scope)
+        lines = []
+        for _ in range(count):
+            roll = self.random.random()
+            if roll < 0.15 and nesting > 0:
+                lines.extend(self.if_statement(scope, nesting, level))
+            elif roll < 0.25 and nesting > 0:
+                lines.extend(self.while_statement(scope, nesting, level))
+            elif roll < 0.40 and self.writes:
+                lines.append(f"{self.indent*level}write({self.condition(scope, 1) if roll < 0.3 else self.expression(scope, self.expr_depth)});")
+            else:
+                lines.extend(self.assignment(scope, level))
+        return lines
+
+    def assignment(self, scope, level):
+        if scope and self.random.random() < 0.5:
+            var = self.random.choice([var for var in scope if not var.startswith("k")] or [None])
+        else:
+            var = None
+        if var is None:
+            var = f"v{self.locals}"
+            self.locals += 1
+        lines = [
+            f"{self.indent*level}{var} = {self.expression(scope, self.expr_depth)};",
+            f"{self.indent*level}{var} = {var} / ({var} * {var} + 1);",
+        ]
+        if var not in scope:
+            scope.append(var)
+        return lines
+
+    def if_statement(self, scope, nesting, level):
+        lines = [f"{self.indent*level}if ({self.condition(scope, 2)}) {{"]
+        lines.extend(self.block(scope, max(1, self.statements // 2), nesting - 1, level + 1))
+        if self.random.random() < 0.5:
+            lines.append(f"{self.indent*level}}} else {{")
+            lines.extend(self.block(scope, max(1, self.statements // 2), nesting - 1, level + 1))
+        lines.append(f"{self.indent*level}}}")
+        return lines
+
+    def while_statement(self, scope, nesting, level):
+        var = f"k{self.loops}"
+        self.loops += 1
+        lines = [
+            f"{self.indent*level}{var} = 0;",
+            f"{self.indent*level}while ({var} < {self.random.randint(1, 3)}) {{",
+            *self.block(scope + [var], max(1, self.statements // 2), nesting - 1, level + 1),
+            f"{self.indent*(level+1)}{var} = {var} + 1;",
+            f"{self.indent*level}}}",
+        ]
+        return lines
+
+    #===== Expressions =====#
+    def condition(self, scope, depth):
+        roll = self.random.random()
+        if depth > 1 and roll < 0.2:
+            return f"{self.condition(scope, depth-1)} && {self.condition(scope, depth-1)}"
+        if depth > 1 and roll < 0.35:
+            return f"({self.condition(scope, depth-1)} || {self.condition(scope, depth-1)})"
+        if depth > 1 and roll < 0.45:
+            return f"!({self.condition(scope, depth-1)})"
+        op = self.random.choice(["==", "!=", "<=", "<", ">=", ">"])
+        return f"{self.expression(scope, 1)} {op} {self.expression(scope, 1)}"
+
+    def leaf(self, scope):
+        roll = self.random.random()
+        if scope and roll < 0.6:
+            return self.random.choice(scope)
+        if roll < 0.75:
+            return f"{self.random.randint(0, 9)}.{self.random.randint(0, 99)}"
+        if roll < 0.8:
+            return bin(self.random.randint(0, 15)).replace("0b", self.random.choice(["0b", "0B"]))
+        return str(self.random.randint(0, 20))
+
+    def call(self, scope):
+        callees = [(fname, nargs, height) for fname, nargs, height in self.defined if height <= self.call_depth]
+        if not callees or self.calls >= self.fanout:
+            return None
+        fname, nargs, height = self.random.choice(callees)
+        self.calls += 1
+        self.height = max(self.height, height)
+        return f"{fname}({', '.join(self.leaf(scope) for _ in range(nargs))})"
+
+    def expression(self, scope, depth):
+        if depth <= 0:
+            return self.leaf(scope)
+        roll = self.random.random()
+        if roll < 0.1:
+            return self.call(scope) or self.leaf(scope)
+        if roll < 0.15:
+            return f"-{self.expression(scope, depth-1)}"
+        if roll < 0.2:
+            return f"{self.leaf(scope)} ^ {self.random.randint(2, 3)}"
+        if roll < 0.3:
+            divisor = self.expression(scope, depth-1)
+            return f"{self.expression(scope, depth-1)} / (({divisor}) * ({divisor}) + 1)"
+        if roll < 0.35:
+            return f"({self.expression(scope, depth-1)})"
+        op = self.random.choice(["+", "-", "*"])
+        return f"{self.expression(scope, depth-1)} {op} {self.expression(scope, depth-1)}"
+
+
+def parse_size(size:str):
+    units = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+    for unit, factor in units.items():
+        if size.upper().endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+##########################
+####### MAIN FRAME #######
+##########################
+# Usage: python LGenerator.py [--seed= --functions= --statements= --depth=
+#                              --fanout= --nesting= --size=] [output_file]
+if __name__ == "__main__":
+    opts, args = getopt.getopt(sys.argv[1:], "", [
+        "seed=", "functions=", "statements=", "depth=", "fanout=", "nesting=", "size="
+    ])
+    params, size = {}, None
+    for opt, arg in opts:
+        if opt == "--size":
+            size = parse_size(arg)
+        elif opt == "--depth":
+            params["expr_depth"] = int(arg)
+        else:
+            params[opt[2:]] = int(arg)
+    generator = LGenerator(**params)
+    if args:
+        with open(args[0], "w") as fp:
+            generator.write(fp, size)
+    else:
+        generator.write(sys.stdout, size)
@@ -0,0 +1,983 @@
+import sys, getopt
+
+from LParser import Node
+from LTranslator import LTranslator
+from LSourceMap import SourceLine
+from LWalk import walk
+
+# SSA form of L functions, between the tree and the backends. 'lower' turns
+# a FDEF into a control-flow graph of basic blocks:
+#
+#   Block   'phis', 'instrs' and one terminator 'term': "jump", "branch"
+#           ('if' and short-circuits, 'attr' is the block both arms join at,
+#           None when neither of them falls through), "loop" (condition of
+#           a 'while', 'attr' is its header) or "return". Loop headers know
+#           their exit ('loop_exit'), so structured code can be rebuilt.
+#   Instr   'op', 'dest' (Value or None) and 'args' (Values and Consts)
+#   Value   SSA value: a version of variable 'var' ("a.1") or a temporary
+#           ("%1", 'var' is None)
+#
+# Arms of 'if' and short-circuits, bodies and exits of loops always get their
+# own blocks, so there are no critical edges and phis become copies at the
+# end of predecessors. '&&' and '||' are branches joined by a phi, they give
+# the operand which decided, like in python. Reads of unassigned variables
+# are "undef" values, emitted python fails on them like translated one.
+# Statements after 'return' are unreachable and dropped.
+#
+# Analyses: 'dominators' (Cooper, Harvey and Kennedy), 'dominance_frontiers',
+# 'liveness', 'verify' (invariants of the form) and 'coalesce' (out of SSA
+# names). 'format_function' prints a function, 'LIRTranslator' emits python
+# equivalent to the one of LTranslator from it.
+
+BINARY = {
+    "ADD": "add", "SUB": "sub", "MUL": "mul", "DIV": "div", "POW": "pow",
+    "EQU": "eq", "NEQ": "ne", "LEQ": "le", "LES": "lt", "GEQ": "ge", "GRT": "gt",
+}
+UNARY = {"NEG": "neg", "NOT": "not"}
+SUCCESSORS = {"jump": 1, "branch": 2, "loop": 2, "return": 0}
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def named(obj_, name_):
+    return isinstance(obj_, Node) and obj_.name == name_
+
+def dominates(idom, a, b):
+    while b is not None and b is not a:
+        b = idom[b]
+    return b is a
+
+
+##########################
+#####       IR       #####
+##########################
+class LIRError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+class Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __str__(self):
+        return f"{self.value}"
+
+class Value:
+    __slots__ = ("var", "version", "instr")
+
+    def __init__(self, var, instr=None) -> None:
+        self.var = var
+        self.version = None
+        self.instr = instr
+
+    def __str__(self):
+        return f"%{self.version}" if self.var is None else f"{self.var}.{self.version}"
+
+class Instr:
+    __slots__ = ("op", "dest", "args", "attr", "lineno", "block")
+
+    def __init__(self, op, dest=None, args=(), attr=None, lineno=None) -> None:
+        self.op = op
+        self.dest = dest
+        self.args = list(args)
+        self.attr = attr        # callee of "call", join of "branch", header of "loop"
+        self.lineno = lineno    # L line of the statement
+        self.block = None
+
+class Block:
+    __slots__ = ("id", "phis", "instrs", "term", "preds", "succs", "loop_exit")
+
+    def __init__(self) -> None:
+        self.id = None
+        self.phis = []
+        self.instrs = []
+        self.term = None
+        self.preds = []
+        self.succs = []
+        self.loop_exit = None
+
+class Function:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.params = []        # Values of arguments
+        self.blocks = []        # reverse postorder, entry first
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def values(self):
+        for block in self.blocks:
+            for instr in (*block.phis, *block.instrs):
+                if instr.dest is not None:
+                    yield instr.dest
+
+
+##########################
+#####    LOWERING    #####
+##########################
+# marker walked between operands of '&&' and '||'
+SHORT = object()
+
+class LIRBuilder:
+    # Tree to CFG in one walk, variables are their names at first ('dest' and
+    # 'args' hold strings). Then SSA: phis at iterated dominance frontiers
+    # where the variable is live (pruned SSA) and renaming along the
+    # dominator tree
+    def __init__(self) -> None:
+        self.blocks = []
+        self.block = None
+        self.lineno = None
+        self.operands = []      # operands of the expression being lowered
+        self.shorts = []        # (left operand, skip block, join) of open '&&' and '||'
+        self.undefs = {}        # var -> "undef" Value
+
+    def lower(self, fdef: Node):
+        if not named(fdef, "FDEF"):
+            raise LIRError(f"Node[{fdef.name!r}] passed instead of FDEF")
+        function = Function(fdef.FNAME.value)
+        self.blocks, self.undefs = [], {}
+        self.block = self.new_block()
+        self.lineno = fdef.lineno
+        for arg in fdef.FARGS.value or ():
+            if named(arg, "FARG"):
+                self.emit("param", arg.value)
+        walk(fdef.FBODY, self.enter, self.leave)
+        # falls off the end, returns None
+        self.lineno = None
+        self.terminate("return", [], ())
+
+        function.blocks = self.reachable(self.blocks[0])
+        self.to_ssa(function)
+        function.params = [instr.dest for instr in function.entry.instrs if instr.op == "param"]
+        number(function)
+        return function
+
+    #===== Building =====#
+    def new_block(self):
+        block = Block()
+        self.blocks.append(block)
+        return block
+
+    def emit(self, op, dest=None, args=(), attr=None):
+        instr = Instr(op, dest, args, attr, self.lineno)
+        instr.block = self.block
+        self.block.instrs.append(instr)
+        return instr
+
+    def temp(self, op, args, attr=None):
+        instr = self.emit(op, None, args, attr)
+        instr.dest = Value(None, instr)
+        return instr.dest
+
+    def terminate(self, op, args, succs, attr=None):
+        instr = Instr(op, None, args, attr, self.lineno)
+        instr.block = self.block
+        self.block.term = instr
+        self.block.succs = list(succs)
+        for succ in succs:
+            succ.preds.append(self.block)
+
+    def jump(self, target):
+        # blocks ended by 'return' stay as they are
+        if self.block.term is None:
+            self.terminate("jump", [], (target,))
+
+    def assign(self, var, operand):
+        instr = operand.instr if type(operand) is Value else None
+        if instr is not None and instr.op != "phi" and self.block.instrs and self.block.instrs[-1] is instr:
+            # value of the expression is the new version of 'var'
+            instr.dest = var
+        else:
+            self.emit("copy", var, [operand])
+
+    #===== Statements =====#
+    # context of BRANCH is (its first block, block jumped to at its end, block to go on with)
+    def enter(self, node, context):
+        name = node.name
+        if name == "FBODY":
+            return None
+        if name == "BRANCH":
+            self.block = context[0]
+            return None
+        self.lineno = node.lineno
+        if name == "IF":
+            cond, branch_then, branch_else = node.value
+            test = self.expression(cond.value[0])
+            then_block, else_block, join = self.new_block(), self.new_block(), self.new_block()
+            self.terminate("branch", [test], (then_block, else_block), join)
+            return [(branch_then, (then_block, join, None)), (branch_else, (else_block, join, join))]
+        if name == "WHILE":
+            cond, branch = node.value
+            header = self.new_block()
+            self.jump(header)
+            self.block = header
+            test = self.expression(cond.value[0])
+            body, header.loop_exit = self.new_block(), self.new_block()
+            self.terminate("loop", [test], (body, header.loop_exit), header)
+            return [(branch, (body, header, header.loop_exit))]
+        if name == "VARASGN":
+            self.assign(node.value[0].value, self.expression(node.value[1]))
+        elif name == "READ":
+            self.emit("read", node.value[0].value)
+        elif name == "WRITE":
+            self.emit("write", None, [self.expression(node.value[0])])
+        elif name == "RETURN":
+            self.terminate("return", [self.expression(node.value[0])], ())
+            # statements after 'return' go into an unreachable block
+            self.block = self.new_block()
+        else:
+            # expression as a statement, a lone variable still fails when unassigned
+            operand = self.expression(node)
+            if type(operand) is str:
+                self.emit("eval", None, [operand])
+        return []
+
+    def leave(self, node, context):
+        if node.name == "BRANCH":
+            _, target, after = context
+            self.jump(target)
+            if after is not None:
+                self.block = after
+
+    #===== Expressions =====#
+    # -> operand of the value: Const, temporary Value or name of a variable
+    def expression(self, node):
+        walk(node, self.enter_expression, self.leave_expression)
+        return self.operands.pop()
+
+    def enter_expression(self, node, context):
+        if node is SHORT:
+            # left operand is done, branch around the right one
+            left = self.operands.pop()
+            right, skip, join = self.new_block(), self.new_block(), self.new_block()
+            succs = (right, skip) if context.name == "AND" else (skip, right)
+            self.terminate("branch", [left], succs, join)
+            self.shorts.append((left, skip, join))
+            self.block = right
+            return []
+        name = node.name
+        if name == "VAR":
+            self.operands.append(node.value)
+            return []
+        if name == "INT" or name == "FLOAT":
+            self.operands.append(Const(node.value))
+            return []
+        if name == "AND" or name == "OR":
+            left, right = node.value
+            return [(left, None), (SHORT, node), (right, None)]
+        if name == "FCALL":
+            return [(arg, None) for arg in node.value[1:]]
+        return None
+
+    def leave_expression(self, node, context):
+        if node is SHORT:
+            return
+        name = node.name
+        operands = self.operands
+        if name in BINARY:
+            right = operands.pop()
+            operands.append(self.temp(BINARY[name], [operands.pop(), right]))
+        elif name in UNARY:
+            operands.append(self.temp(UNARY[name], [operands.pop()]))
+        elif name == "FCALL":
+            count = len(node.value) - 1
+            args = operands[len(operands)-count:]
+            del operands[len(operands)-count:]
+            operands.append(self.temp("call", args, node.FNAME.value))
+        elif name == "AND" or name == "OR":
+            right = operands.pop()
+            left, skip, join = self.shorts.pop()
+            self.jump(join)
+            self.block = skip
+            self.jump(join)
+            self.block = join
+            phi = Instr("phi", None, [right, left], lineno=self.lineno)
+            phi.dest = Value(None, phi)
+            phi.block = join
+            join.phis.append(phi)
+            operands.append(phi.dest)
+        elif name not in ("VAR", "INT", "FLOAT"):
+            raise LIRError(f"Node[{name!r}] can't be lowered")
+
+    #===== SSA =====#
+    def reachable(self, entry):
+        # -> blocks reachable from 'entry' in reverse postorder, edges from
+        # the others are cut
+        order, seen = [], {entry}
+        stack = [(entry, iter(reversed(entry.succs)))]
+        while stack:
+            block, succs = stack[-1]
+            for succ in succs:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append((succ, iter(reversed(succ.succs))))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        for number, block in enumerate(order):
+            block.id = number
+            if any(pred not in seen for pred in block.preds):
+                keep = [index for index, pred in enumerate(block.preds) if pred in seen]
+                for phi in block.phis:
+                    phi.args = [phi.args[index] for index in keep]
+                block.preds = [block.preds[index] for index in keep]
+            if block.term.op == "branch" and block.term.attr not in seen:
+                block.term.attr = None
+        return order
+
+    def to_ssa(self, function):
+        idom = dominators(function)
+        frontiers = dominance_frontiers(function, idom)
+        live_in, _ = liveness(function)
+        sites = {}
+        for block in function.blocks:
+            for instr in block.instrs:
+                if type(instr.dest) is str:
+                    sites.setdefault(instr.dest, []).append(block)
+        for var, blocks in sites.items():
+            queued, placed = set(blocks), set()
+            while blocks:
+                block = blocks.pop()
+                for front in sorted(frontiers[block], key=lambda block: block.id):
+                    if front in placed or var not in live_in[front]:
+                        continue
+                    phi = Instr("phi", var, [None]*len(front.preds), var)
+                    phi.block = front
+                    front.phis.append(phi)
+                    placed.add(front)
+                    if front not in queued:
+                        queued.add(front)
+                        blocks.append(front)
+
+        children = {block: [] for block in function.blocks}
+        for block in function.blocks[1:]:
+            children[idom[block]].append(block)
+        stacks = {}
+
+        def use(var):
+            if stacks.get(var):
+                return stacks[var][-1]
+            if var not in self.undefs:
+                instr = Instr("undef", None, (), lineno=None)
+                instr.dest = Value(var, instr)
+                instr.block = function.entry
+                self.undefs[var] = instr.dest
+            return self.undefs[var]
+
+        def define(instr, pushed):
+            instr.dest = Value(instr.dest, instr)
+            stacks.setdefault(instr.dest.var, []).append(instr.dest)
+            pushed.append(instr.dest.var)
+
+        def enter(block, pushed):
+            # 'pushed' are variables defined in 'block', popped when its
+            # subtree of the dominator tree is done
+            for phi in block.phis:
+                if type(phi.dest) is str:
+                    define(phi, pushed)
+            for instr in (*block.instrs, block.term):
+                instr.args = [use(arg) if type(arg) is str else arg for arg in instr.args]
+                if type(instr.dest) is str:
+                    define(instr, pushed)
+            for succ in block.succs:
+                index = succ.preds.index(block)
+                for phi in succ.phis:
+                    arg = phi.attr if phi.attr is not None else phi.args[index]
+                    if type(arg) is str:
+                        phi.args[index] = use(arg)
+            return [(child, []) for child in children[block]]
+
+        def leave(block, pushed):
+            for var in pushed:
+                stacks[var].pop()
+
+        walk(function.entry, enter, leave, context=[])
+        # undefined values follow the arguments
+        entry = function.entry
+        params = [instr for instr in entry.instrs if instr.op == "param"]
+        entry.instrs[:len(params)] = [*params, *(value.instr for value in self.undefs.values())]
+
+def number(function):
+    # versions of every variable and temporaries are numbered in block order
+    versions = {}
+    for value in function.values():
+        versions[value.var] = versions.get(value.var, -1 if value.var is not None else 0) + 1
+        value.version = versions[value.var]
+
+def lower(fdef: Node):
+    return LIRBuilder().lower(fdef)
+
+def lower_program(ast: Node):
+    # -> [Function] of every FDEF in source order
+    return [lower(fdef) for fdef in ast.value if named(fdef, "FDEF")]
+
+
+##########################
+#####    ANALYSES    #####
+##########################
+def dominators(function):
+    # -> {block: immediate dominator}, None for the entry
+    order = {block: number for number, block in enumerate(function.blocks)}
+    idom = {function.entry: function.entry}
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks[1:]:
+            new = None
+            for pred in block.preds:
+                if pred not in idom:
+                    continue
+                if new is None:
+                    new = pred
+                    continue
+                a, b = pred, new
+                while a is not b:
+                    while order[a] > order[b]:
+                        a = idom[a]
+                    while order[b] > order[a]:
+                        b = idom[b]
+                new = a
+            if idom.get(block) is not new:
+                idom[block] = new
+                changed = True
+    idom[function.entry] = None
+    return idom
+
+def dominance_frontiers(function, idom):
+    # -> {block: set of blocks where its dominance ends}
+    frontiers = {block: set() for block in function.blocks}
+    for block in function.blocks:
+        if len(block.preds) < 2:
+            continue
+        for pred in block.preds:
+            runner = pred
+            while runner is not idom[block]:
+                frontiers[runner].add(block)
+                runner = idom[runner]
+    return frontiers
+
+def liveness(function):
+    # -> (live_in, live_out), {block: set of values}. Phi results are defined
+    # at the top of their block and are not live into it, phi arguments are
+    # live out of the predecessor they come from. Before renaming variables
+    # are their names
+    upward, defined = {}, {}
+    phi_uses = {block: set() for block in function.blocks}
+    for block in function.blocks:
+        uses, defs = set(), set()
+        for phi in block.phis:
+            defs.add(phi.dest)
+            for pred, arg in zip(block.preds, phi.args):
+                if arg is not None and type(arg) is not Const:
+                    phi_uses[pred].add(arg)
+        for instr in (*block.instrs, block.term):
+            for arg in instr.args:
+                if type(arg) is not Const and arg not in defs:
+                    uses.add(arg)
+            if instr.dest is not None:
+                defs.add(instr.dest)
+        upward[block], defined[block] = uses, defs
+
+    live_in = {block: set(upward[block]) for block in function.blocks}
+    live_out = {block: set() for block in function.blocks}
+    changed = True
+    while changed:
+        changed = False
+        # postorder, most of the values flow backwards in one pass
+        for block in reversed(function.blocks):
+            out = set(phi_uses[block])
+            for succ in block.succs:
+                out |= live_in[succ]
+            if out != live_out[block]:
+                live_out[block] = out
+                live_in[block] = upward[block] | (out - defined[block])
+                changed = True
+    return live_in, live_out
+
+def verify(function):
+    # raises LIRError when 'function' breaks the form: terminators agree with
+    # edges, no critical edges, every value is defined once and its
+    # definition dominates its uses
+    idom = dominators(function)
+    defined = {}
+    for block in function.blocks:
+        term = block.term
+        if term is None or len(block.succs) != SUCCESSORS.get(term.op):
+            raise LIRError(f"b{block.id}: terminator doesn't match {len(block.succs)} successor(s)")
+        for succ in block.succs:
+            if block not in succ.preds:
+                raise LIRError(f"b{block.id}: b{succ.id} misses it in predecessors")
+            if len(block.succs) > 1 and len(succ.preds) > 1:
+                raise LIRError(f"b{block.id}: critical edge to b{succ.id}")
+        for pred in block.preds:
+            if block not in pred.succs:
+                raise LIRError(f"b{block.id}: b{pred.id} misses it in successors")
+        for position, instr in enumerate((*block.phis, *block.instrs, term)):
+            if instr.block is not block:
+                raise LIRError(f"b{block.id}: {instr.op} belongs to another block")
+            if instr.op == "phi" and len(instr.args) != len(block.preds):
+                raise LIRError(f"b{block.id}: phi has {len(instr.args)} argument(s) for {len(block.preds)} predecessor(s)")
+            if instr.dest is not None:
+                if instr.dest in defined:
+                    raise LIRError(f"b{block.id}: {instr.dest} is defined twice")
+                defined[instr.dest] = (block, position)
+
+    for block in function.blocks:
+        for position, instr in enumerate((*block.phis, *block.instrs, block.term)):
+            for index, arg in enumerate(instr.args):
+                if type(arg) is Const:
+                    continue
+                if type(arg) is not Value or arg not in defined:
+                    raise LIRError(f"b{block.id}: {instr.op} uses undefined {arg}")
+                def_block, def_position = defined[arg]
+                # phi arguments are used at the end of their predecessor
+                user, at = (block.preds[index], float("inf")) if instr.op == "phi" else (block, position)
+                if not dominates(idom, def_block, user) or (def_block is user and def_position >= at):
+                    raise LIRError(f"b{block.id}: definition of {arg} doesn't dominate its use in {instr.op}")
+
+def coalesce(function):
+    # -> {value: python name}. Versions of a variable share its name, and
+    # temporaries joined by phis of short-circuits share one, unless two
+    # values of such a group are alive at once: then every value of the
+    # group gets a name of its own (arguments and undefined values keep the
+    # variable's one) and the emitter turns phis into copies. A split group
+    # which may be unassigned fails at the copy, earlier than the source
+    # would; lowering alone never splits groups of variables
+    parent = {}
+
+    def find(value):
+        root = parent.setdefault(value, value)
+        while root is not parent[root]:
+            parent[root] = parent[parent[root]]
+            root = parent[root]
+        return root
+
+    first = {}
+    for value in function.values():
+        if value.var is not None:
+            parent[find(value)] = find(first.setdefault(value.var, value))
+    for block in function.blocks:
+        for phi in block.phis:
+            for arg in phi.args:
+                if type(arg) is Value and arg.var == phi.dest.var:
+                    parent[find(arg)] = find(phi.dest)
+
+    _, live_out = liveness(function)
+    interfering = set()
+    for block in function.blocks:
+        live = set(live_out[block])
+        for instr in reversed((*block.instrs, block.term)):
+            if instr.dest is not None:
+                live.discard(instr.dest)
+                root = find(instr.dest)
+                if any(find(value) is root for value in live):
+                    interfering.add(root)
+            live.update(arg for arg in instr.args if type(arg) is Value)
+        # results of phis are defined at once at the top of the block
+        results = [phi.dest for phi in block.phis]
+        roots = [find(value) for value in results]
+        for value, root in zip(results, roots):
+            if roots.count(root) > 1 or any(find(other) is root for other in live if other not in results):
+                interfering.add(root)
+
+    taken = {value.var for value in function.values() if value.var is not None}
+    for block in function.blocks:
+        taken.update(instr.attr for instr in block.instrs if instr.op == "call")
+    counter = 0
+
+    def fresh(prefix):
+        nonlocal counter
+        while True:
+            counter += 1
+            if f"{prefix}{counter}" not in taken:
+                taken.add(f"{prefix}{counter}")
+                return f"{prefix}{counter}"
+
+    names, groups = {}, {}
+    for value in function.values():
+        root = find(value)
+        if root in interfering:
+            names[value] = value.var if value.instr.op in ("param", "undef") else fresh(f"_{value.var or 't'}")
+        else:
+            if root not in groups:
+                groups[root] = value.var if value.var is not None else fresh("_t")
+            names[value] = groups[root]
+    names[None] = fresh("_t")
+    return names
+
+def sequential(copies, spare):
+    # parallel copies [(dest, source)] -> sequential ones, 'spare' is a free
+    # name to break cycles with
+    copies = [(dest, source) for dest, source in copies if dest != source]
+    result = []
+    while copies:
+        for index, (dest, source) in enumerate(copies):
+            if all(other != dest for _, other in copies):
+                result.append((dest, source))
+                del copies[index]
+                break
+        else:
+            dest, source = copies[0]
+            result.append((spare, source))
+            copies[0] = (dest, spare)
+    return result
+
+
+##########################
+#####    PRINTING    #####
+##########################
+def format_instr(instr):
+    op, args = instr.op, instr.args
+    dest = f"{instr.dest} = " if instr.dest is not None else ""
+    if op == "phi":
+        return f"{dest}phi [{', '.join(f'b{pred.id}: {arg}' for pred, arg in zip(instr.block.preds, args))}]"
+    if op == "call":
+        return f"{dest}call {instr.attr}({', '.join(map(str, args))})"
+    if op == "jump":
+        return f"jump b{instr.block.succs[0].id}"
+    if op == "branch" or op == "loop":
+        then, other = instr.block.succs
+        join = "" if op == "loop" or instr.attr is None else f", join b{instr.attr.id}"
+        return f"{op} {args[0]} ? b{then.id} : b{other.id}{join}"
+    return f"{dest}{op}{' ' if args else ''}{', '.join(map(str, args))}"
+
+def format_function(function, idom=None, live=None):
+    # -> lines. 'idom' of 'dominators' and 'live' of 'liveness' add comments
+    indent = " "*4
+    lines = [f"function {function.name}({', '.join(map(str, function.params))})"]
+    for block in function.blocks:
+        notes = []
+        if block.preds:
+            notes.append(f"preds {', '.join(f'b{pred.id}' for pred in block.preds)}")
+        if idom and idom[block] is not None:
+            notes.append(f"idom b{idom[block].id}")
+        if block.loop_exit is not None:
+            notes.append(f"loop, exit b{block.loop_exit.id}")
+        lines.append(f"b{block.id}:" + (f"  ; {'; '.join(notes)}" if notes else ""))
+        if live:
+            lines.append(f"{indent}; live in: {', '.join(sorted(map(str, live[0][block])))}")
+        lines.extend(indent + format_instr(instr) for instr in (*block.phis, *block.instrs, block.term))
+        if live:
+            lines.append(f"{indent}; live out: {', '.join(sorted(map(str, live[1][block])))}")
+    lines.append("")
+    return lines
+
+
+##########################
+#####    EMITTER     #####
+##########################
+# markers walked for arms of 'if' and bodies of 'while'
+ARM = object()
+
+class LIRTranslator(LTranslator):
+    # LTranslator with bodies of functions emitted from their SSA form. Code
+    # is structured back with hints of the blocks: "branch" is 'if' with
+    # 'else' (arms end at the join), loop headers open 'while'. Temporaries
+    # used once, later in their block, are inlined into the expression of
+    # their user, if the order of evaluation is kept: only the newest ones
+    # are taken, older ones become assignments. Phis are copies at the end
+    # of predecessors, usually no-ops as versions of a variable share its name
+    operators = {
+        "add": "+", "sub": "-", "mul": "*", "div": "/",
+        "eq": "==", "ne": "!=", "le": "<=", "lt": "<", "ge": ">=", "gt": ">",
+    }
+
+    def __init__(self, infer_types=True, runtime=False, profile=False, source_map=False) -> None:
+        super().__init__(infer_types, runtime, profile, source_map)
+        self.names = {}
+        self.inline = set()
+        self.unused = set()
+        self.pending = {}       # inlined value -> code, oldest first
+        self.arms = []          # positions of lines opening arms
+        self.loop_numbers = {}  # header -> number of the loop in profile
+        self.level = 0
+
+    def body(self, fdef, level):
+        function = lower(fdef)
+        self.names = coalesce(function)
+        uses, users = use_counts(function)
+        # temporaries used once, by a later instruction of their block
+        self.inline = {value for value in function.values() if value.var is None and value.instr.op != "phi"
+                       and uses.get(value) == 1 and users[value] is value.instr.block}
+        self.unused = {value for value in function.values() if value not in uses}
+        self.pending, self.arms, self.loop_numbers = {}, [], {}
+        self.level = level
+        self.out = []
+        walk(function.entry, self.enter, self.leave, context=(level, None, False))
+        if not self.out:
+            self.out.append(f"{self.indent*level}pass")
+        return self.out
+
+    def line(self, level, code, lineno=None):
+        line = f"{self.indent*level}{code}"
+        self.out.append(SourceLine(line, lineno) if self.source_map and lineno is not None else line)
+
+    #===== Regions =====#
+    # context of a block is (indent level, block which ends the region, True
+    # when a loop header is entered from its 'while' line)
+    def enter(self, item, context):
+        if item is ARM:
+            return self.arm(*context)
+        block, (level, stop, inside) = item, context
+        while block is not stop or inside:
+            if block.loop_exit is not None and not inside:
+                return self.loop(block, level, stop)
+            inside = False
+            if self.profile and len(block.preds) == 1 and block.preds[0].term.op == "loop" \
+                    and block.preds[0].succs[0] is block:
+                self.line(level, f"_lprof_loops[{self.loop_numbers[block.preds[0].term.attr]}] += 1")
+            for instr in block.instrs:
+                self.instruction(instr, level)
+            term = block.term
+            if term.op == "return":
+                if term.args:
+                    self.line(level, f"return {self.codes(term, level)[0]}", term.lineno)
+                elif level != self.level:
+                    self.line(level, "return", term.lineno)
+                return []
+            if term.op == "jump":
+                self.flush(level)
+                self.copies(block, block.succs[0], level)
+                block = block.succs[0]
+                continue
+            test = self.codes(term, level)[0]
+            if term.op == "loop":
+                # condition which is not a 'while' line
+                self.line(level, f"if not {test}:", term.lineno)
+                self.line(level+1, "break")
+                block = block.succs[0]
+                continue
+            then, other = block.succs
+            if self.empty(then, term.attr) and not self.empty(other, term.attr):
+                # '||' goes on with its right operand when the left one is false
+                pairs = [(ARM, (f"if not {test}:", term.lineno, other, level, term.attr))]
+            else:
+                pairs = [(ARM, (f"if {test}:", term.lineno, then, level, term.attr)),
+                         (ARM, ("else:", None, other, level, term.attr))]
+            if term.attr is not None:
+                pairs.append((term.attr, (level, stop, False)))
+            return pairs
+        return []
+
+    def leave(self, item, context):
+        if item is not ARM:
+            return
+        position = self.arms.pop()
+        if len(self.out) == position + 1:
+            # empty arm: 'if' gets 'pass', 'else' is dropped
+            if context[0] == "else:":
+                self.out.pop()
+            else:
+                line = self.out[position]
+                self.out[position] = SourceLine(line + "pass", line.source) if isinstance(line, SourceLine) else line + "pass"
+
+    def arm(self, code, lineno, block, level, stop):
+        self.arms.append(len(self.out))
+        self.line(level, code, lineno)
+        return [(block, (level+1, stop, False))]
+
+    def loop(self, header, level, stop):
+        term = header.term
+        if self.profile:
+            self.loop_numbers[header] = len(self.loops)
+            self.loops.append(f"{self.fname}:while{len(self.loops)}")
+        if term.op == "loop":
+            # whole header inlined into the condition: plain 'while'
+            out, self.out = self.out, []
+            for instr in header.instrs:
+                self.instruction(instr, level+1)
+            test = self.codes(term, level+1)[0]
+            header_lines, self.out = self.out, out
+            if not header_lines:
+                return [(ARM, (f"while {test}:", term.lineno, header.succs[0], level, header)),
+                        (header.loop_exit, (level, stop, False))]
+        self.line(level, "while True:", term.lineno)
+        return [(header, (level+1, header, True)), (header.loop_exit, (level, stop, False))]
+
+    def empty(self, block, join):
+        # True when 'block' only jumps to 'join' and its copies are no-ops
+        if block.instrs or block.term.op != "jump" or block.succs[0] is not join:
+            return False
+        index = join.preds.index(block)
+        return all(self.names[phi.dest] == self.code(phi.args[index]) for phi in join.phis)
+
+    def copies(self, block, succ, level):
+        # undefined values are not copied, the name stays unassigned
+        index = succ.preds.index(block)
+        pairs = [(self.names[phi.dest], self.code(phi.args[index])) for phi in succ.phis
+                 if type(phi.args[index]) is Const or phi.args[index].instr.op != "undef"]
+        for dest, source in sequential(pairs, self.names[None]):
+            self.line(level, f"{dest} = {source}")
+
+    #===== Instructions =====#
+    def code(self, operand):
+        return f"{operand.value}" if type(operand) is Const else self.names[operand]
+
+    def codes(self, instr, level):
+        # codes of operands. Inlined values are taken when they are the
+        # newest pending ones, otherwise all pending values are assigned first
+        args = instr.args
+        taken = [arg for arg in args if arg in self.pending]
+        if taken and list(self.pending)[-len(taken):] != taken:
+            self.flush(level)
+            taken = []
+        codes = [self.pending.pop(arg) if arg in self.pending else self.code(arg) for arg in args]
+        if instr.dest not in self.inline:
+            # a statement, older pending values are evaluated before it
+            self.flush(level)
+        return codes
+
+    def flush(self, level):
+        for value, code in self.pending.items():
+            self.line(level, f"{self.names[value]} = {code}")
+        self.pending = {}
+
+    def instruction(self, instr, level):
+        op = instr.op
+        if op in ("param", "undef"):
+            return
+        codes = self.codes(instr, level)
+        if op in self.operators:
+            code = f"({codes[0]}{self.operators[op]}{codes[1]})"
+        elif op == "pow":
+            base = f"({codes[0]})" if codes[0].startswith("-") else codes[0]
+            code = f"({base}**{codes[1]})"
+        elif op == "neg":
+            code = f"-{codes[0]}"
+        elif op == "not":
+            code = f"not {codes[0]}"
+        elif op == "call":
+            code = f"{instr.attr}({', '.join(codes)})"
+        elif op == "copy" or op == "eval":
+            code = codes[0]
+        elif op == "write":
+            lineno = instr.lineno
+            if self.profile:
+                self.writes.append(f"{self.fname}:write{len(self.writes)}")
+                self.line(level, f"_lprof_writes[{len(self.writes)-1}] += 1", lineno)
+                lineno = None
+            self.line(level, f"{self.print}({codes[0]})", lineno)
+            return
+        elif op == "read":
+            self.read(self.names[instr.dest], instr.dest.var, level, instr.lineno)
+            return
+        else:
+            raise LIRError(f"Instruction {op!r} can't be emitted")
+        dest = instr.dest
+        if dest in self.inline:
+            self.pending[dest] = code
+        elif dest is None or dest in self.unused and dest.var is None:
+            self.line(level, code, instr.lineno)
+        else:
+            self.line(level, f"{self.names[dest]} = {code}", instr.lineno)
+
+    def read(self, name, var, level, lineno):
+        as_float = self.types and not self.types.is_observable(self.fname, var)
+        if self.runtime:
+            self.line(level, f"{name} = read({'float' if as_float else ''})", lineno)
+        elif as_float:
+            self.line(level, f"{name} = float(input())", lineno)
+        else:
+            self.line(level, f"{name} = input()", lineno)
+            self.line(level, "try:")
+            self.line(level+1, f"{name} = int({name})")
+            self.line(level, "except ValueError:")
+            self.line(level+1, f"{name} = float({name})")
+
+def use_counts(function):
+    # -> ({value: number of uses}, {value: block of its last non-phi use}),
+    # uses by phis are not counted in blocks
+    uses, users = {}, {}
+    for block in function.blocks:
+        for phi in block.phis:
+            for arg in phi.args:
+                uses[arg] = uses.get(arg, 0) + 1
+                users[arg] = None
+        for instr in (*block.instrs, block.term):
+            for arg in instr.args:
+                uses[arg] = uses.get(arg, 0) + 1
+                users[arg] = block
+    return uses, users
+
+
+##########################
+#### ARGUMENTS PARSER ####
+##########################
+def make_options(opts, args):
+    options = {
+        'inputfile': None,
+        'function': None,
+        'dominators': False,
+        'liveness': False,
+    }
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print_help()
+            exit(0)
+        elif opt in ["-f", "--function"]:
+            options['function'] = arg
+        elif opt in ["-d", "--dominators"]:
+            options['dominators'] = True
+        elif opt in ["-l", "--liveness"]:
+            options['liveness'] = True
+    if not args:
+        print("Input file not specified. Use 'LIR.py -h' for help")
+        exit(1)
+    options['inputfile'] = args[0]
+    return options
+
+def print_help():
+    print("NAME:")
+    print("\tLIR - SSA form of functions of non-exsitend L lang")
+
+    print("SYNOPSIS:")
+    print("\tLIR [options]... input_file")
+
+    print("DESCRIPTION:")
+    print("\tWrite basic blocks of every function to the standard output.\n")
+    print("\tOptions:")
+    print("\t  -h,    --help\t\t\tDisplay info about program.")
+    print("\t  -f[=], --function[=]\t\tOnly the function with this name.")
+    print("\t  -d,    --dominators\t\tAnnotate blocks with their immediate dominators.")
+    print("\t  -l,    --liveness\t\tAnnotate blocks with values live in and out of them.")
+
+    print("\tArguments:")
+    print("\t  input_file\t\t\tRequired. File with L lang source.\n")
+
+
+if __name__ == "__main__":
+    from LLang import parse, LSyntaxError
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hf:dl", ["help", "function=", "dominators", "liveness"])
+    except getopt.GetoptError as e:
+        print(e)
+        print("use 'LIR -h' for help")
+        exit(2)
+
+    options = make_options(opts, args)
+    try:
+        with open(options['inputfile'], encoding="utf-8") as fp:
+            text = fp.read()
+        parsed = parse(text)
+    except IOError as error:
+        print(error)
+        exit(0)
+    except LSyntaxError as error:
+        for message in error.errors:
+            print(message)
+        exit(0)
+
+    for fdef in parsed.ast.value:
+        if not named(fdef, "FDEF") or options['function'] not in (None, fdef.FNAME.value):
+            continue
+        function = lower(fdef)
+        idom = dominators(function) if options['dominators'] else None
+        live = liveness(function) if options['liveness'] else None
+        print("\n".join(format_function(function, idom, live)))
@@ -0,0 +1,213 @@
+from contextlib import nullcontext
+
+from LLexer import LLexer, find_column
+from LParser import LParser, YaccError, Node
+from LPratt import LPrattParser
+from LSemantic import LSemantic
+from LTranslator import LTranslator, LTranslatorError
+from LIR import LIRTranslator, LIRError
+from LSerialize import load_ast, is_ast_dump, LSerializeError
+from LStats import LStats, count_nodes
+from LSourceMap import build_source_map
+
+# Library API of the whole tool chain. Nothing is printed and nothing exits:
+# results come back with their warnings, failures are raised as 'LError'
+# subclasses. CLIs of LLexer, LParser and LTranslator are wrappers over it.
+#
+#   tokenize(text)          -> [Token]
+#   parse(text)             -> ParseResult(ast, warns)
+#   translate(ast)          -> TranslateResult(lines, warns, semantic), 'ir=True'
+#                              emits it from SSA form of functions (LIR)
+#   load(data)              -> Node of 'LParser -f json/bin' dump
+#   compile_text(text)      -> TranslateResult, parse + translate
+#   compile_file(path)      -> TranslateResult of source or AST dump
+#   stream_text(text, write)-> StreamResult, lines go to 'write' function by function
+#
+# Every function takes optional 'stats' (LStats) to time its stages.
+
+
+##########################
+#####     ERRORS     #####
+##########################
+class LError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+class LSyntaxError(LError):
+    # all errors of the source in 'errors'. 'partial' is what could be built
+    # anyway: tokens for 'tokenize', PROG of valid functions for 'parse'
+    def __init__(self, errors, partial=None):
+        super().__init__("\n".join(errors))
+        self.errors = list(errors)
+        self.partial = partial
+
+class LLoadError(LError):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+class LTranslateError(LError):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+
+##########################
+#####    RESULTS     #####
+##########################
+class ParseResult:
+    def __init__(self, ast: Node, warns: list[str]) -> None:
+        self.ast = ast
+        self.warns = warns
+
+class TranslateResult:
+    def __init__(self, lines: list[str], warns: list[str], semantic: LSemantic) -> None:
+        self.lines = lines
+        self.warns = warns
+        self.semantic = semantic
+
+    def code(self):
+        return "".join(line + "\n" for line in self.lines)
+
+    def source_map(self, source=None, output=None):
+        # lines are tagged only when translated with 'source_map=True'
+        functions = {fname: fdef.lineno for fname, fdef in self.semantic.functions.items()}
+        return build_source_map(self.lines, source, output, functions)
+
+
+class StreamResult:
+    # 'semantic' holds bodyless stubs of functions (see LSemantic.release)
+    def __init__(self, warns: list[str], semantic: LSemantic, lines: int) -> None:
+        self.warns = warns
+        self.semantic = semantic
+        self.lines = lines
+
+
+def stage(stats: LStats|None, name):
+    return stats.stage(name) if stats else nullcontext({})
+
+
+##########################
+#####   FUNCTIONS    #####
+##########################
+def tokenize(text: str, stats: LStats|None=None):
+    with stage(stats, "lex") as record:
+        tokens = list(LLexer().tokenize(text))
+        record["tokens"] = len(tokens)
+    errors = [
+        f"Unknown Literal {token.value[0]!r}. At {token.lineno}:{find_column(text, token)}"
+        for token in tokens if token.type == "ERROR"
+    ]
+    if errors:
+        raise LSyntaxError(errors, tokens)
+    return tokens
+
+ENGINES = {"lalr": LParser, "pratt": LPrattParser}
+
+def parse(text: str, recover=True, hash_cons=False, arena=None, jobs:int|None=None, stats: LStats|None=None,
+          engine="lalr"):
+    # 'jobs' parses functions in processes (LParallel), only the first error is reported then.
+    # 'engine' is "lalr" (sly, LParser) or "pratt" (hand-written, LPratt), trees are the same
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown parser engine {engine!r}")
+    if stats:
+        # tokens are collected first to time lexing and parsing apart
+        with stats.stage("lex") as record:
+            tokens = list(LLexer().tokenize(text))
+            record["tokens"] = len(tokens)
+        tokens = iter(tokens)
+    else:
+        tokens = LLexer().tokenize(text)
+
+    if jobs:
+        from LParallel import LParallelParser
+        parser = LParallelParser(jobs)
+    else:
+        parser = ENGINES[engine](text, recover=recover, hash_cons=hash_cons, arena=arena)
+    with stage(stats, "parse") as record:
+        try:
+            ast = parser.parse(text, tokens) if jobs else parser.parse(tokens)
+        except YaccError as error:
+            raise LSyntaxError([str(error)])
+    # counted out of the stage, its time is parsing only
+    record["nodes"] = count_nodes(ast) if stats else None
+    if not jobs:
+        record["errors"] = len(parser.errors)
+    if not jobs and parser.errors:
+        raise LSyntaxError(parser.errors, ast)
+    return ParseResult(ast, list(parser.warns))
+
+def translate(ast: Node, text:str|None=None, runtime=False, profile=False, source_map=False,
+              infer_types=True, ir=False, stats: LStats|None=None):
+    # 'text' is the source of 'ast', for columns in warnings. 'ir' emits
+    # functions from their SSA form (LIR), the code does the same
+    with stage(stats, "semantic") as record:
+        semantic = LSemantic(text).analyze(ast)
+        record["functions"] = len(semantic.functions)
+    translator = (LIRTranslator if ir else LTranslator)(infer_types=infer_types, runtime=runtime, profile=profile, source_map=source_map)
+    with stage(stats, "translate") as record:
+        try:
+            lines = translator.translate(ast, semantic)
+        except (LTranslatorError, LIRError) as error:
+            raise LTranslateError(str(error)) from error
+        record["lines"] = len(lines)
+    # calls of undefined functions fail only when reached, so they are warnings
+    return TranslateResult(lines, semantic.errors + semantic.warns, semantic)
+
+def load(data: bytes, stats: LStats|None=None):
+    with stage(stats, "load") as record:
+        try:
+            ast = load_ast(data)
+        except (LSerializeError, ValueError, KeyError) as error:
+            raise LLoadError(str(error)) from error
+    record["nodes"] = count_nodes(ast) if stats else None
+    return ast
+
+def compile_text(text: str, jobs:int|None=None, stats: LStats|None=None, engine="lalr", **options):
+    # options are the ones of 'translate'
+    parsed = parse(text, jobs=jobs, stats=stats, engine=engine)
+    result = translate(parsed.ast, text, stats=stats, **options)
+    result.warns = parsed.warns + result.warns
+    return result
+
+def compile_file(path, jobs:int|None=None, stats: LStats|None=None, engine="lalr", **options):
+    # L source or AST dumped by 'LParser -f json/bin'. OSError is not wrapped
+    with open(path, "rb") as fp:
+        data = fp.read()
+    if is_ast_dump(data):
+        return translate(load(data, stats), stats=stats, **options)
+    return compile_text(data.decode("utf-8"), jobs, stats, engine, **options)
+
+def stream_text(text: str, write, stats: LStats|None=None, runtime=False, profile=False, infer_types=True, ir=False):
+    # Bounded memory: every function is translated as soon as it is parsed,
+    # its lines are passed to 'write' (list of lines) and its tree is dropped.
+    # Peak memory is the source text plus the biggest function. Types are
+    # inferred per function. Only the first syntax error is reported and
+    # lines written before it are an incomplete program
+    semantic = LSemantic(text)
+    translator = (LIRTranslator if ir else LTranslator)(infer_types=infer_types, runtime=runtime, profile=profile)
+    written = 0
+
+    def emit(lines):
+        nonlocal written
+        write(lines)
+        written += len(lines)
+
+    def on_function(fdef):
+        semantic.add(fdef)
+        try:
+            emit(translator.function(fdef))
+        except (LTranslatorError, LIRError) as error:
+            raise LTranslateError(str(error)) from error
+        semantic.release(fdef)
+
+    with stage(stats, "stream") as record:
+        emit(translator.begin(semantic))
+        parser = LParser(text, on_function=on_function)
+        try:
+            parser.parse(LLexer().tokenize(text))
+        except YaccError as error:
+            raise LSyntaxError([str(error)])
+        semantic.check_calls()
+        emit(translator.end())
+        record["functions"] = len(semantic.call_sites)
+        record["lines"] = written
+    return StreamResult(parser.warns + semantic.errors + semantic.warns, semantic, written)
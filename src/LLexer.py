@@ -1,9 +1,10 @@
 import sys, getopt, os, json
 from sly import Lexer
 
+from LStats import LStats
+
 if sys.version_info < (3, 9):
-    print("Please upgrade your Python version to 3.9 or higher")
-    exit()
+    raise ImportError("Python 3.9 or higher is required")
 
 ##########################
 #####     LEXER      #####
@@ -134,11 +135,24 @@ def make_options(opts, args):
         'inputfile': None,
         'outputfile': None,
         'fileformat': None,
+        'stats': None,
     }
     for opt, arg in opts:
         if opt in ["-h", "--help"]:
             print_help()
             exit(0)
+        elif opt in ["-s", "--stats"]:
+            if options['stats']:
+                print(f"Stats format already set as {options['stats']!r} before.")
+                print(f"Remove redundant '-s' or '--stats' flags")
+                exit(1)
+            if opt == "-s" and arg == "tats":
+                print("Unknown stats format 'tats'. You probably meant to use the '--stats' (doubledashed).")
+                exit(1)
+            if arg not in ["txt", "json"]:
+                print(f"Unknown stats format {arg!r}. Only 'txt' or 'json' are allowed.")
+                exit(1)
+            options['stats'] = arg
         elif opt in ["-f", "--format"]:
             if options['fileformat']:
                 print(f"Format already set as {options['fileformat']!r} before.")
@@ -193,7 +207,7 @@ def make_options(opts, args):
             exit(1)
         options['inputfile'] = inputfile
     else:
-        print("Input file not specified. Use 'LParser.py -h' for help")
+        print("Input file not specified. Use 'LLexer.py -h' for help")
         exit(1)
 
     return options
@@ -210,7 +224,9 @@ def print_help():
     print("\tOptions:")
     print("\t  -h,    --help\t\t\tDisplay info about program.")
     print("\t  -f[=], --format[=]\t\tOutput text format. \"txt\" (default) and \"json\" are allowed.")
-    print("\t  -o[=], --output[=]\t\tOutput file. If not specified, printed into stdout.\n")
+    print("\t  -o[=], --output[=]\t\tOutput file. If not specified, printed into stdout.")
+    print("\t  -s[=], --stats[=]\t\tPrint time, memory and size statistics of every stage into stderr.")
+    print("\t\t\t\t\t\"txt\" and \"json\" formats are allowed.\n")
 
     print("\tArguments:")
     print("\t  input_file\t\t\tRequired. File with L lang source to be tokenized.\n")
@@ -220,32 +236,35 @@ def print_help():
 ##########################
 if __name__ == "__main__":
     try:
-        opts, args = parse_cliargs("hf:o:", ["help", "format=", "output="])
+        opts, args = parse_cliargs("hf:o:s:", ["help", "format=", "output=", "stats="])
     except getopt.GetoptError as e:
         print(e)
-        print("use 'LParser -h' for help")
+        print("use 'LLexer -h' for help")
+        exit(2)
 
     options = make_options(opts, args)
 
-    lexer = LLexer()
+    from LLang import tokenize, LSyntaxError
+
+    stats = LStats(trace_memory=options['stats'] is not None, source=options['inputfile'])
 
     try:
         input_fp = open(options['inputfile'], "r")
     except IOError as error:
-        print(e)
+        print(error)
         exit(0)
 
     with input_fp:
         text = "".join(input_fp.readlines())
-        lex = lexer.tokenize(text)
-        errors = []
-        tokens = []
-        for token in lex:
-            if token.type == "ERROR":
-                errors.append(token)
-            tokens.append(token)
+        try:
+            tokens, errors = tokenize(text, stats), []
+        except LSyntaxError as error:
+            # unknown literals are listed after the tokens
+            tokens, errors = error.partial, error.errors
 
-        output_string = dump_tokens(tokens, options['fileformat'])
+        with stats.stage("dump") as record:
+            output_string = dump_tokens(tokens, options['fileformat'])
+            record["chars"] = len(output_string)
 
         if options['outputfile']:
             os.makedirs(os.path.dirname(f"{options['outputfile']}.{options['fileformat']}"), exist_ok=True)
@@ -276,7 +295,8 @@ if __name__ == "__main__":
         
         if errors:
             print("\n===========ERRORS===========")
-            for bad_token in errors:
-                row = bad_token.lineno
-                col = find_column(text, bad_token)
-                print(f"ERROR::Unknown Literal {bad_token.value[0]!r}. At {row}:{col}")
+            for error in errors:
+                print(f"ERROR::{error}")
+
+        if options['stats']:
+            stats.print(options['stats'])
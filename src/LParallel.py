@@ -0,0 +1,148 @@
+import os, gc
+from concurrent.futures import ProcessPoolExecutor
+from sly.lex import Token
+
+from LLexer import LLexer
+from LParser import LParser, YaccError, Node, EOF_ERROR
+from LTranslator import LTranslator
+from LSerialize import dump_binary, load_binary
+from LSemantic import LSemantic
+
+# Parallel front end for big programs. Source is lexed once, the token
+# stream is cut before every 'function' token outside of braces and each
+# shard is parsed on its own in a process pool. Tokens keep their lineno
+# and index in the whole text, so positions in nodes and errors are the
+# same as in a serial parse.
+#
+# Shards are parsed as one-function programs. Since a definition can only
+# be followed by another 'function' or EOF, an EOF error inside a shard is
+# reported as unexpected 'function' of the next shard, as the serial parser does.
+
+
+##########################
+#####    SHARDING    #####
+##########################
+def split_shards(tokens):
+    # (start, end) ranges of 'tokens'. Unbalanced braces keep the rest of
+    # the program in one shard, so the error is found where serial parse finds it
+    bounds = [0]
+    depth = 0
+    for position, token in enumerate(tokens):
+        if token.type == "LCURLY":
+            depth += 1
+        elif token.type == "RCURLY":
+            depth -= 1
+        elif token.type == "FUNC" and depth == 0 and position:
+            bounds.append(position)
+    bounds.append(len(tokens))
+    return list(zip(bounds, bounds[1:]))
+
+def pack_tokens(tokens):
+    # value of ERROR token is the whole rest of text, only first char is reported
+    return [
+        (token.type, token.value[:1] if token.type == "ERROR" else token.value,
+         token.lineno, token.index, getattr(token, "end", None))
+        for token in tokens
+    ]
+
+def unpack_tokens(packed):
+    for type_, value, lineno, index, end in packed:
+        token = Token()
+        token.type, token.value, token.lineno, token.index, token.end = type_, value, lineno, index, end
+        yield token
+
+
+##########################
+#####    WORKERS     #####
+##########################
+_text = None
+
+def init_worker(text):
+    global _text
+    _text = text
+    # forked workers inherit the whole heap of the parent, keep the
+    # collector from walking it over and over while shards are parsed
+    gc.freeze()
+
+def parse_chunk(shards, translate=False, runtime=False):
+    # -> (binary PROG of parsed FDEFs, translated lines, error)
+    # error is (shard number in chunk, message, at EOF) of the first failed shard
+    parser = LParser(_text)
+    translator = LTranslator(infer_types=False, runtime=runtime) if translate else None
+    fdefs, lines = [], []
+    for number, packed in enumerate(shards):
+        try:
+            ast = parser.parse(unpack_tokens(packed))
+        except YaccError as error:
+            return dump_binary(Node("PROG", tuple(fdefs))), lines, (number, str(error), str(error) == EOF_ERROR)
+        fdefs.extend(ast.value)
+        if translator:
+            translator.semantic = LSemantic().analyze(ast)
+            for fdef in ast.value:
+                lines.extend(translator.FDEF(fdef, 0))
+    return dump_binary(Node("PROG", tuple(fdefs))), lines, None
+
+
+##########################
+#####  FRONT  END    #####
+##########################
+class LParallelParser:
+    def __init__(self, jobs=None, chunks_per_job=4):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunks_per_job = chunks_per_job
+        self.warns = []
+        self.lines = None
+
+    def chunks(self, packed, shards):
+        # consecutive shards are grouped to amortize inter-process traffic,
+        # chunk sizes are balanced by number of tokens
+        target = max(1, len(packed) // (self.jobs * self.chunks_per_job))
+        chunk, size = [], 0
+        for start, end in shards:
+            chunk.append(packed[start:end])
+            size += end - start
+            if size >= target:
+                yield chunk
+                chunk, size = [], 0
+        if chunk:
+            yield chunk
+
+    def parse(self, text, tokens=None, translate=False, runtime=False):
+        # 'translate' translates every FDEF in workers without type
+        # inference, result lines are kept in 'lines'
+        self.warns = []
+        self.lines = None
+        tokens = list(LLexer().tokenize(text)) if tokens is None else list(tokens)
+        shards = split_shards(tokens)
+        packed = pack_tokens(tokens)
+
+        fdefs, lines, first_shard = [], [], 0
+        with ProcessPoolExecutor(self.jobs, initializer=init_worker, initargs=(text,)) as executor:
+            futures = [
+                (executor.submit(parse_chunk, chunk, translate, runtime), len(chunk))
+                for chunk in self.chunks(packed, shards)
+            ]
+            for future, count in futures:
+                data, chunk_lines, error = future.result()
+                fdefs.extend(load_binary(data).value)
+                lines.extend(chunk_lines)
+                if error is not None:
+                    for other, _ in futures:
+                        other.cancel()
+                    self.raise_error(text, tokens, shards, first_shard + error[0], *error[1:])
+                first_shard += count
+
+        ast = Node("PROG", tuple(fdefs))
+        main = next((fdef for fdef in fdefs if fdef.FNAME.value == "main"), None)
+        if main is None:
+            self.warns.append("main function is not defined")
+        if translate:
+            translator = LTranslator(infer_types=False, runtime=runtime)
+            translator.args = len(main.FARGS.value or ()) if main is not None else 0
+            self.lines = translator.header() + lines + translator.footer()
+        return ast
+
+    def raise_error(self, text, tokens, shards, shard, message, at_eof):
+        if at_eof and shard + 1 < len(shards):
+            LParser(text).error(tokens[shards[shard+1][0]])
+        raise YaccError(message)
@@ -1,44 +1,23 @@
 from __future__ import annotations
-import sys, getopt, os, re
+import sys, getopt, os, re, json, shutil, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal
 from collections.abc import Iterable
 import six
 
-if sys.version_info < (3, 9):
-    print("Please upgrade your Python version to 3.9 or higher")
-    exit()
-
-try:
-    import anytree
-    from anytree import Node as TreeNode, RenderTree
-    from anytree.exporter import JsonExporter, UniqueDotExporter
-except ModuleNotFoundError as e:
-    print("'anytree' not imported.")
-    print(e)
-    anytree = None
+from LStats import LStats
 
-try:
-    import pydot
-except ModuleNotFoundError as e:
-    print("'pydot' not imported.")
-    print(e)
-    pydot = None
+if sys.version_info < (3, 9):
+    raise ImportError("Python 3.9 or higher is required")
 
 try:
     from sly import Parser
     from sly.yacc import YaccError
 except ModuleNotFoundError as e:
-    print("'sly' not imported")
-    print(e)
-    print("try 'pip install sly'")
-    exit(3)
+    raise ModuleNotFoundError(f"{e}. Try 'pip install sly'", name=e.name) from e
 
-try:
-    from LLexer import LLexer
-except ImportError as e:
-    print("Can't import 'LLexer'.")
-    print("Put it near the 'LParser'")
-    exit(3)
+from LLexer import LLexer
+from LWalk import walk, children
 
 ##########################
 ##### UTIL FUNCTIONS #####
@@ -56,6 +35,11 @@ def find_column(text, token):
     column = (token.index - last_cr)
     return column
 
+def split_functions(tokens):
+    # (start, end) ranges of 'tokens', each next one starts at 'function' keyword
+    bounds = [0] + [position for position, token in enumerate(tokens) if token.type == "FUNC" and position]
+    return list(zip(bounds, bounds[1:] + [len(tokens)]))
+
 def get_trailing_number(s:str):
     m = re.search(r"^([a-zA-Z]*)(\d*)$", s)
     name = m.group(1)
@@ -66,25 +50,36 @@ def get_trailing_number(s:str):
 #####    AST ATOM    #####
 ##########################
 class Node:
-    def __init__(self, name, value:tuple[Node]|Node|str|int):
+    # 'lineno' and 'index' are source position of the first token, known by
+    # statements, functions and calls only. 'shash' is structural hash set by hash-consing parser
+    __slots__ = ("name", "value", "lineno", "index", "shash")
+
+    def __init__(self, name, value:tuple[Node]|Node|str|int, lineno:int|None=None, index:int|None=None):
         self.name = name
         self.value = (value,) if isinstance(value, Node) else value
+        self.lineno = lineno
+        self.index = index
+        self.shash = None
 
     def __repr__(self):
         return f"<{__name__}.Node[{self.name!r}] object at {hex(id(self))}>"
 
     def __str__(self, level=0):
         indent = 2
-        ret = " "*indent*level + f"Node[{self.name!r}]"
-        if iterable(self.value):
-            ret += "\n"
-            for child in self.value:
-                ret += child.__str__(level+1)
-        else:
-            ret += f":{self.value}\n"
-        return(ret)
+        lines = []
+        def enter(node, level):
+            if iterable(node.value):
+                lines.append(" "*indent*level + f"Node[{node.name!r}]\n")
+                return [(child, level+1) for child in children(node)]
+            lines.append(" "*indent*level + f"Node[{node.name!r}]:{node.value}\n")
+            return []
+        walk(self, enter, context=level)
+        return "".join(lines)
 
     def __getattr__(self, __name: str):
+        if __name.startswith("__"):
+            # protocol lookups (pickle, copy) never mean a child
+            raise AttributeError(__name)
         if iterable(self.value):
             name, number = get_trailing_number(__name)
             approp_childs = [node for node in self.value if isinstance(node, Node) and node.name == name]
@@ -97,42 +92,194 @@ class Node:
         raise AttributeError(f"Node[{self.name}] object has no childs. Use 'Node::value'")
 
 
-def dump_ast(ast: Node, format: Literal["txt", "json"]="txt", dump_image:str|None=""):
-    def build_tree(node, parent=None):
-        if iterable(node.value):
-            tree_node = TreeNode(node.name, parent=parent)
-            for child in node.value:
-                build_tree(child, tree_node)
-            return tree_node
-        else:
-            TreeNode(f"{node.name}[{node.value}]", parent=parent)
-    tree = build_tree(ast)
-
-    if pydot is not None:
-        if dump_image:
-            dot_str = "\n".join(UniqueDotExporter(tree))
-            graph = pydot.graph_from_dot_data(dot_str)[0]
-            try:
-                graph.write_png(dump_image)
-            except Exception as e:
-                print(e)
-                print("Install Graphviz and specify 'dot' executable in your PATH")
-    else:
-        print("'pydot' not found. Try 'pip install pydot'")
+def same_tree(a: Node, b: Node):
+    # O(1) for subtrees shared by a hash-consing parser, which differ
+    # whenever their structural hashes do; node by node walk otherwise
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if a is None or b is None or a.name != b.name:
+            return False
+        if a.shash is not None and b.shash is not None and a.shash != b.shash:
+            return False
+        if iterable(a.value) != iterable(b.value):
+            return False
+        if not iterable(a.value):
+            if type(a.value) is not type(b.value) or a.value != b.value:
+                return False
+            continue
+        if len(a.value) != len(b.value):
+            return False
+        stack.extend(zip(a.value, b.value))
+    return True
+
+
+def node_label(node):
+    return node.name if iterable(node.value) else f"{node.name}[{node.value}]"
+
+def node_children(node):
+    return [child for child in node.value if child is not None] if iterable(node.value) else []
+
+def render_txt(ast: Node):
+    # same box drawing as anytree.RenderTree, list of lines
+    lines = []
+    def enter(node, context):
+        pre, fill = context
+        lines.append(f"{pre}{node_label(node)}\n")
+        kids = node_children(node)
+        last = len(kids) - 1
+        return [(child, (fill + "└── ", fill + "    ") if index == last else (fill + "├── ", fill + "│   "))
+                for index, child in enumerate(kids)]
+    walk(ast, enter, context=("", ""))
+    return lines
+
+def render_json(ast: Node):
+    # same layout as anytree JsonExporter(indent=2), list of chunks. Context
+    # of a node is its padding and text after its closing brace, closing
+    # text of a children list follows the last child as a plain string
+    chunks = []
+    def enter(node, context):
+        if type(node) is str:
+            chunks.append(node)
+            return []
+        pad, suffix = context
+        chunks.append(f'{pad}{{\n{pad}  "name": {json.dumps(node_label(node))}')
+        kids = node_children(node)
+        if not kids:
+            chunks.append(f"\n{pad}}}{suffix}")
+            return []
+        chunks.append(f',\n{pad}  "children": [\n')
+        last = len(kids) - 1
+        pairs = [(child, (pad + "    ", "" if index == last else ",\n")) for index, child in enumerate(kids)]
+        pairs.append((f"\n{pad}  ]\n{pad}}}{suffix}", None))
+        return pairs
+    walk(ast, enter, context=("", ""))
+    return chunks
+
+
+def dump_ast(ast: Node, format: Literal["txt", "json", "bin"]="txt", dump_image:str|None=""):
+    if dump_image:
+        export_image(ast, dump_image)
 
     if format == "txt":
-        output = ""
-        for pre, _, node in RenderTree(tree):
-            output += f"{pre}{node.name}\n"
-        return output
+        return "".join(render_txt(ast))
     elif format == "json":
-        exporter = JsonExporter(indent=2, sort_keys=False)
-        return exporter.export(tree)
+        return "".join(render_json(ast))
+    elif format == "bin":
+        from LSerialize import dump_binary
+        return dump_binary(ast)
+
+
+##########################
+#####     IMAGES     #####
+##########################
+IMAGE_NODE_LIMIT = 2000
+
+def subtree_sizes(ast: Node):
+    sizes = {}
+    stack = [(ast, False)]
+    while stack:
+        node, visited = stack.pop()
+        if visited:
+            # keyed by node, arena views are equal by row and not by identity
+            sizes[node] = 1 + sum(sizes[child] for child in node_children(node))
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in node_children(node))
+    return sizes
+
+def dot_escape(label):
+    return label.replace("\\", "\\\\").replace('"', '\\"')
+
+def render_dot(ast: Node, max_nodes:int|None=IMAGE_NODE_LIMIT):
+    # Graphviz DOT straight from 'Node', yielded line by line.
+    # Above 'max_nodes' the tree is expanded breadth first while the limit
+    # allows, remaining subtrees are collapsed into "... N nodes" boxes
+    sizes = subtree_sizes(ast) if max_nodes is not None else None
+    limited = sizes is not None and sizes[ast] > max_nodes
+
+    yield "digraph tree {\n"
+    yield f'    n0 [label="{dot_escape(node_label(ast))}"];\n'
+    queue = [(ast, 0)]
+    count = 1
+    head = 0
+    while head < len(queue):
+        node, node_id = queue[head]
+        head += 1
+        children = node_children(node)
+        if not children:
+            continue
+        if limited and count + len(children) > max_nodes:
+            hidden = sizes[node] - 1
+            yield f'    n{node_id}_more [label="... {hidden} node{"s" if hidden > 1 else ""}", shape=box, style=dashed];\n'
+            yield f"    n{node_id} -> n{node_id}_more;\n"
+            continue
+        for child in children:
+            yield f'    n{count} [label="{dot_escape(node_label(child))}"];\n'
+            yield f"    n{node_id} -> n{count};\n"
+            queue.append((child, count))
+            count += 1
+    yield "}\n"
+
+def run_dot(dot_data: bytes, dump_image: str):
+    executable = shutil.which("dot")
+    if executable is None:
+        raise FileNotFoundError("Install Graphviz and specify 'dot' executable in your PATH")
+    result = subprocess.run([executable, "-Tpng", "-o", dump_image], input=dot_data, capture_output=True)
+    if result.returncode:
+        raise RuntimeError(f"'dot' failed for {dump_image!r}: {result.stderr.decode(errors='replace').strip()}")
+
+def export_image(ast: Node, dump_image: str, max_nodes:int|None=IMAGE_NODE_LIMIT):
+    # raises FileNotFoundError without 'dot', RuntimeError when it fails
+    run_dot("".join(render_dot(ast, max_nodes)).encode("utf-8"), dump_image)
+
+
+class ImagePool:
+    # Renders images in at most 'jobs' concurrent 'dot' processes while the
+    # caller keeps parsing. 'submit' blocks when too many images are queued,
+    # so DOT sources of a big batch are not all held in memory
+    def __init__(self, jobs:int|None=None, max_nodes:int|None=IMAGE_NODE_LIMIT):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_nodes = max_nodes
+        self.executor = ThreadPoolExecutor(self.jobs)
+        self.slots = threading.BoundedSemaphore(self.jobs * 2)
+        self.futures = []
+
+    def submit(self, ast: Node, dump_image: str):
+        dot_data = "".join(render_dot(ast, self.max_nodes)).encode("utf-8")
+        self.slots.acquire()
+        future = self.executor.submit(run_dot, dot_data, dump_image)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append((dump_image, future))
+        return future
+
+    def wait(self):
+        # list of (image, error) of failed renders
+        errors = []
+        for dump_image, future in self.futures:
+            error = future.exception()
+            if error is not None:
+                errors.append((dump_image, error))
+        self.futures = []
+        return errors
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 
 ##########################
 #####     PARSER     #####
 ##########################
+EOF_ERROR = "Syntax error at EOF."
+
 class LParser(Parser):
     tokens = LLexer.tokens
 
@@ -149,28 +296,112 @@ class LParser(Parser):
         ("right",    "POW"),
     )
 
-    def __init__(self, text):
+    def __init__(self, text, recover=False, hash_cons=False, arena=None, on_function=None):
         self.warns = []
+        self.errors = []
         self.text = text
+        self.recover = recover
+        self.function_errors = []
+        self.hash_cons = hash_cons
+        self.table = {}
+        # productions build nodes through 'node', plain constructor unless
+        # hash-consing or building rows of an 'LArena' (see LArena.py)
+        if hash_cons and arena is not None:
+            raise ValueError("Shared nodes can't be stored in an arena")
+        self.arena = arena
+        self.node = self.shared_node if hash_cons else arena.add if arena is not None else Node
+        # streaming: every FDEF is passed to 'on_function' as soon as it is
+        # reduced and is not kept, PROG is empty then
+        if on_function is not None and (recover or hash_cons or arena is not None):
+            raise ValueError("Functions can be streamed by plain parser only")
+        self.on_function = on_function
+        self.has_main = False
+
+    def parse(self, tokens):
+        self.table = {}
+        self.has_main = False
+        try:
+            if not self.recover:
+                return super().parse(tokens)
+            return self.parse_recovering(tokens)
+        finally:
+            # shared nodes stay shared, only the lookup table is released
+            self.table = {}
+
+    def shared_node(self, name, value, lineno=None, index=None):
+        # Hash-consing: structurally equal subtrees are built once and shared,
+        # each one carries structural hash in 'shash'. Children are shared
+        # already, so their identities are the key. Nodes with a position
+        # (statements, FDEF, FCALL) are unique and never shared, only hashed
+        if isinstance(value, Node):
+            value = (value,)
+        if type(value) is tuple:
+            key = (name, *map(id, value))
+            shash = hash((name, *(child.shash if child is not None else None for child in value)))
+        else:
+            key = (name, type(value), value)
+            shash = hash((name, value))
+        if lineno is not None:
+            node = Node(name, value, lineno, index)
+            node.shash = shash
+            return node
+        node = self.table.get(key)
+        if node is None:
+            node = self.table[key] = Node(name, value)
+            node.shash = shash
+        return node
+
+    def parse_recovering(self, tokens):
+        # 'function' keyword always starts a new definition, so every function
+        # is parsed apart and errors are collected in 'errors' instead of raised.
+        # Inside a function parser resynchronizes at ';' and '}', a block
+        # after a broken statement is parsed, so ';' inside it can't end one.
+        # Result is PROG of the functions parsed without errors
+        tokens = list(tokens)
+        functions = split_functions(tokens)
+        self.errors = []
+        fdefs = []
+        for number, (start, end) in enumerate(functions):
+            self.function_errors = []
+            ast = super().parse(iter(tokens[start:end]))
+            if not self.function_errors:
+                fdefs.extend(ast.value)
+                continue
+            if self.function_errors[0] is None:
+                # EOF inside a function is the next 'function' keyword in the whole program
+                next_function = tokens[functions[number+1][0]] if number + 1 < len(functions) else None
+                self.function_errors[0] = self.error_message(next_function)
+            self.errors.extend(self.function_errors)
+
+        self.warns = []
+        if not any(end - start > 1 and tokens[start].type == "FUNC" and tokens[start+1].value == "main"
+                   for start, end in functions):
+            self.warns.append("main function is not defined")
+        # with an arena, PROGs of single functions are left as unreachable rows
+        return self.node("PROG", tuple(fdefs))
 
     @_("program")
     def main_test(self, p):
         main_node = next((node for node in p[0].value if node.FNAME.value == "main"), None)
-        if main_node is None:
+        if main_node is None and not self.has_main:
             self.warns.append("main function is not defined")
         return p[0]
 
     #===== ROOT RULE =====#
     @_("definition def_list")
     def program(self, p):
+        if self.on_function is not None:
+            return self.node("PROG", ())
         if p.def_list:
-            return Node("PROG", (p.definition, *p.def_list))
+            return self.node("PROG", (p.definition, *p.def_list))
         else:
-            return Node("PROG", p.definition)
+            return self.node("PROG", p.definition)
 
     #===== Sequence of definitions =====#
     @_("definition def_list")
     def def_list(self, p):
+        if self.on_function is not None:
+            return None
         if p.def_list:
             return p.definition, *p.def_list
         else:
@@ -188,19 +419,28 @@ class LParser(Parser):
     #===== Function represented as header and statement =====#
     @_("f_head statement")
     def fdef(self, p):
-        return Node("FDEF", (*p.f_head, Node("FBODY", p.statement)))
+        node = self.node("FDEF", (*p.f_head, self.node("FBODY", p.statement)), p.lineno, p.index)
+        if self.on_function is not None:
+            self.has_main = self.has_main or node.FNAME.value == "main"
+            self.on_function(node)
+            # sly maps id() of every reduced value to its position for
+            # 'line_position'/'index_position', never used here, but growing with the file
+            self._line_positions.clear()
+            self._index_positions.clear()
+            return None
+        return node
 
     #===== Header is key-token, function name =====#
     #===== and arg list in parentheses        =====#
     @_("FUNC IDENT LPAREN arg_list RPAREN")
     def f_head(self, p):
-        return Node("FNAME", p[1]), Node("FARGS", p.arg_list)
+        return self.node("FNAME", p[1]), self.node("FARGS", p.arg_list)
 
     #===== Header is key-token, function name =====#
     #===== and empty parentheses (no args)    =====#
     @_("FUNC IDENT LPAREN RPAREN")
     def f_head(self, p):
-        return Node("FNAME", p[1]), Node("FARGS", None)
+        return self.node("FNAME", p[1]), self.node("FARGS", None)
 
     #===== Arg list is list of decalrations =====#
     @_("decl")
@@ -213,7 +453,7 @@ class LParser(Parser):
 
     @_("IDENT")
     def decl(self, p):
-        return Node("FARG", p[0])
+        return self.node("FARG", p[0])
 
     #===== Statement is single operation ended with  =====#
     #===== semicolon, or comples block of operations =====#
@@ -226,15 +466,27 @@ class LParser(Parser):
     def block(self, p):
         return p.stm_list
 
+    #===== Error recovery, broken statement is skipped =====#
+    #===== up to the nearest ';' or '}' of its block,   =====#
+    #===== a '{' after it starts a block parsed as usual =====#
+    #===== (with 'else' of a broken 'if')                 =====#
+    @_("error SEMICOLON", "error block %prec IFX", "error block ELSE statement")
+    def statement(self, p):
+        pass
+
+    @_("LCURLY error RCURLY")
+    def block(self, p):
+        pass
+
+    #===== Statements of a nested block are spliced, =====#
+    #===== empty blocks (None) add nothing           =====#
     @_("statement stm_list")
     def stm_list(self, p):
-        if p.stm_list:
-            if iterable(p.statement):
-                return (*p.statement, *p.stm_list)
-            else:
-                return  p.statement, *p.stm_list
-        else:
-            return p.statement,
+        if p.statement is None:
+            return p.stm_list
+        if iterable(p.statement):
+            return (*p.statement, *(p.stm_list or ()))
+        return (p.statement, *(p.stm_list or ()))
 
     @_("")
     def stm_list(self, p):
@@ -243,48 +495,48 @@ class LParser(Parser):
     #===== If statement =====#
     @_("IF LPAREN condition RPAREN statement %prec IFX")
     def statement(self, p):
-        return Node("IF", (
-            Node("COND", p.condition),
-            Node("BRANCH", p.statement),
-            Node("BRANCH", None)
-        ))
+        return self.node("IF", (
+            self.node("COND", p.condition),
+            self.node("BRANCH", p.statement),
+            self.node("BRANCH", None)
+        ), p.lineno, p.index)
 
     #===== If else statement =====# 
     @_("IF LPAREN condition RPAREN statement ELSE statement")
     def statement(self, p):
-        return Node("IF", (
-            Node("COND", p.condition),
-            Node("BRANCH", p.statement0),
-            Node("BRANCH", p.statement1)
-        ))
+        return self.node("IF", (
+            self.node("COND", p.condition),
+            self.node("BRANCH", p.statement0),
+            self.node("BRANCH", p.statement1)
+        ), p.lineno, p.index)
 
     #===== While statement =====#
     @_("WHILE LPAREN condition RPAREN statement")
     def statement(self, p):
-        return Node("WHILE", (
-            Node("COND", p.condition),
-            Node("BRANCH", p.statement)
-        ))
+        return self.node("WHILE", (
+            self.node("COND", p.condition),
+            self.node("BRANCH", p.statement)
+        ), p.lineno, p.index)
 
     #===== operation can be a variable assignment =====#
     @_("IDENT ASSIGN expression")
     def operation(self, p): # assignment
-        return Node("VARASGN", (Node("VAR", p[0]), p[2]))
+        return self.node("VARASGN", (self.node("VAR", p[0]), p[2]), p.lineno, p.index)
 
     #===== Operation can be read statement =====#
     @_("IDENT ASSIGN READ LPAREN RPAREN")
     def operation(self, p):
-        return Node("READ", Node("VAR", p[0]))
+        return self.node("READ", self.node("VAR", p[0]), p.lineno, p.index)
 
     @_("WRITE LPAREN expression RPAREN",
        "WRITE LPAREN condition  RPAREN")
     def operation(self, p):
-        return Node("WRITE", p[2])
+        return self.node("WRITE", p[2], p.lineno, p.index)
 
     #===== Operation can be return statement =====#
     @_("RETURN expression")
     def operation(self, p):
-        return Node("RETURN", p.expression)
+        return self.node("RETURN", p.expression, p.lineno, p.index)
 
     #===== Operation can be an expression =====#
     @_("expression")
@@ -300,39 +552,39 @@ class LParser(Parser):
     #===== with two expressions               =====#
     @_("expression ADD expression")
     def expression(self, p):
-        return Node("ADD", (p.expression0, p.expression1))
+        return self.node("ADD", (p.expression0, p.expression1))
     
     @_("expression SUB expression")
     def expression(self, p):
-        return Node("SUB", (p.expression0, p.expression1))
+        return self.node("SUB", (p.expression0, p.expression1))
     
     @_("expression MUL expression")
     def expression(self, p):
-        return Node("MUL", (p.expression0, p.expression1))
+        return self.node("MUL", (p.expression0, p.expression1))
     
     @_("expression DIV expression")
     def expression(self, p):
-        return Node("DIV", (p.expression0, p.expression1))
+        return self.node("DIV", (p.expression0, p.expression1))
     
     @_("expression POW expression")
     def expression(self, p):
-        return Node("POW", (p.expression0, p.expression1))
+        return self.node("POW", (p.expression0, p.expression1))
     
     #===== Expression can be unary minus operation =====#
     #===== with expression                         =====#
     @_("SUB expression %prec NEG")
     def expression(self, p):
-        return Node("NEG", p.expression)
+        return self.node("NEG", p.expression)
 
     #===== Function call with args (a.k.a. expresion list) =====#
     @_("IDENT LPAREN exp_list RPAREN")
     def expression(self, p):
-        return Node("FCALL", (Node("FNAME", p[0]), *p.exp_list))
+        return self.node("FCALL", (self.node("FNAME", p[0]), *p.exp_list), p.lineno, p.index)
 
     #===== Function call without args =====#
     @_("IDENT LPAREN RPAREN")
     def expression(self, p):
-        return Node("FCALL", Node("FNAME", p[0]))
+        return self.node("FCALL", self.node("FNAME", p[0]), p.lineno, p.index)
 
     #===== Expression list can be a single expression =====#
     @_("expression")
@@ -353,15 +605,15 @@ class LParser(Parser):
     #===== Bool operation with conditions =====#
     @_("condition AND condition")
     def condition(self, p):
-        return Node("AND", (p.condition0, p.condition1))
+        return self.node("AND", (p.condition0, p.condition1))
 
     @_("condition OR condition")
     def condition(self, p):
-        return Node("OR", (p.condition0, p.condition1))
+        return self.node("OR", (p.condition0, p.condition1))
 
     @_("NOT condition")
     def condition(self, p):
-        return Node("NOT", p.condition)
+        return self.node("NOT", p.condition)
 
     @_("LPAREN condition RPAREN")
     def condition(self, p):
@@ -370,32 +622,32 @@ class LParser(Parser):
     #===== Expression comparisons operators =====#
     @_("expression EQU expression")
     def condition(self, p):
-        return Node("EQU", (p.expression0, p.expression1))
+        return self.node("EQU", (p.expression0, p.expression1))
     
     @_("expression NEQ expression")
     def condition(self, p):
-        return Node("NEQ", (p.expression0, p.expression1))
+        return self.node("NEQ", (p.expression0, p.expression1))
     
     @_("expression LEQ expression")
     def condition(self, p):
-        return Node("LEQ", (p.expression0, p.expression1))
+        return self.node("LEQ", (p.expression0, p.expression1))
     
     @_("expression LES expression")
     def condition(self, p):
-        return Node("LES", (p.expression0, p.expression1))
+        return self.node("LES", (p.expression0, p.expression1))
     
     @_("expression GEQ expression")
     def condition(self, p):
-        return Node("GEQ", (p.expression0, p.expression1))
+        return self.node("GEQ", (p.expression0, p.expression1))
     
     @_("expression GRT expression")
     def condition(self, p):
-        return Node("GRT", (p.expression0, p.expression1))
+        return self.node("GRT", (p.expression0, p.expression1))
 
     #===== Expression can be a variable =====#
     @_("IDENT")
     def expression(self, p):
-        return Node("VAR", p[0])
+        return self.node("VAR", p[0])
 
     #===== Expression can be a number =====#
     @_("number")
@@ -405,28 +657,36 @@ class LParser(Parser):
     #===== Number can be integer or float =====#
     @_("INT")
     def number(self, p):
-        return Node("INT", p[0])
+        return self.node("INT", p[0])
 
     @_("BININT")
     def number(self, p):
-        return Node("INT", p[0])
+        return self.node("INT", p[0])
 
     @_("FLOAT")
     def number(self, p):
-        return Node("FLOAT", p[0])
+        return self.node("FLOAT", p[0])
 
-    def error(self, p):
+    def error_message(self, p):
         if p:
             row = p.lineno
             col = find_column(self.text, p)
 
             if p.type == "ERROR":
-                msg = f"Unknown literal {p.value[0]!r} at {row}:{col}"
-            else:
-                msg = f"Syntax error. Unexpected token {p.type}[{p.value!r}] at {row}:{col}"
-        else:
-            msg = "Syntax error at EOF."
-        raise YaccError(msg)
+                return f"Unknown literal {p.value[0]!r} at {row}:{col}"
+            return f"Syntax error. Unexpected token {p.type}[{p.value!r}] at {row}:{col}"
+        return EOF_ERROR
+
+    def error(self, p):
+        if not self.recover:
+            raise YaccError(self.error_message(p))
+        if p is None:
+            # EOF after errors is a consequence of skipped tokens. First
+            # error at EOF is resolved by 'parse_recovering'
+            if not self.function_errors:
+                self.function_errors.append(None)
+            return
+        self.function_errors.append(self.error_message(p))
 
 ##########################
 #### ARGUMENTS PARSER ####
@@ -450,12 +710,45 @@ def make_options(opts, args):
         'inputfile': None,
         'outputfile': None,
         'fileformat': None,
-        'outputimagefile': None
+        'outputimagefile': None,
+        'stats': None,
+        'inputfiles': [],
+        'jobs': None,
+        'engine': "lalr",
+        'imagelimit': IMAGE_NODE_LIMIT,
     }
     for opt, arg in opts:
         if opt in ["-h", "--help"]:
             print_help()
             exit(0)
+        elif opt == "--engine":
+            if arg not in ["lalr", "pratt"]:
+                print(f"Unknown parser engine {arg!r}. Only 'lalr' or 'pratt' are allowed.")
+                exit(1)
+            options['engine'] = arg
+        elif opt in ["-j", "--jobs"]:
+            if not arg.isdigit() or int(arg) < 1:
+                print(f"Jobs must be a positive integer, got {arg!r}")
+                exit(1)
+            options['jobs'] = int(arg)
+        elif opt == "--image-limit":
+            if not arg.isdigit():
+                print(f"Image node limit must be a non-negative integer, got {arg!r}")
+                exit(1)
+            # 0 disables the limit
+            options['imagelimit'] = int(arg) or None
+        elif opt in ["-s", "--stats"]:
+            if options['stats']:
+                print(f"Stats format already set as {options['stats']!r} before.")
+                print(f"Remove redundant '-s' or '--stats' flags")
+                exit(1)
+            if opt == "-s" and arg == "tats":
+                print("Unknown stats format 'tats'. You probably meant to use the '--stats' (doubledashed).")
+                exit(1)
+            if arg not in ["txt", "json"]:
+                print(f"Unknown stats format {arg!r}. Only 'txt' or 'json' are allowed.")
+                exit(1)
+            options['stats'] = arg
         elif opt in ["-f", "--format"]:
             if options['fileformat']:
                 print(f"Format already set as {options['fileformat']!r} before.")
@@ -467,8 +760,8 @@ def make_options(opts, args):
             if arg == "":
                 print("Format can't be empty")
                 exit(1)
-            if arg not in ["txt", "json"]:
-                print(f"Unknown format {arg!r}. Only 'txt' or 'json' are allowed.")
+            if arg not in ["txt", "json", "bin"]:
+                print(f"Unknown format {arg!r}. Only 'txt', 'json' or 'bin' are allowed.")
                 exit(1)
             options['fileformat'] = arg
     if not options['fileformat']:
@@ -509,22 +802,23 @@ def make_options(opts, args):
             elif arg == "":
                 print("Image output file can't be empty")
                 exit(1)
-            options['outputimagefile'] = f"{arg}.png"
+            options['outputimagefile'] = f"{arg}"
     if args:
-        inputfile = args[0]
-        if inputfile == "elp":
-            print(f"Input file is 'elp'. You probably meant to use the '--help' (doubledashed)")
-            accept = input(f"Use 'elp' as input file? (y/n): ")
-            while(accept != "y"):
-                if accept == "n":
-                    exit(1)
-                else:
-                    print(f"Unknown answer {accept!r}")
-                    accept = input("Use 'elp' as input file? (y/n): ")
-        if inputfile == "":
-            print("Input file can't be empty")
-            exit(1)
-        options['inputfile'] = inputfile
+        for inputfile in args:
+            if inputfile == "elp":
+                print(f"Input file is 'elp'. You probably meant to use the '--help' (doubledashed)")
+                accept = input(f"Use 'elp' as input file? (y/n): ")
+                while(accept != "y"):
+                    if accept == "n":
+                        exit(1)
+                    else:
+                        print(f"Unknown answer {accept!r}")
+                        accept = input("Use 'elp' as input file? (y/n): ")
+            if inputfile == "":
+                print("Input file can't be empty")
+                exit(1)
+        options['inputfile'] = args[0]
+        options['inputfiles'] = args
     else:
         print("Input file not specified. Use 'LParser.py -h' for help")
         exit(1)
@@ -536,85 +830,131 @@ def print_help():
     print("\tLParser - parser for non-exsitend L lang")
     
     print("SYNOPSIS:")
-    print("\tLParser [options]... input_file")
+    print("\tLParser [options]... input_file...")
     
     print("DESCRIPTION:")
     print("\tWrite arguments to the standard output.\n")
     print("\tOptions:")
     print("\t  -h,    --help\t\t\tDisplay info about program.")
-    print("\t  -f[=], --format[=]\t\tOutput text format. \"txt\" (default) and \"json\" are allowed.")
+    print("\t  -f[=], --format[=]\t\tOutput format. \"txt\" (default), \"json\" and \"bin\" are allowed.")
+    print("\t\t\t\t\t\"json\" and \"bin\" outputs can be loaded back with 'LSerialize'.")
     print("\t  -o[=], --output[=]\t\tOutput file. If not specified, printed into stdout.")
-    print("\t  -i[=], --image-output[=]\tImage output file. If not specified, image not generated.\n")
+    print("\t  -i[=], --image-output[=]\tImage output file. If not specified, image not generated.")
+    print("\t\t\t\t\tImages are rendered by Graphviz 'dot' in background processes.")
+    print("\t  -j[=], --jobs[=]\t\tNumber of concurrent 'dot' processes (default: number of CPUs).")
+    print(f"\t  --image-limit[=]\t\tTrees bigger than this number of nodes (default {IMAGE_NODE_LIMIT}) are drawn")
+    print("\t\t\t\t\tpartially, collapsed subtrees are shown as \"... N nodes\". 0 draws everything.")
+    print("\t         --engine[=]\t\tParser engine, \"lalr\" (sly, default) or \"pratt\" (hand-written, faster).")
+    print("\t  -s[=], --stats[=]\t\tPrint time, memory and size statistics of every stage into stderr.")
+    print("\t\t\t\t\t\"txt\" and \"json\" formats are allowed.\n")
 
     print("\tArguments:")
-    print("\t  input_file\t\t\tRequired. File with L lang source to be parsed.\n")
+    print("\t  input_file...\t\t\tRequired. Files with L lang source to be parsed. With several files")
+    print("\t\t\t\t\t'-o' and '-i' are directories for outputs named after inputs.\n")
 
 
 ##########################
-####### MAIN FRAME #######
+#####   CLI  BATCH   #####
 ##########################
-if __name__ == "__main__":
+def output_paths(options, inputfile):
+    # '-o' and '-i' are file names without extension for a single input
+    # and directories for a batch of inputs
+    batch = len(options['inputfiles']) > 1
+    stem = os.path.splitext(os.path.basename(inputfile))[0]
+    outputfile = imagefile = None
+    if options['outputfile']:
+        outputfile = os.path.join(options['outputfile'], stem) if batch else options['outputfile']
+        outputfile = f"{outputfile}.{options['fileformat']}"
+    if options['outputimagefile']:
+        imagefile = os.path.join(options['outputimagefile'], stem) if batch else options['outputimagefile']
+        imagefile = f"{imagefile}.png"
+    return outputfile, imagefile
+
+def print_output(output_string):
+    if isinstance(output_string, bytes):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(output_string)
+    else:
+        print(output_string)
+
+def write_output(output_string, outputfile):
+    binary = isinstance(output_string, bytes)
+    os.makedirs(os.path.dirname(outputfile), exist_ok=True)
     try:
-        opts, args = parse_cliargs("hf:o:i:", ["help", "format=", "output=", "image-output="])
-    except getopt.GetoptError as e:
-        print(e)
-        print("use 'LParser -h' for help")
-        exit(2)
+        output_fp = open(outputfile, "xb") if binary else open(outputfile, "x", encoding="utf-8")
+    except FileExistsError:
+        print(f"'{outputfile}' alreasy exist")
+        while((answer:=input(f"Rewrite '{outputfile}'? (y/n): ")) != "y"):
+            if answer == "n":
+                print("Output printed into stdout")
+                print_output(output_string)
+                return
+            else:
+                print(f"Unknown answer {answer!r}")
+        output_fp = open(outputfile, "wb") if binary else open(outputfile, "w", encoding="utf-8")
+    except IOError as error:
+        print(error)
+        return
 
-    options = make_options(opts, args)
+    with output_fp:
+        output_fp.write(output_string)
+        print(f"Abstract Syntax Tree printed into {os.path.abspath(output_fp.name)}")
+
+def parse_file(inputfile, options, images):
     try:
-        input_fp = open(options['inputfile'], "r")
+        input_fp = open(inputfile, "r")
     except IOError as error:
         print(error)
-        exit(0)
+        return
     with input_fp:
         text = "".join(input_fp.readlines())
-        lexer = LLexer()
-        parser = LParser(text)
+    outputfile, imagefile = output_paths(options, inputfile)
+    stats = LStats(trace_memory=options['stats'] is not None, source=inputfile)
+    try:
+        parsed = parse(text, stats=stats if options['stats'] else None, engine=options['engine'])
+    except LSyntaxError as error:
+        for message in error.errors:
+            print(message)
+        return
+    ast = parsed.ast
+
+    if imagefile:
+        os.makedirs(os.path.dirname(imagefile), exist_ok=True)
+        # only DOT generation is timed, 'dot' runs in background while next files are parsed
+        with stats.stage("image"):
+            images.submit(ast, imagefile)
+    with stats.stage("render") as record:
+        output_string = dump_ast(ast, format=options['fileformat'])
+        record["chars"] = len(output_string)
+
+    if outputfile:
+        write_output(output_string, outputfile)
+    else:
+        print_output(output_string)
 
-        try:
-            ast = parser.parse(lexer.tokenize(text))
-        except YaccError as error:
-            print(error)
-            exit(0)
+    for warn in parsed.warns:
+        print(f"WARNING::{warn}")
+
+    if options['stats']:
+        stats.print(options['stats'])
 
-        if anytree is not None:
-            if options['outputimagefile']:
-                os.makedirs(os.path.dirname(f"{options['outputimagefile']}"), exist_ok=True)
-            output_string = dump_ast(ast, format=options['fileformat'], dump_image=options['outputimagefile'])
-        else:
-            print("'anytree' not found. Try 'pip install anytree'.")
-            print("simple representation will be printed in txt")
-            options["fileformat"] = "txt"
-            output_string = str(ast)
-
-        if options['outputfile']:
-            os.makedirs(os.path.dirname(f"{options['outputfile']}.{options['fileformat']}"), exist_ok=True)
-            try:
-                output_fp = open(f"{options['outputfile']}.{options['fileformat']}", "x", encoding="utf-8")
-            except FileExistsError:
-                print(f"'{options['outputfile']}.{options['fileformat']}' alreasy exist")
-                while((answer:=input(f"Rewrite '{options['outputfile']}.{options['fileformat']}'? (y/n): ")) != "y"):
-                    if answer == "n":
-                        print("Output printed into stdout")
-                        print(output_string)
-                        output_fp = None
-                        break
-                    else:
-                        print(f"Unknown answer {answer!r}")
-                else:
-                    output_fp = open(f"{options['outputfile']}.{options['fileformat']}", "w", encoding="utf-8")
-            except IOError as error:
-                print(error)
-                exit(0)
-
-            if output_fp:
-                with output_fp:
-                    output_fp.write(output_string)
-                    print(f"Abstract Syntax Tree printed into {os.path.abspath(output_fp.name)}")
-        else:
-            print(output_string)
 
-        if parser.warns:
-            for warn in parser.warns:
-                print(f"WARNING::{warn}")
+##########################
+####### MAIN FRAME #######
+##########################
+if __name__ == "__main__":
+    from LLang import parse, LSyntaxError
+
+    try:
+        opts, args = parse_cliargs("hf:o:i:s:j:", ["help", "format=", "output=", "image-output=", "stats=", "jobs=", "image-limit=", "engine="])
+    except getopt.GetoptError as e:
+        print(e)
+        print("use 'LParser -h' for help")
+        exit(2)
+
+    options = make_options(opts, args)
+    with ImagePool(options['jobs'], options['imagelimit']) as images:
+        for inputfile in options['inputfiles']:
+            parse_file(inputfile, options, images)
+        for imagefile, error in images.wait():
+            print(f"Image {imagefile!r} not rendered: {error}")
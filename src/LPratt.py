@@ -0,0 +1,279 @@
+from LParser import LParser, Node, YaccError
+
+# Hand-written parser of the L grammar, an alternative engine to the sly LALR
+# one of 'LParser': recursive descent for definitions and statements, Pratt
+# precedence climbing for expressions. Trees, positions, warnings and the
+# first error message are the ones 'LParser' gives (see conformance_pratt.py):
+#
+#   OR < AND < NOT < comparisons < ADD SUB < MUL DIV < NEG < POW
+#
+# '||', '&&' and '^' are right associative, comparisons are not associative,
+# 'else' belongs to the nearest 'if'. Grammar keeps expressions and conditions
+# apart, so every parse function knows which of them its context allows:
+# E - expression only, C - condition only, EC - either (operation, 'write'
+# and parentheses of conditions). A token which can't continue the valid
+# prefix is reported, exactly like the LALR parser does.
+#
+# Recovery ('recover=True') and trees nested deeper than python recursion
+# limit are rare, both are handed over to 'LParser' on the same tokens.
+
+E, C, EC = 1, 2, 3
+
+# type -> (left binding power, binding power of the right operand)
+ARITH = {
+    "ADD": (10, 11), "SUB": (10, 11),
+    "MUL": (20, 21), "DIV": (20, 21),
+    "POW": (40, 40),
+}
+NEG_POWER = 30
+COMPARE = {"EQU", "NEQ", "LEQ", "LES", "GEQ", "GRT"}
+
+
+##########################
+#####     PARSER     #####
+##########################
+class LPrattParser:
+    def __init__(self, text, recover=False, hash_cons=False, arena=None):
+        self.warns = []
+        self.errors = []
+        self.text = text
+        self.recover = recover
+        self.hash_cons = hash_cons
+        self.table = {}
+        if hash_cons and arena is not None:
+            raise ValueError("Shared nodes can't be stored in an arena")
+        self.arena = arena
+        self.node = self.shared_node if hash_cons else arena.add if arena is not None else Node
+        self.tokens = []
+        self.types = []
+        self.pos = 0
+
+    # same node factory and messages as the LALR parser
+    shared_node = LParser.shared_node
+    error_message = LParser.error_message
+
+    def parse(self, tokens):
+        tokens = list(tokens)
+        self.table = {}
+        self.errors = []
+        try:
+            return self.program(tokens)
+        except (YaccError, RecursionError) as error:
+            if isinstance(error, YaccError) and not self.recover:
+                raise
+            parser = LParser(self.text, recover=self.recover, hash_cons=self.hash_cons, arena=self.arena)
+            ast = parser.parse(iter(tokens))
+            self.warns, self.errors = parser.warns, parser.errors
+            return ast
+        finally:
+            self.table = {}
+            self.tokens = self.types = []
+
+    #===== Tokens =====#
+    def error(self):
+        # -> YaccError at the current token
+        token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return YaccError(self.error_message(token))
+
+    def expect(self, type_):
+        if self.types[self.pos] != type_:
+            raise self.error()
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    #===== Definitions =====#
+    def program(self, tokens):
+        self.tokens = tokens
+        # None stands for EOF, lookahead never runs past it
+        self.types = [token.type for token in tokens] + [None]
+        self.pos = 0
+        fdefs = [self.fdef()]
+        while self.pos < len(tokens):
+            fdefs.append(self.fdef())
+        self.warns = []
+        if not any(fdef.FNAME.value == "main" for fdef in fdefs):
+            self.warns.append("main function is not defined")
+        return self.node("PROG", tuple(fdefs))
+
+    def fdef(self):
+        node = self.node
+        head = self.expect("FUNC")
+        fname = node("FNAME", self.expect("IDENT").value)
+        self.expect("LPAREN")
+        if self.types[self.pos] == "RPAREN":
+            args = None
+        else:
+            args = [node("FARG", self.expect("IDENT").value)]
+            while self.types[self.pos] == "COMMA":
+                self.pos += 1
+                args.append(node("FARG", self.expect("IDENT").value))
+            args = tuple(args)
+        self.expect("RPAREN")
+        fargs = node("FARGS", args)
+        body = node("FBODY", self.statement())
+        return node("FDEF", (fname, fargs, body), head.lineno, head.index)
+
+    #===== Statements =====#
+    def statement(self):
+        type_ = self.types[self.pos]
+        if type_ == "LCURLY":
+            return self.block()
+        if type_ == "IF" or type_ == "WHILE":
+            node = self.node
+            head = self.tokens[self.pos]
+            self.pos += 1
+            self.expect("LPAREN")
+            cond = node("COND", self.cond_or(C)[0])
+            self.expect("RPAREN")
+            branch = node("BRANCH", self.statement())
+            if type_ == "WHILE":
+                return node("WHILE", (cond, branch), head.lineno, head.index)
+            # dangling 'else' goes to the nearest 'if'
+            other = None
+            if self.types[self.pos] == "ELSE":
+                self.pos += 1
+                other = self.statement()
+            return node("IF", (cond, branch, node("BRANCH", other)), head.lineno, head.index)
+        operation = self.operation()
+        self.expect("SEMICOLON")
+        return operation
+
+    def block(self):
+        # -> tuple of statements, None if empty. Like 'stm_list' of LParser,
+        # statements of nested blocks are spliced
+        self.pos += 1
+        statements = []
+        while self.types[self.pos] != "RCURLY":
+            if self.types[self.pos] is None:
+                raise self.error()
+            statement = self.statement()
+            if type(statement) is tuple:
+                statements.extend(statement)
+            elif statement is not None:
+                statements.append(statement)
+        self.pos += 1
+        return tuple(statements) or None
+
+    def operation(self):
+        types, node = self.types, self.node
+        type_ = types[self.pos]
+        if type_ is None:
+            raise self.error()
+        head = self.tokens[self.pos]
+        if type_ == "IDENT" and types[self.pos + 1] == "ASSIGN":
+            self.pos += 2
+            if types[self.pos] == "READ":
+                self.pos += 1
+                self.expect("LPAREN")
+                self.expect("RPAREN")
+                return node("READ", node("VAR", head.value), head.lineno, head.index)
+            value = self.expression(0)
+            return node("VARASGN", (node("VAR", head.value), value), head.lineno, head.index)
+        if type_ == "WRITE":
+            self.pos += 1
+            self.expect("LPAREN")
+            value = self.cond_or(EC)[0]
+            self.expect("RPAREN")
+            return node("WRITE", value, head.lineno, head.index)
+        if type_ == "RETURN":
+            self.pos += 1
+            return node("RETURN", self.expression(0), head.lineno, head.index)
+        return self.cond_or(EC)[0]
+
+    #===== Conditions =====#
+    # -> (node, E or C), 'context' is what the caller accepts
+    def cond_or(self, context):
+        left, kind = self.cond_and(context)
+        if self.types[self.pos] != "OR":
+            return left, kind
+        if kind != C:
+            raise self.error()
+        self.pos += 1
+        right = self.cond_or(C)[0]
+        return self.node("OR", (left, right)), C
+
+    def cond_and(self, context):
+        left, kind = self.cond_not(context)
+        if self.types[self.pos] != "AND":
+            return left, kind
+        if kind != C:
+            raise self.error()
+        self.pos += 1
+        right = self.cond_and(C)[0]
+        return self.node("AND", (left, right)), C
+
+    def cond_not(self, context):
+        if self.types[self.pos] != "NOT":
+            return self.comparison(context)
+        self.pos += 1
+        return self.node("NOT", self.cond_not(C)[0]), C
+
+    def comparison(self, context):
+        if self.types[self.pos] == "LPAREN":
+            # condition or expression in parentheses
+            self.pos += 1
+            left, kind = self.cond_or(EC)
+            self.expect("RPAREN")
+            if kind == C:
+                if self.types[self.pos] in ARITH or self.types[self.pos] in COMPARE:
+                    raise self.error()
+                return left, C
+            left = self.infix(left, 0)
+        else:
+            left = self.expression(0)
+        type_ = self.types[self.pos]
+        if type_ in COMPARE:
+            self.pos += 1
+            right = self.expression(0)
+            if self.types[self.pos] in COMPARE:
+                raise self.error()
+            return self.node(type_, (left, right)), C
+        if context == C:
+            raise self.error()
+        return left, E
+
+    #===== Expressions =====#
+    def expression(self, power):
+        return self.infix(self.prefix(), power)
+
+    def infix(self, left, power):
+        # operators binding at least as tight as 'power'
+        types, node = self.types, self.node
+        while True:
+            type_ = types[self.pos]
+            powers = ARITH.get(type_)
+            if powers is None or powers[0] < power:
+                return left
+            self.pos += 1
+            left = node(type_, (left, self.expression(powers[1])))
+
+    def prefix(self):
+        token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        type_ = self.types[self.pos]
+        self.pos += 1
+        if type_ == "IDENT":
+            if self.types[self.pos] != "LPAREN":
+                return self.node("VAR", token.value)
+            self.pos += 1
+            fname = self.node("FNAME", token.value)
+            if self.types[self.pos] == "RPAREN":
+                self.pos += 1
+                return self.node("FCALL", fname, token.lineno, token.index)
+            args = [self.expression(0)]
+            while self.types[self.pos] == "COMMA":
+                self.pos += 1
+                args.append(self.expression(0))
+            self.expect("RPAREN")
+            return self.node("FCALL", (fname, *args), token.lineno, token.index)
+        if type_ == "INT" or type_ == "BININT":
+            return self.node("INT", token.value)
+        if type_ == "FLOAT":
+            return self.node("FLOAT", token.value)
+        if type_ == "SUB":
+            return self.node("NEG", self.expression(NEG_POWER))
+        if type_ == "LPAREN":
+            value = self.expression(0)
+            self.expect("RPAREN")
+            return value
+        self.pos -= 1
+        raise self.error()
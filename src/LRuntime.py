@@ -0,0 +1,53 @@
+import sys, atexit
+
+# Runtime imported by code translated with 'LTranslator -r'.
+# 'write' collects values and prints them in big chunks, 'read' takes numbers
+# from stdin read and split at once. For valid input output is the same as
+# with print()/input(), but stdin is consumed up to EOF on the first read.
+
+BUFFER_ITEMS = 1 << 14
+
+
+##########################
+#####     OUTPUT     #####
+##########################
+_buffer = []
+_append = _buffer.append
+
+def write(value):
+    _append(value)
+    if len(_buffer) >= BUFFER_ITEMS:
+        flush()
+
+def flush():
+    if _buffer:
+        sys.stdout.write("\n".join(map(str, _buffer)))
+        sys.stdout.write("\n")
+        _buffer.clear()
+    sys.stdout.flush()
+
+atexit.register(flush)
+
+
+##########################
+#####     INPUT      #####
+##########################
+def _load():
+    # everything written before the first read is shown before blocking on stdin
+    flush()
+    yield from sys.stdin.buffer.read().split()
+
+_tokens = _load()
+
+def read(kind=None):
+    token = next(_tokens, None)
+    if token is None:
+        raise EOFError("EOF when reading a number")
+    if kind is not None:
+        return kind(token)
+    if b"." in token:
+        return float(token)
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
@@ -0,0 +1,132 @@
+from LParser import Node, find_column
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def named(obj_, name_):
+    return isinstance(obj_, Node) and obj_.name == name_
+
+
+##########################
+#####    ANALYSIS    #####
+##########################
+class LSemantic:
+    # Tables of a whole program, built in one walk over the tree. Functions
+    # are looked up by name, like in translated python the last definition
+    # of a name wins.
+    def __init__(self, text=None) -> None:
+        self.text = text        # source, for columns in messages
+        self.functions = {}     # fname -> FDEF
+        self.params = {}        # FDEF -> [arg names]
+        self.assigned = {}      # FDEF -> {vars assigned or read into, params included}
+        self.used = {}          # FDEF -> {vars used in expressions}
+        self.calls = {}         # callee fname -> [(caller FDEF, FCALL)]
+        self.call_sites = {}    # FDEF -> [FCALL]
+        self.errors = []
+        self.warns = []
+
+    def analyze(self, ast: Node):
+        for fdef in ast.value:
+            if named(fdef, "FDEF"):
+                self.add(fdef)
+        self.check_calls()
+        return self
+
+    def add(self, fdef):
+        # one function of a program, 'check_calls' when all are added
+        fname = fdef.FNAME.value
+        if fname in self.functions:
+            self.warns.append(f"Function {fname!r} at {self.position(fdef)} "
+                              f"redefines the one at {self.position(self.functions[fname])}")
+        self.functions[fname] = fdef
+        self.params[fdef] = [arg.value for arg in fdef.FARGS.value or () if named(arg, "FARG")]
+        self.walk(fdef)
+
+    def release(self, fdef):
+        # Body of an added function is not needed anymore (streaming). Header
+        # and calls stay as bodyless stubs with the same name, position and
+        # number of arguments, enough for 'check_calls'
+        stub = Node("FDEF", (fdef.FNAME, fdef.FARGS), fdef.lineno, fdef.index)
+        if self.functions.get(fdef.FNAME.value) == fdef:
+            self.functions[fdef.FNAME.value] = stub
+        self.params[stub] = self.params.pop(fdef)
+        self.assigned.pop(fdef)
+        self.used.pop(fdef)
+        call_sites = []
+        for call in reversed(self.call_sites.pop(fdef)):
+            call_stub = Node("FCALL", (call.FNAME, *[None]*(len(call.value) - 1)), call.lineno, call.index)
+            call_sites.append(call_stub)
+            # calls of the last added function are at the end
+            sites = self.calls[call.FNAME.value]
+            position = len(sites) - 1
+            while sites[position][1] is not call:
+                position -= 1
+            sites[position] = (stub, call_stub)
+        self.call_sites[stub] = call_sites[::-1]
+        return stub
+
+    def walk(self, fdef):
+        assigned = set(self.params[fdef])
+        used = set()
+        call_sites = []
+        stack = [fdef.FBODY]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, Node):
+                continue
+            if node.name == "VAR":
+                used.add(node.value)
+                continue
+            if node.name in ("VARASGN", "READ"):
+                assigned.add(node.VAR.value)
+                stack.extend(reversed(node.value[1:]))
+                continue
+            if node.name == "FCALL":
+                call_sites.append(node)
+                self.calls.setdefault(node.FNAME.value, []).append((fdef, node))
+                stack.extend(reversed(node.value[1:]))
+                continue
+            if isinstance(node.value, tuple):
+                # reversed, so nodes are visited in source order
+                stack.extend(reversed(node.value))
+        self.assigned[fdef] = assigned
+        self.used[fdef] = used
+        self.call_sites[fdef] = call_sites
+
+    def check_calls(self):
+        # calls are reported in order of callers' definitions
+        order = {fdef: number for number, fdef in enumerate(self.call_sites)}
+        problems = []
+        for callee, sites in self.calls.items():
+            for caller, call in sites:
+                given = len(call.value) - 1
+                if callee not in self.functions:
+                    message = f"Call of undefined function {callee!r} at {self.position(call)} in {caller.FNAME.value!r}"
+                elif given != self.arity(callee):
+                    message = (f"Function {callee!r} takes {self.arity(callee)} argument(s), {given} given "
+                               f"at {self.position(call)} in {caller.FNAME.value!r}")
+                else:
+                    continue
+                problems.append((order[caller], call.index or 0, message))
+        self.errors.extend(message for *_, message in sorted(problems, key=lambda problem: problem[:2]))
+
+    #===== Query interface =====#
+    def function(self, fname):
+        return self.functions.get(fname)
+
+    def arity(self, fname):
+        return len(self.params[self.functions[fname]])
+
+    def has_main(self):
+        return "main" in self.functions
+
+    def callers(self, fname):
+        return self.calls.get(fname, [])
+
+    def position(self, node):
+        if node.lineno is None:
+            return "unknown position"
+        if self.text is None:
+            return f"line {node.lineno}"
+        return f"{node.lineno}:{find_column(self.text, node)}"
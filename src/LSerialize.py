@@ -0,0 +1,259 @@
+import gc, json, struct
+
+from LParser import Node, iterable
+
+# Compact binary AST format:
+#
+#   b"LAST" version:u8
+#   values: count:varint, (tag:u8 payload)...   interned leaf values
+#       tag 0 None | 1 str len:varint utf8 | 2 int zigzag:varint | 3 float f64le
+#   kinds:  count:varint, (len:varint ascii)...    node names, ids start at 1
+#   nodes:  count:varint, preorder stream of
+#       (kind << 2 | pos << 1 | 1) value:varint     leaf node
+#       (kind << 2 | pos << 1)     children:varint  interior node
+#       0                                           missing child (None)
+#     where 'pos' flag means lineno:varint index:varint follow
+#
+# Node kinds below 32 and small indices fit in one byte, so the node stream
+# of an ordinary program is mostly a byte per varint.
+
+MAGIC = b"LAST"
+VERSION = 2
+
+TAG_NONE, TAG_STR, TAG_INT, TAG_FLOAT = range(4)
+
+
+class LSerializeError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+
+##########################
+#####     WRITER     #####
+##########################
+def write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def dump_binary(ast: Node) -> bytes:
+    values, kinds = {}, {}
+    stream = bytearray()
+    count = 0
+
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node is None:
+            stream.append(0)
+            continue
+        kind = kinds.setdefault(node.name, len(kinds) + 1)
+        value = node.value
+        if type(value) is tuple or iterable(value):
+            header, argument = kind << 2, len(value)
+            stack.extend(reversed(value))
+        else:
+            # 1, 1.0 and True are equal keys for dict, the type keeps them apart
+            header, argument = kind << 2 | 1, values.setdefault((type(value), value), len(values))
+        if node.lineno is not None:
+            write_varint(stream, header | 2)
+            write_varint(stream, argument)
+            write_varint(stream, node.lineno)
+            write_varint(stream, node.index)
+        # almost every varint of the stream is a single byte
+        elif header < 0x80 and argument < 0x80:
+            stream.append(header)
+            stream.append(argument)
+        else:
+            write_varint(stream, header)
+            write_varint(stream, argument)
+
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    write_varint(out, len(values))
+    for type_, value in values:
+        if value is None:
+            out.append(TAG_NONE)
+        elif type_ is str:
+            data = value.encode("utf-8")
+            out.append(TAG_STR)
+            write_varint(out, len(data))
+            out += data
+        elif type_ is int:
+            out.append(TAG_INT)
+            write_varint(out, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif type_ is float:
+            out.append(TAG_FLOAT)
+            out += struct.pack("<d", value)
+        else:
+            raise LSerializeError(f"Can't serialize leaf value {value!r}")
+    write_varint(out, len(kinds))
+    for name in kinds:
+        data = name.encode("ascii")
+        write_varint(out, len(data))
+        out += data
+    write_varint(out, count)
+    out += stream
+    return bytes(out)
+
+
+##########################
+#####     READER     #####
+##########################
+def read_varint(view, pos):
+    result = shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def load_binary(data) -> Node:
+    # nodes only reference their children, there are no cycles for the
+    # collector to find while hundreds of thousands of them are created
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return read_binary(memoryview(data))
+    except (IndexError, struct.error):
+        raise LSerializeError("Truncated binary AST")
+    finally:
+        if enabled:
+            gc.enable()
+
+def read_binary(view) -> Node:
+    if view[:4] != MAGIC:
+        raise LSerializeError("Not a binary AST: wrong magic")
+    if view[4] != VERSION:
+        raise LSerializeError(f"Unsupported binary AST version {view[4]}")
+    pos = 5
+
+    count, pos = read_varint(view, pos)
+    values = []
+    for _ in range(count):
+        tag = view[pos]
+        pos += 1
+        if tag == TAG_NONE:
+            values.append(None)
+        elif tag == TAG_STR:
+            size, pos = read_varint(view, pos)
+            values.append(str(view[pos:pos+size], "utf-8"))
+            pos += size
+        elif tag == TAG_INT:
+            zigzag, pos = read_varint(view, pos)
+            values.append(zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1))
+        elif tag == TAG_FLOAT:
+            values.append(struct.unpack_from("<d", view, pos)[0])
+            pos += 8
+        else:
+            raise LSerializeError(f"Unknown value tag {tag}")
+
+    count, pos = read_varint(view, pos)
+    kinds = [None]
+    for _ in range(count):
+        size, pos = read_varint(view, pos)
+        kinds.append(str(view[pos:pos+size], "ascii"))
+        pos += size
+
+    count, pos = read_varint(view, pos)
+    # varints are decoded in place, almost all of them are a single byte.
+    # A stream cut inside a varint runs past the end of 'view' (IndexError)
+
+    # stack of [name, children left, children, position]
+    root = [None, 1, [], (None, None)]
+    stack = [root]
+    for _ in range(count):
+        header = view[pos]
+        pos += 1
+        if header >= 0x80:
+            header, pos = read_varint(view, pos - 1)
+        if header == 0:
+            node = None
+        else:
+            kind, argument = kinds[header >> 2], view[pos]
+            pos += 1
+            if argument >= 0x80:
+                argument, pos = read_varint(view, pos - 1)
+            if header & 2:
+                lineno, pos = read_varint(view, pos)
+                index, pos = read_varint(view, pos)
+                position = lineno, index
+            else:
+                position = None, None
+            if header & 1:
+                node = Node(kind, values[argument], *position)
+            elif argument:
+                stack.append([kind, argument, [], position])
+                continue
+            else:
+                node = Node(kind, (), *position)
+        top = stack[-1]
+        top[2].append(node)
+        top[1] -= 1
+        while top[1] == 0 and len(stack) > 1:
+            stack.pop()
+            node = Node(top[0], tuple(top[2]), *top[3])
+            top = stack[-1]
+            top[2].append(node)
+            top[1] -= 1
+    if len(stack) != 1 or len(root[2]) != 1:
+        raise LSerializeError("Truncated binary AST")
+    return root[2][0]
+
+
+##########################
+#####  JSON READER   #####
+##########################
+def leaf_value(name, value:str):
+    if name == "INT":
+        return int(value)
+    if name == "FLOAT":
+        return float(value)
+    if value == "None" and name not in ("VAR", "FARG", "FNAME"):
+        return None
+    return value
+
+def from_json_dict(data) -> Node:
+    # result slots are filled bottom-up, children are converted before parents
+    root = [None]
+    stack = [(data, root, 0)]
+    pending = []
+    while stack:
+        item, slot, index = stack.pop()
+        label = item["name"]
+        if "children" not in item and label.endswith("]") and "[" in label:
+            name, value = label[:-1].split("[", 1)
+            slot[index] = Node(name, leaf_value(name, value))
+            continue
+        children = [None] * len(item.get("children", ()))
+        pending.append((label, children, slot, index))
+        for child_index, child in enumerate(item.get("children", ())):
+            stack.append((child, children, child_index))
+    for label, children, slot, index in reversed(pending):
+        slot[index] = Node(label, tuple(children))
+    return root[0]
+
+def load_json(text) -> Node:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return from_json_dict(json.loads(text))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_ast(data) -> Node:
+    # binary or JSON dump of 'LParser', detected by content
+    if isinstance(data, str):
+        return load_json(data)
+    if bytes(memoryview(data)[:4]) == MAGIC:
+        return load_binary(data)
+    return load_json(bytes(data).decode("utf-8"))
+
+def is_ast_dump(data: bytes):
+    return data[:4] == MAGIC or data.lstrip()[:1] == b"{"
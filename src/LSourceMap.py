@@ -0,0 +1,202 @@
+import sys, getopt, os, json, pstats
+from bisect import bisect_right
+
+# Source maps from translated python back to L lines. Translator tags the
+# first line of every statement and function with L line of its node (see
+# 'SourceLine'), the map keeps runs of generated lines: [py line, L line]
+# where L line changes, null for code which has no L source (header, footer).
+#
+# Sidecar file '<output>.py.map' is JSON:
+#   {"version": 1, "source": "prog.l", "output": "prog.py",
+#    "lines": [[1, null], [5, 1], [6, 2], ...], "functions": {"main": 1}}
+#
+# 'functions' holds L line of the last definition of every function name.
+#
+# As a script it rewrites cProfile/pstats output, so the cost is reported
+# at L functions and lines.
+
+SOURCE_MAP_VERSION = 1
+
+
+##########################
+#####  SOURCE LINES  #####
+##########################
+class SourceLine(str):
+    # line of generated code which starts an L statement at 'source' line
+    def __new__(cls, line, source):
+        self = super().__new__(cls, line)
+        self.source = source
+        return self
+
+    def __reduce__(self):
+        # lines translated in worker processes keep their tags
+        return SourceLine, (str(self), self.source)
+
+def build_source_map(lines, source=None, output=None, functions=None):
+    # runs start at a tagged line, untagged lines continue the current run
+    # until an untagged line without indent (code after functions) resets it
+    runs = []
+    current = None
+    for number, line in enumerate(lines, 1):
+        lineno = getattr(line, "source", None)
+        if lineno is None:
+            lineno = current if not line or line[0].isspace() else None
+        if not runs or lineno != current:
+            runs.append([number, lineno])
+            current = lineno
+    return {
+        "version": SOURCE_MAP_VERSION,
+        "source": source,
+        "output": output,
+        "lines": runs,
+        "functions": functions or {},
+    }
+
+def write_source_map(source_map, path):
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(source_map, fp, separators=(",", ":"))
+
+
+##########################
+#####     LOOKUP     #####
+##########################
+class LSourceMapError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+class SourceMap:
+    def __init__(self, data: dict):
+        if data.get("version") != SOURCE_MAP_VERSION:
+            raise LSourceMapError(f"Unsupported source map version {data.get('version')!r}")
+        self.source = data["source"]
+        self.output = data["output"]
+        self.functions = data["functions"]
+        self.starts = [start for start, _ in data["lines"]]
+        self.sources = [lineno for _, lineno in data["lines"]]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fp:
+            try:
+                return cls(json.load(fp))
+            except (ValueError, KeyError, TypeError) as error:
+                raise LSourceMapError(f"Bad source map {path!r}: {error}")
+
+    def lookup(self, py_line):
+        # -> L line of generated line, None for code without L source
+        run = bisect_right(self.starts, py_line) - 1
+        return self.sources[run] if run >= 0 else None
+
+    def covers(self, filename):
+        return self.output is not None and os.path.basename(filename) == os.path.basename(self.output)
+
+    def location(self, filename, py_line, funcname):
+        # pstats function key of L code, generated one if there is no L source
+        if not self.covers(filename):
+            return filename, py_line, funcname
+        lineno = self.lookup(py_line)
+        if lineno is None:
+            return filename, py_line, funcname
+        return self.source or filename, lineno, funcname
+
+
+##########################
+#####    PROFILES    #####
+##########################
+def rewrite_stats(stats: pstats.Stats, source_map: SourceMap):
+    # Keys of functions and their callers are moved to L positions. Keys which
+    # collide are merged, as pstats does when profiles are added
+    def move(key):
+        return source_map.location(*key)
+
+    def merge_callers(target, callers):
+        for caller, counts in callers.items():
+            caller = move(caller)
+            if caller not in target:
+                target[caller] = counts
+            elif isinstance(counts, tuple):
+                # cProfile keeps (calls, primitive calls, time, cumulative time) per caller
+                target[caller] = tuple(old + new for old, new in zip(target[caller], counts))
+            else:
+                target[caller] += counts
+
+    rewritten = {}
+    for key, (cc, nc, tt, ct, callers) in stats.stats.items():
+        key = move(key)
+        if key in rewritten:
+            old_cc, old_nc, old_tt, old_ct, old_callers = rewritten[key]
+            merge_callers(old_callers, callers)
+            rewritten[key] = (old_cc + cc, old_nc + nc, old_tt + tt, old_ct + ct, old_callers)
+        else:
+            new_callers = {}
+            merge_callers(new_callers, callers)
+            rewritten[key] = (cc, nc, tt, ct, new_callers)
+    stats.stats = rewritten
+    stats.top_level = {move(key) for key in stats.top_level}
+    stats.max_name_len = max(len(pstats.func_std_string(key)) for key in rewritten) if rewritten else 0
+    # indexes are rebuilt from new keys on demand
+    stats.fcn_list = None
+    stats.all_callees = None
+    return stats
+
+
+##########################
+#### ARGUMENTS PARSER ####
+##########################
+def print_help():
+    print("NAME:")
+    print("\tLSourceMap - attribute cProfile output of translated code to L source")
+
+    print("SYNOPSIS:")
+    print("\tLSourceMap [options]... profile_file map_file")
+
+    print("DESCRIPTION:")
+    print("\tPrint profile with functions at their L file and line.\n")
+    print("\tOptions:")
+    print("\t  -h,    --help\t\t\tDisplay info about program.")
+    print("\t  -s[=], --sort[=]\t\tSort key of pstats, 'cumulative' by default.")
+    print("\t  -n[=], --limit[=]\t\tPrint only this number of functions.")
+    print("\t  -o[=], --output[=]\t\tWrite rewritten profile into file, readable by pstats.")
+
+    print("\tArguments:")
+    print("\t  profile_file\t\t\tRequired. Output of 'python -m cProfile -o profile_file prog.py'.")
+    print("\t  map_file\t\t\tRequired. Source map written by 'LTranslator -m'.\n")
+
+
+if __name__ == "__main__":
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hs:n:o:", ["help", "sort=", "limit=", "output="])
+    except getopt.GetoptError as e:
+        print(e)
+        print("use 'LSourceMap -h' for help")
+        exit(2)
+
+    sort, limit, output = "cumulative", None, None
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print_help()
+            exit(0)
+        elif opt in ["-s", "--sort"]:
+            sort = arg
+        elif opt in ["-n", "--limit"]:
+            if not arg.isdigit():
+                print(f"Limit must be a non-negative integer, got {arg!r}")
+                exit(1)
+            limit = int(arg)
+        elif opt in ["-o", "--output"]:
+            output = arg
+    if len(args) != 2:
+        print("Profile and map files are required. Use 'LSourceMap.py -h' for help")
+        exit(1)
+
+    try:
+        source_map = SourceMap.load(args[1])
+        stats = pstats.Stats(args[0])
+    except (IOError, LSourceMapError) as error:
+        print(error)
+        exit(1)
+
+    rewrite_stats(stats, source_map)
+    if output:
+        stats.dump_stats(output)
+    stats.sort_stats(sort).print_stats(*([limit] if limit is not None else []))
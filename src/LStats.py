@@ -0,0 +1,77 @@
+import sys, time, json, tracemalloc
+from contextlib import contextmanager
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def count_nodes(ast):
+    count = 0
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node.value, tuple):
+            stack.extend(child for child in node.value if child is not None)
+    return count
+
+def human_bytes(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+##########################
+#####  STAGE STATS   #####
+##########################
+class LStats:
+    def __init__(self, trace_memory=True, source=None) -> None:
+        self.stages = []
+        self.source = source
+        self.trace_memory = trace_memory
+        self.started = trace_memory and not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+
+    def stop(self):
+        # tracing slows down everything, don't leave it on for later measurements
+        if self.started:
+            tracemalloc.stop()
+            self.started = False
+
+    @contextmanager
+    def stage(self, name):
+        # counters (tokens, nodes, lines, ...) are added by caller into yielded record
+        record = {"stage": name}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - wall
+            record["cpu_time"] = time.process_time() - cpu
+            if self.trace_memory:
+                record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            self.stages.append(record)
+
+    def dump(self, format="txt"):
+        if format == "json":
+            return json.dumps({"source": self.source, "stages": self.stages}, indent=2)
+        elif format == "txt":
+            lines = [f"{'stage':<10}{'wall, s':>12}{'cpu, s':>12}{'peak mem':>12}  counters"]
+            for record in self.stages:
+                counters = ", ".join(
+                    f"{key}={value}" for key, value in record.items()
+                    if key not in ("stage", "wall_time", "cpu_time", "peak_memory")
+                )
+                peak = human_bytes(record["peak_memory"]) if "peak_memory" in record else "-"
+                lines.append(f"{record['stage']:<10}{record['wall_time']:>12.6f}{record['cpu_time']:>12.6f}{peak:>12}  {counters}")
+            return "\n".join(lines)
+        else:
+            raise ValueError(f"Unknown format {format!r}. 'txt' and 'json' are allowed")
+
+    def print(self, format="txt", file=sys.stderr):
+        print(self.dump(format), file=file)
@@ -1,9 +1,13 @@
-import sys, getopt, os
+import sys, getopt, os, stat, tempfile
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 
-
-if __name__ == "__main__":
-    from LLexer import LLexer
-    from LParser import LParser, YaccError, Node
+from LParser import Node
+from LTypes import LTypeInference, INT, statements
+from LSemantic import LSemantic
+from LStats import LStats
+from LSourceMap import SourceLine, write_source_map
+from LWalk import walk, fold
 
 
 ##########################
@@ -12,18 +16,100 @@ if __name__ == "__main__":
 def named(obj_, name_):
     return isinstance(obj_, Node) and obj_.name == name_
 
+@contextmanager
+def atomic_file(path, mode="w"):
+    # file next to 'path', moved over it when the block ends without error,
+    # so readers never see a half-written file. It gets the mode of the file
+    # it replaces, a new one the default mode of 'open' (0666 & ~umask)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        permissions = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        permissions = 0o666 & ~umask
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as fp:
+            yield fp
+        os.chmod(temp_path, permissions)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def copy_runtime(directory):
+    # 'LRuntime.py' next to translated code, an old copy is replaced when it
+    # differs from this one, translated code may call its newer helpers
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "LRuntime.py"), "rb") as fp:
+        data = fp.read()
+    path = os.path.join(directory, "LRuntime.py")
+    try:
+        with open(path, "rb") as fp:
+            if fp.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    with atomic_file(path, "wb") as fp:
+        fp.write(data)
+
+def variables(node):
+    # -> variables read in expression 'node', None if it calls a function
+    names, stack = set(), [node]
+    while stack:
+        node = stack.pop()
+        if node.name == "VAR":
+            names.add(node.value)
+        elif node.name == "FCALL":
+            return None
+        elif type(node.value) is tuple:
+            stack.extend(node.value)
+    return names
+
+def reads_outside(fbody, loops):
+    # -> {WHILE: reads of its variable outside of the loop} for 'loops' of
+    # {WHILE: variable}. Explicit stack like 'LSemantic.walk', a loop is
+    # followed by a (loop, reads so far) pair popped when it is all visited
+    if not loops:
+        return {}
+    names = set(loops.values())
+    reads, inside = Counter(), {}
+    stack = [fbody]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        if not isinstance(node, Node):
+            if type(node) is tuple:
+                loop, before = node
+                inside[loop] = reads[loops[loop]] - before
+            continue
+        name, value = node.name, node.value
+        if name == "VAR":
+            if value in names:
+                reads[value] += 1
+        elif type(value) is tuple:
+            if name == "VARASGN" or name == "READ":
+                extend(value[1:])
+                continue
+            if node in loops:
+                stack.append((node, reads[loops[node]]))
+            extend(value)
+    return {loop: reads[var] - inside[loop] for loop, var in loops.items()}
+
 
 ##########################
 #####   TRANSLATOR   #####
 ##########################
 def ast_node(func):
+    # whole program or function: node check, first line tagged for source map
     def wrapper(self, node, level=0):
         if node.name != func.__name__:
             raise LTranslatorError(f"Node[{node.name!r}] passed into {func.__name__}")
-        code = func(self, node, level or 0)
-        if isinstance(code, str) and level is not None:
-            return [code]
-        return code
+        lines = func(self, node, level)
+        if self.source_map and node.lineno is not None and lines:
+            lines[0] = SourceLine(lines[0], node.lineno)
+        return lines
     return wrapper
 
 
@@ -31,197 +117,409 @@ class LTranslatorError(Exception):
     def __init__(self, *args: object):
         super().__init__(*args)
 
+# marker walked between branches of IF, emits 'else:'
+ELSE = Node("ELSE", None)
+
+# comparison with swapped operands
+MIRROR = {"LES": "GRT", "LEQ": "GEQ", "GRT": "LES", "GEQ": "LEQ"}
+
 class LTranslator:
     indent = " "*4
+    operators = {
+        "ADD": "+", "SUB": "-", "MUL": "*", "DIV": "/", "AND": " and ", "OR": " or ",
+        "EQU": "==", "NEQ": "!=", "LEQ": "<=", "LES": "<", "GEQ": ">=", "GRT": ">",
+    }
 
-    def __init__(self) -> None:
+    # emitted only with 'profile' flag. Recursive calls are counted, but only
+    # the outermost one adds to the cumulative time. Modules are aliased, L
+    # functions of the same names would replace them
+    profile_support = [
+        "import sys as _lprof_sys, os as _lprof_os, json as _lprof_json, time as _lprof_time, atexit as _lprof_atexit",
+        "",
+        "_lprof_calls = {}",
+        "",
+        "def _lprof_function(func):",
+        "    stats = _lprof_calls.setdefault(func.__name__, [0, 0.0, False])",
+        "    clock = _lprof_time.perf_counter",
+        "    def wrapper(*args):",
+        "        stats[0] += 1",
+        "        if stats[2]:",
+        "            return func(*args)",
+        "        stats[2] = True",
+        "        start = clock()",
+        "        try:",
+        "            return func(*args)",
+        "        finally:",
+        "            stats[1] += clock() - start",
+        "            stats[2] = False",
+        "    return wrapper",
+        "",
+        "def _lprof_dump():",
+        "    path = _lprof_os.environ.get('LPROF_OUTPUT', _lprof_os.path.splitext(_lprof_sys.argv[0])[0] + '.lprof.json')",
+        "    with open(path, 'w') as fp:",
+        "        _lprof_json.dump({",
+        "            'functions': {name: {'calls': calls, 'time': time_} for name, (calls, time_, _) in _lprof_calls.items()},",
+        "            'loops': dict(zip(_lprof_loop_names, _lprof_loops)),",
+        "            'writes': dict(zip(_lprof_write_names, _lprof_writes)),",
+        "        }, fp, indent=2)",
+        "",
+        "_lprof_atexit.register(_lprof_dump)",
+    ]
+
+    def __init__(self, infer_types=True, runtime=False, profile=False, source_map=False) -> None:
         self.lines = []
         self.args = 0
-
-    def translate(self, ast: Node):
+        self.infer_types = infer_types
+        self.runtime = runtime
+        self.profile = profile
+        # tag lines with L lines for 'LSourceMap.build_source_map'
+        self.source_map = source_map
+        self.loops = []
+        self.writes = []
+        self.ranges = False     # some loop is emitted as counted one
+        self.print = "write" if runtime else "print"
+        self.types = None
+        self.semantic = None
+        self.fname = None
+        self.out = []
+        self.counted = {}
+        # hooks by node name
+        self.statements = {name: getattr(self, name) for name in
+                           ("FBODY", "BRANCH", "ELSE", "STEP", "VARASGN", "IF", "WHILE", "READ", "WRITE", "RETURN")}
+        self.expressions = {name: getattr(self, name) for name in ("VAR", "FNAME", "INT", "FLOAT", "FCALL", "POW", "NEG", "NOT")}
+        self.expressions.update((name, self.binary) for name in self.operators)
+
+    def translate(self, ast: Node, semantic: LSemantic|None=None):
+        self.semantic = semantic or LSemantic().analyze(ast)
+        # without inference every value is treated as today: int or float at runtime
+        self.types = LTypeInference().infer(ast, self.semantic) if self.infer_types else None
         self.lines = self.PROG(ast)
         return self.lines
 
-    def __bin_op(self, e1, e2, op):
-        return f"({getattr(self, e1.name)(e1, None)}{op}{getattr(self, e2.name)(e2, None)})"
-
-    def __un_op(self, e, op):
-        return f"{op}{getattr(self, e.name)(e, None)}"
-
-    @ast_node
-    def PROG(self, node, level=0):
+    def header(self):
         lines = []
-        lines.extend(["import sys", "", ""])
-        fdefs = [node for node in node.value if named(node, "FDEF")]
+        lines.append("import sys")
+        if self.runtime:
+            # 'read' and 'write' are keywords in L, so can't be redefined by program
+            lines.append("from LRuntime import read, write")
+        if self.profile:
+            lines.extend(self.profile_support)
+        lines.extend(["", ""])
+        return lines
 
-        for fdef in fdefs:
-            lines.extend(self.FDEF(fdef, level))
+    def footer(self):
+        lines = []
+        if self.ranges:
+            # counted loops call these, L functions of the same names would
+            # replace the builtins. Known after every 'def' only
+            lines.extend(["from builtins import range as _lrange, len as _llen", "", ""])
+        if self.profile:
+            lines.extend([
+                f"_lprof_loop_names = {self.loops!r}",
+                f"_lprof_loops = [0]*{len(self.loops)}",
+                f"_lprof_write_names = {self.writes!r}",
+                f"_lprof_writes = [0]*{len(self.writes)}",
+                "", "",
+            ])
         lines.extend([
             "if __name__ == '__main__':",
             self.indent+"try:",
-            self.indent*2+f"print(f\"returned: {{main(*sys.argv[1:{self.args+1}]) or 0}}\")",
+            self.indent*2+f"{self.print}(f\"returned: {{main(*sys.argv[1:{self.args+1}]) or 0}}\")",
             self.indent+"except NameError:",
-            self.indent*2+"print(\"Entry point 'main' not defined\")",
+            self.indent*2+f"{self.print}(\"Entry point 'main' not defined\")",
             ""
         ])
         return lines
 
+    #===== Streaming =====#
+    # Functions one by one, without the whole tree: 'begin', then 'function'
+    # for every FDEF in source order, then 'end'. Every call returns lines
+    # to be written right away. Types are inferred per function, arguments
+    # of a function are unknown without its callers
+    def begin(self, semantic: LSemantic):
+        self.semantic = semantic
+        self.loops, self.writes, self.ranges = [], [], False
+        return self.header()
+
+    def function(self, fdef: Node):
+        if self.infer_types:
+            self.types = LTypeInference().infer(Node("PROG", (fdef,)), self.semantic, closed=False)
+        return self.FDEF(fdef)
+
+    def end(self):
+        return self.footer()
+
+    @ast_node
+    def PROG(self, node, level=0):
+        lines = self.header()
+        fdefs = [node for node in node.value if named(node, "FDEF")]
+
+        self.loops, self.writes, self.ranges = [], [], False
+        for fdef in fdefs:
+            lines.extend(self.FDEF(fdef, level))
+        lines.extend(self.footer())
+        return lines
+
     @ast_node
     def FDEF(self, node, level=0):
-        args = [arg_node.value for arg_node in node.FARGS.value or [] if named(arg_node, "FARG")]
+        args = list(self.semantic.params[node])
+        self.fname = node.FNAME.value
         if node.FNAME.value == "main":
             args = [f'{arg}=0' for arg in args]
             self.args = len(args)
         return [
+            *([f"{self.indent*level}@_lprof_function"] if self.profile else []),
             f"{self.indent*level}def {node.FNAME.value}({','.join(args)}):",
-            *self.FBODY(node.FBODY, level),
+            *self.body(node, level+1),
             "", ""
         ]
 
-    @ast_node
-    def FBODY(self, node, level=0):
+    def body(self, fdef, level):
+        # lines of a function body, statements are walked with an explicit
+        # stack, their hooks append lines to 'self.out'
+        self.out = []
+        self.counted = self.counted_loops(fdef.FBODY) if self.types else {}
+        self.ranges = self.ranges or bool(self.counted)
+        walk(fdef.FBODY, self.statement, context=level)
+        return self.out
+
+    def statement(self, node, level):
+        # 'level' is indentation of the lines of 'node'
+        start = len(self.out)
+        method = self.statements.get(node.name)
+        if method is None:
+            # expression as a statement
+            self.out.append(f"{self.indent*level}{self.expression(node)}")
+            pairs = []
+        else:
+            pairs = method(node, level)
+        if self.source_map and node.lineno is not None and len(self.out) > start:
+            # first line of a statement is tagged for source map
+            self.out[start] = SourceLine(self.out[start], node.lineno)
+        return pairs
+
+    def expression(self, node):
+        return fold(node, self.leave)
+
+    def leave(self, node, codes):
+        method = self.expressions.get(node.name)
+        if method is None:
+            raise LTranslatorError(f"Node[{node.name!r}] can't be translated")
+        return method(node, codes)
+
+    #===== Counted loops =====#
+    # 'i = k; while (i < n) { ...; i = i + 1; }' is emitted as a 'for' over
+    # range: 'i' and 'n' are ints, the step is a constant, 'n' has no calls
+    # and none of its variables is written in the body, 'i' is written by the
+    # last statement of the body only. After the loop 'i' gets one step past
+    # its last value, like the 'while' leaves it. This is skipped when 'i' is
+    # assigned right before the loop and read nowhere else
+    def counted_loops(self, fbody):
+        # -> {WHILE: (var, bound, step, comparison, final)}. Statements are
+        # walked once, targets of assignments are logged, so the ones of a
+        # loop body are a slice of the log when the loop is left
+        loops, log, marks, assigned = {}, [], {}, {}
+        def enter(node, previous):
+            name = node.name
+            if name == "VARASGN" or name == "READ":
+                log.append(node.value[0].value)
+            elif name == "FBODY" or name == "BRANCH":
+                ops = statements(node)
+                return list(zip(ops, [None, *ops]))
+            elif name == "IF":
+                return [(branch, None) for branch in node.value[1:]]
+            elif name == "WHILE":
+                loop = self.counted_loop(node)
+                if loop is not None:
+                    loops[node], marks[node] = loop, len(log)
+                    assigned[node] = named(previous, "VARASGN") and previous.value[0].value == loop[0]
+                return [(node.value[1], None)]
+            return []
+        def leave(node, previous):
+            if node in marks:
+                # the last target is the step
+                writes = set(log[marks.pop(node):-1])
+                var, *_, names = loops[node]
+                if var in writes or not writes.isdisjoint(names):
+                    del loops[node]
+        walk(fbody, enter, leave)
+
+        # reads are counted only when the step after a loop may be skipped
+        outside = reads_outside(fbody, {loop: loops[loop][0] for loop in loops if assigned[loop]})
+        return {loop: (*loops[loop][:4], outside.get(loop, 1) > 0) for loop in loops}
+
+    def counted_loop(self, node):
+        # -> (var, bound, step, comparison, variables of bound) or None
+        cond, branch = node.value
+        test, body = cond.value[0], statements(branch)
+        if not body or not named(body[-1], "VARASGN") or test.name not in MIRROR:
+            return None
+        var = body[-1].value[0].value
+        comparison, (left, bound) = test.name, test.value
+        if named(bound, "VAR") and bound.value == var:
+            # 'n > i' is 'i < n'
+            comparison, left, bound = MIRROR[comparison], bound, left
+        if not named(left, "VAR") or left.value != var:
+            return None
+        step = self.step(body[-1].value[1], var)
+        if step is None or (step > 0) != (comparison in ("LES", "LEQ")):
+            return None
+        if self.types.var_type(self.fname, var) != INT or self.types.expr_type(bound, self.fname) != INT:
+            return None
+        names = variables(bound)
+        if names is None or var in names:
+            return None
+        return var, bound, step, comparison, names
+
+    def step(self, value, var):
+        # 'i + c', 'c + i' -> c, 'i - c' -> -c
+        if value.name not in ("ADD", "SUB"):
+            return None
+        left, right = value.value
+        if value.name == "ADD" and named(right, "VAR") and right.value == var:
+            left, right = right, left
+        if not named(left, "VAR") or left.value != var or not named(right, "INT") or right.value == 0:
+            return None
+        return right.value if value.name == "ADD" else -right.value
+
+    #===== Statements =====#
+    # append their lines, return (statement, level) pairs to be walked next
+    def FBODY(self, node, level):
         if node.value is None:
-            return f"{self.indent*(level+1)}pass"
-        lines = []
-        for op in node.value:
-            lines.extend(getattr(self, op.name)(op, level+1))
-        return lines
+            self.out.append(f"{self.indent*level}pass")
+            return []
+        return None
+
+    def BRANCH(self, node, level):
+        return None
+
+    def ELSE(self, node, level):
+        self.out.append(f"{self.indent*level}else:")
+        return []
 
-    @ast_node
     def VARASGN(self, node, level):
-        exp = node.value[1]
-        return f"{self.indent*level}{node.VAR.value} = {getattr(self, exp.name)(exp, None)}"
+        self.out.append(f"{self.indent*level}{node.value[0].value} = {self.expression(node.value[1])}")
+        return []
 
-    @ast_node
     def IF(self, node, level):
-        cond = node.COND.value[0]
-        branch_then = node.BRANCH0
-        branch_else = node.BRANCH1
-        lines = [f"{self.indent*level}if {getattr(self, cond.name)(cond, None)}:{'pass' if branch_then.value is None else ''}"]
+        cond, branch_then, branch_else = node.value
+        self.out.append(f"{self.indent*level}if {self.expression(cond.value[0])}:{'pass' if branch_then.value is None else ''}")
+        pairs = []
         if branch_then.value is not None:
-            lines.extend(self.BRANCH(branch_then, level))
-
+            pairs.append((branch_then, level+1))
         if branch_else.value is not None:
-            lines.extend([
-                f"{self.indent*level}else:",
-                *self.BRANCH(branch_else, level)
-            ])
-        return lines
-
-    @ast_node
-    def BRANCH(self, node, level):
-        lines = []
-        for op in node.value:
-            lines.extend(getattr(self, op.name)(op, level+1))
-        return lines
+            pairs.extend([(ELSE, level), (branch_else, level+1)])
+        return pairs
+
+    def STEP(self, node, level):
+        # after a counted loop: the step the 'while' makes past the last value
+        var, bound, step, comparison, _ = self.counted[node.value[0]]
+        self.out.extend([
+            f"{self.indent*level}if {var}{self.operators[comparison]}{self.expression(bound)}:",
+            f"{self.indent*(level+1)}{var} = ({var}{'+' if step > 0 else '-'}{abs(step)})",
+        ])
+        return []
 
-    @ast_node
     def WHILE(self, node, level):
-        cond = node.COND.value[0]
-        branch = node.BRANCH
-        lines = [f"{self.indent*level}if {getattr(self, cond.name)(cond, None)}:{'pass' if branch.value is None else ''}"]
-        if branch.value is not None:
-            lines.extend(*self.BRANCH(branch, level))
-        return lines
+        cond, branch = node.value
+        loop = self.counted.get(node)
+        if loop is None:
+            head, body = f"while {self.expression(cond.value[0])}:", branch.value
+            pairs = [] if body is None else [(branch, level+1)]
+        else:
+            var, bound, step, comparison, final = loop
+            stop = self.expression(bound)
+            if comparison in ("LEQ", "GEQ"):
+                # range excludes the bound
+                stop = f"{bound.value + (1 if step > 0 else -1)}" if named(bound, "INT") else f"{stop}{'+' if step > 0 else '-'}1"
+            span = f"_lrange({var}, {stop}{f', {step}' if step != 1 else ''})"
+            head = f"for {var} in {span}:"
+            body = statements(branch)[:-1]
+            if not body:
+                # only the increment: jump straight to the value the 'while' stops at,
+                # still evaluated when unobservable so unbound reads fail as before
+                lines = [f"{var} = ({var}{'+' if step > 0 else '-'}_llen({span}){f'*{abs(step)}' if abs(step) != 1 else ''})"]
+                if self.profile:
+                    lines.insert(0, f"_lprof_loops[{len(self.loops)}] += _llen({span})")
+                    self.loops.append(f"{self.fname}:while{len(self.loops)}")
+                self.out.extend(f"{self.indent*level}{line}" for line in lines)
+                return []
+            pairs = [(op, level+1) for op in body] + ([(Node("STEP", node), level)] if final else [])
+        if self.profile:
+            self.out.extend([
+                f"{self.indent*level}{head}",
+                f"{self.indent*(level+1)}_lprof_loops[{len(self.loops)}] += 1",
+            ])
+            self.loops.append(f"{self.fname}:while{len(self.loops)}")
+        else:
+            self.out.append(f"{self.indent*level}{head}{'' if body else 'pass'}")
+        return pairs
 
-    @ast_node
     def READ(self, node, level):
-        return [
-            f"{self.indent*level}{node.VAR.value} = input()",
-            f"{self.indent*level}try:",
-            f"{self.indent*(level+1)}{node.VAR.value} = int({node.VAR.value})",
-            f"{self.indent*level}except ValueError:",
-            f"{self.indent*(level+1)}{node.VAR.value} = float({node.VAR.value})",
-        ]
-            
+        var = node.value[0].value
+        as_float = self.types and not self.types.is_observable(self.fname, var)
+        if self.runtime:
+            self.out.append(f"{self.indent*level}{var} = read({'float' if as_float else ''})")
+        elif as_float:
+            # every use converts the value to float, int parsing can be skipped
+            self.out.append(f"{self.indent*level}{var} = float(input())")
+        else:
+            self.out.extend([
+                f"{self.indent*level}{var} = input()",
+                f"{self.indent*level}try:",
+                f"{self.indent*(level+1)}{var} = int({var})",
+                f"{self.indent*level}except ValueError:",
+                f"{self.indent*(level+1)}{var} = float({var})",
+            ])
+        return []
 
-    @ast_node
     def WRITE(self, node, level):
-        exp = node.value[0]
-        return f"{self.indent*level}print({getattr(self, exp.name)(exp, None)})"
+        line = f"{self.indent*level}{self.print}({self.expression(node.value[0])})"
+        if self.profile:
+            self.writes.append(f"{self.fname}:write{len(self.writes)}")
+            self.out.append(f"{self.indent*level}_lprof_writes[{len(self.writes)-1}] += 1")
+        self.out.append(line)
+        return []
 
-    @ast_node
     def RETURN(self, node, level):
-        exp = node.value[0]
-        return f"{self.indent*level}return {getattr(self, exp.name)(exp, None)}"
-
-    @ast_node
-    def VAR(self, node, level):
-        return f"{self.indent*level}{node.value}"
-
-    @ast_node
-    def FCALL(self, node, level):
-        name = node.FNAME.value
-        args = [getattr(self, exp.name)(exp, None) for exp in node.value[1:]]
-        return f"{self.indent*level}{name}({', '.join(args)})"
+        self.out.append(f"{self.indent*level}return {self.expression(node.value[0])}")
+        return []
 
-    @ast_node
-    def ADD(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '+')}"
+    #===== Expressions =====#
+    # code of a node from codes of its children
+    def VAR(self, node, codes):
+        return node.value
 
-    @ast_node
-    def SUB(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '-')}"
+    def FNAME(self, node, codes):
+        return node.value
 
-    @ast_node
-    def MUL(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '*')}"
+    def INT(self, node, codes):
+        return f"{node.value}"
 
-    @ast_node
-    def DIV(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '/')}"
+    def FLOAT(self, node, codes):
+        return f"{node.value}"
 
-    @ast_node
-    def POW(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '**')}"
+    def FCALL(self, node, codes):
+        return f"{codes[0]}({', '.join(codes[1:])})"
 
-    @ast_node
-    def NEG(self, node, level):
-        return f"{self.indent*level}{self.__un_op(node.value[0], '-')}"
+    def POW(self, node, codes):
+        base, exp = node.value
+        if (self.types and named(base, "VAR") and named(exp, "INT") and exp.value in (2, 3)
+                and self.types.expr_type(base, self.fname) == INT):
+            # small integer powers are cheaper as plain multiplication
+            return f"({'*'.join([base.value]*exp.value)})"
+        # negative base is parenthesized, python binds '**' tighter than '-'
+        left = f"({codes[0]})" if named(base, "NEG") else codes[0]
+        return f"({left}**{codes[1]})"
 
-    @ast_node
-    def AND(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], ' and ')}"
+    def NEG(self, node, codes):
+        return f"-{codes[0]}"
 
-    @ast_node
-    def OR(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], ' or ')}"
+    def NOT(self, node, codes):
+        return f"not {codes[0]}"
 
-    @ast_node
-    def NOT(self, node, level):
-        return f"{self.indent*level}{self.__un_op(node.value[0], 'not ')}"
-
-    @ast_node
-    def EQU(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '==')}"
-
-    @ast_node
-    def NEQ(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '!=')}"
-
-    @ast_node
-    def LEQ(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '<=')}"
-
-    @ast_node
-    def LES(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '<')}"
-
-    @ast_node
-    def GEQ(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '>=')}"
-
-    @ast_node
-    def GRT(self, node, level):
-        return f"{self.indent*level}{self.__bin_op(node.value[0], node.value[1], '>')}"
-
-    @ast_node
-    def INT(self, node, level=0):
-        return f"{self.indent*level}{node.value}"
-    
-    @ast_node
-    def FLOAT(self, node, level):
-        return f"{self.indent*level}{node.value}"
+    def binary(self, node, codes):
+        return f"({codes[0]}{self.operators[node.name]}{codes[1]})"
 
 
 ##########################
@@ -245,11 +543,51 @@ def make_options(opts, args):
     options={
         'inputfile': None,
         'outputfile': None,
+        'runtime': False,
+        'profile': False,
+        'stats': None,
+        'jobs': None,
+        'engine': "lalr",
+        'sourcemap': False,
+        'stream': False,
+        'ir': False,
     }
     for opt, arg in opts:
         if opt in ["-h", "--help"]:
             print_help()
             exit(0)
+        elif opt in ["-r", "--runtime"]:
+            options['runtime'] = True
+        elif opt in ["-p", "--profile"]:
+            options['profile'] = True
+        elif opt in ["-m", "--source-map"]:
+            options['sourcemap'] = True
+        elif opt == "--stream":
+            options['stream'] = True
+        elif opt == "--ir":
+            options['ir'] = True
+        elif opt == "--engine":
+            if arg not in ["lalr", "pratt"]:
+                print(f"Unknown parser engine {arg!r}. Only 'lalr' or 'pratt' are allowed.")
+                exit(1)
+            options['engine'] = arg
+        elif opt in ["-j", "--jobs"]:
+            if not arg.isdigit() or int(arg) < 1:
+                print(f"Jobs must be a positive integer, got {arg!r}")
+                exit(1)
+            options['jobs'] = int(arg)
+        elif opt in ["-s", "--stats"]:
+            if options['stats']:
+                print(f"Stats format already set as {options['stats']!r} before.")
+                print(f"Remove redundant '-s' or '--stats' flags")
+                exit(1)
+            if opt == "-s" and arg == "tats":
+                print("Unknown stats format 'tats'. You probably meant to use the '--stats' (doubledashed).")
+                exit(1)
+            if arg not in ["txt", "json"]:
+                print(f"Unknown stats format {arg!r}. Only 'txt' or 'json' are allowed.")
+                exit(1)
+            options['stats'] = arg
     for opt, arg in opts:
         if opt in ["-o", "--output"]:
             if options['outputfile']:
@@ -269,6 +607,18 @@ def make_options(opts, args):
                 print("Output file can't be empty")
                 exit(1)
             options['outputfile'] = f"{arg}.py"
+    if options['sourcemap'] and not options['outputfile']:
+        print("Source map is written next to the output file, specify it with '-o'")
+        exit(1)
+    if options['stream'] and (options['sourcemap'] or options['jobs']):
+        print("'--stream' can't be used with '-m' or '-j'")
+        exit(1)
+    if options['engine'] != "lalr" and (options['stream'] or options['jobs']):
+        print("'--engine' can't be used with '--stream' or '-j'")
+        exit(1)
+    if options['ir'] and options['jobs']:
+        print("'--ir' can't be used with '-j'")
+        exit(1)
     if args:
         inputfile = args[0]
         if inputfile == "elp":
@@ -302,69 +652,141 @@ def print_help():
     print("\tOptions:")
     print("\t  -h,    --help\t\t\tDisplay info about program.")
     print("\t  -o[=], --output[=]\t\tOutput file. If not specified, printed into stdout.")
+    print("\t  -r,    --runtime\t\tUse buffered I/O of 'LRuntime' module in translated code.")
+    print("\t\t\t\t\tModule is copied next to the output file.")
+    print("\t  -p,    --profile\t\tInstrument translated code. Call counts and time of functions,")
+    print("\t\t\t\t\titerations of loops and counts of writes are dumped at exit into")
+    print("\t\t\t\t\tJSON file from LPROF_OUTPUT env variable (default '<script>.lprof.json').")
+    print("\t  -m,    --source-map\t\tWrite map of output lines to L source lines into '<output>.py.map'.")
+    print("\t\t\t\t\tUse it with 'LSourceMap.py' to see cProfile output at L lines.")
+    print("\t  -j[=], --jobs[=]\t\tParse functions of the source in this number of processes.")
+    print("\t         --stream\t\tTranslate and write every function as soon as it is parsed, the tree")
+    print("\t\t\t\t\tis not kept. Memory is bounded by the biggest function. Only the first")
+    print("\t\t\t\t\tsyntax error is reported, no output file is written then.")
+    print("\t         --engine[=]\t\tParser engine, \"lalr\" (sly, default) or \"pratt\" (hand-written, faster).")
+    print("\t         --ir\t\t\tEmit functions from their SSA form (see 'LIR.py'), the code does the same.")
+    print("\t  -s[=], --stats[=]\t\tPrint time, memory and size statistics of every stage into stderr.")
+    print("\t\t\t\t\t\"txt\" and \"json\" formats are allowed.")
 
     print("\tArguments:")
-    print("\t  input_file\t\t\tRequired. File with L lang source to be translated.\n")
+    print("\t  input_file\t\t\tRequired. File with L lang source to be translated.")
+    print("\t\t\t\t\tAST dumped by 'LParser -f json' or '-f bin' is accepted too.\n")
+
+
+def stream_file(options, stats):
+    # '--stream': output is written into a temporary file function by function
+    # and moved over the output file when the whole source is translated
+    from LLang import stream_text, LError, LSyntaxError
+
+    try:
+        with open(options['inputfile'], encoding="utf-8") as fp:
+            text = fp.read()
+    except IOError as error:
+        print(error)
+        exit(0)
+
+    output = options['outputfile']
+    if output and os.path.exists(output):
+        print(f"'{output}' alreasy exist")
+        while((answer:=input(f"Rewrite '{output}'? (y/n): ")) != "y"):
+            if answer == "n":
+                print("Output printed into stdout")
+                output = None
+                break
+            print(f"Unknown answer {answer!r}")
+    try:
+        with atomic_file(output) if output else nullcontext(sys.stdout) as output_fp:
+            result = stream_text(
+                text, lambda lines: output_fp.writelines(line + "\n" for line in lines),
+                stats=stats if options['stats'] else None, runtime=options['runtime'], profile=options['profile'],
+                ir=options['ir'],
+            )
+    except LError as error:
+        for message in getattr(error, "errors", [str(error)]):
+            print(message)
+        exit(0 if isinstance(error, LSyntaxError) else 1)
+
+    if output:
+        print(f"Code translated into {os.path.abspath(output)}")
+        if options['runtime']:
+            copy_runtime(os.path.dirname(os.path.abspath(output)))
+    for warn in result.warns:
+        print(f"WARNING::{warn}")
+    if options['stats']:
+        stats.print(options['stats'])
 
 
 if __name__ == "__main__":
+    from LLang import compile_file, LLoadError, LSyntaxError
+
     try:
-        opts, args = parse_cliargs("hf:o:i:", ["help", "format=", "output=", "image-output="])
+        opts, args = parse_cliargs("hf:o:i:rpms:j:", ["help", "format=", "output=", "image-output=", "runtime", "profile", "source-map", "stats=", "jobs=", "stream", "engine=", "ir"])
     except getopt.GetoptError as e:
         print(e)
-        print("use 'LParser -h' for help")
+        print("use 'LTranslator -h' for help")
         exit(2)
 
     options = make_options(opts, args)
 
+    stats = LStats(trace_memory=options['stats'] is not None, source=options['inputfile'])
+    if options['stream']:
+        stream_file(options, stats)
+        exit(0)
     try:
-        input_fp = open(options['inputfile'], "r")
+        # source, or AST dumped by 'LParser -f json' / '-f bin' which is not parsed again
+        result = compile_file(
+            options['inputfile'], jobs=options['jobs'], stats=stats if options['stats'] else None,
+            engine=options['engine'], runtime=options['runtime'], profile=options['profile'],
+            source_map=options['sourcemap'], ir=options['ir'],
+        )
     except IOError as error:
         print(error)
         exit(0)
+    except LLoadError as error:
+        print(f"Can't load AST from {options['inputfile']!r}: {error}")
+        exit(0)
+    except LSyntaxError as error:
+        # parallel parser stops at the first error
+        for message in error.errors:
+            print(message)
+        exit(0)
+    lines = result.lines
 
-    with input_fp:
-        text = "".join(input_fp.readlines())
-        lexer = LLexer()
-        parser = LParser(text)
-        translator = LTranslator()
-
+    if options['outputfile']:
+        os.makedirs(os.path.dirname(f"{options['outputfile']}"), exist_ok=True)
         try:
-            ast = parser.parse(lexer.tokenize(text))
-        except YaccError as error:
+            output_fp = open(f"{options['outputfile']}", "x", encoding="utf-8")
+        except FileExistsError:
+            print(f"'{options['outputfile']}' alreasy exist")
+            while((answer:=input(f"Rewrite '{options['outputfile']}'? (y/n): ")) != "y"):
+                if answer == "n":
+                    print("Output printed into stdout")
+                    print(os.linesep.join(lines))
+                    output_fp = None
+                    break
+                else:
+                    print(f"Unknown answer {answer!r}")
+            else:
+                output_fp = open(f"{options['outputfile']}", "w", encoding="utf-8")
+        except IOError as error:
             print(error)
             exit(0)
 
-        lines = translator.translate(ast)
-
-        if options['outputfile']:
-            os.makedirs(os.path.dirname(f"{options['outputfile']}"), exist_ok=True)
-            try:
-                output_fp = open(f"{options['outputfile']}", "x", encoding="utf-8")
-            except FileExistsError:
-                print(f"'{options['outputfile']}' alreasy exist")
-                while((answer:=input(f"Rewrite '{options['outputfile']}'? (y/n): ")) != "y"):
-                    if answer == "n":
-                        print("Output printed into stdout")
-                        print(os.linesep.join(lines))
-                        output_fp = None
-                        break
-                    else:
-                        print(f"Unknown answer {answer!r}")
-                else:
-                    output_fp = open(f"{options['outputfile']}", "w", encoding="utf-8")
-            except IOError as error:
-                print(error)
-                exit(0)
-
-            if output_fp:
-                with output_fp:
-                    for line in lines:
-                        output_fp.write(line + "\n")
-                    print(f"Code translated into {os.path.abspath(output_fp.name)}")
-        else:
-            print(os.linesep.join(lines))
+        if output_fp:
+            with output_fp:
+                for line in lines:
+                    output_fp.write(line + "\n")
+                print(f"Code translated into {os.path.abspath(output_fp.name)}")
+            if options['sourcemap']:
+                write_source_map(result.source_map(options['inputfile'], output_fp.name), f"{output_fp.name}.map")
+            if options['runtime']:
+                copy_runtime(os.path.dirname(os.path.abspath(output_fp.name)))
+    else:
+        print(os.linesep.join(lines))
+
+    # translated code still runs until it reaches a bad call
+    for warn in result.warns:
+        print(f"WARNING::{warn}")
 
-        if parser.warns:
-            for warn in parser.warns:
-                print(f"WARNING::{warn}")
+    if options['stats']:
+        stats.print(options['stats'])
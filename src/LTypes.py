@@ -0,0 +1,251 @@
+from LParser import Node
+from LSemantic import LSemantic
+from LWalk import walk, fold
+
+
+##########################
+#####     TYPES      #####
+##########################
+INT     = "int"
+FLOAT   = "float"
+NUM     = "num"      # int or float, known only at runtime (e.g. value of 'read')
+BOOL    = "bool"
+UNKNOWN = "unknown"  # anything python can hold (argv strings, None, complex, ...)
+
+NUMERIC = {INT, FLOAT, NUM}
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def named(obj_, name_):
+    return isinstance(obj_, Node) and obj_.name == name_
+
+def join(t1, t2):
+    # None is the bottom of the lattice: "nothing known yet"
+    if t1 is None: return t2
+    if t2 is None: return t1
+    if t1 == t2:   return t1
+    if t1 in NUMERIC and t2 in NUMERIC:
+        return NUM
+    return UNKNOWN
+
+def arith(t1, t2):
+    if t1 is None or t2 is None:
+        return None
+    if t1 not in NUMERIC or t2 not in NUMERIC:
+        return UNKNOWN
+    if t1 == INT and t2 == INT:
+        return INT
+    if FLOAT in (t1, t2):
+        return FLOAT
+    return NUM
+
+def int_literal(node):
+    if named(node, "INT"):
+        return node.value
+    if named(node, "NEG") and named(node.value[0], "INT"):
+        return -node.value[0].value
+    return None
+
+def statements(node):
+    return [op for op in node.value or () if isinstance(op, Node)]
+
+def always_returns(node):
+    # statement, FBODY or BRANCH: True when every path through it ends with 'return'
+    def enter(node):
+        if node.name == "RETURN":
+            return True
+        if node.name in ("IF", "FBODY", "BRANCH"):
+            return None
+        return False
+    def leave(node, values):
+        if node.name == "IF":
+            return values[1] and values[2]
+        return node.value is not None and any(values)
+    return fold(node, leave, enter)
+
+def may_fall_through(body):
+    return not always_returns(body)
+
+
+##########################
+#####   INFERENCE    #####
+##########################
+class LTypeInference:
+    arith_ops = {"ADD", "SUB", "MUL", "DIV", "POW"}
+    bool_ops = {"AND", "OR", "NOT", "EQU", "NEQ", "LEQ", "LES", "GEQ", "GRT"}
+
+    def __init__(self) -> None:
+        self.functions = {}  # fname -> FDEF
+        self.params = {}     # fname -> [arg names]
+        self.vars = {}       # fname -> {var: type}
+        self.returns = {}    # fname -> type
+        self.exprs = {}      # fname -> {expression node: type}
+        self.observable = {} # fname -> vars whose int/float kind can be seen
+        self.changed = False
+        self.fname = None    # function of expressions being typed
+
+    def infer(self, ast: Node, semantic: LSemantic|None=None, closed=True):
+        # not 'closed': 'ast' is a part of the program, functions may be
+        # called from code not seen, so arguments can be anything
+        semantic = semantic or LSemantic().analyze(ast)
+        fdefs = [node for node in ast.value if named(node, "FDEF")]
+        for fdef in fdefs:
+            fname = fdef.FNAME.value
+            self.functions[fname] = fdef
+            self.params[fname] = semantic.params[fdef]
+            self.vars[fname] = {}
+            self.returns[fname] = None
+            # 'main' is called with argv strings or default zeros
+            if fname == "main" or not closed:
+                for arg in self.params[fname]:
+                    self.vars[fname][arg] = UNKNOWN
+
+        # every update is a join on a finite lattice, so this terminates
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            for fdef in fdefs:
+                fname = fdef.FNAME.value
+                self.exprs[fname] = {}
+                for op in statements(fdef.FBODY):
+                    self.statement(fname, op)
+                if may_fall_through(fdef.FBODY):
+                    self.update_return(fname, UNKNOWN)
+
+        for fdef in fdefs:
+            fname = fdef.FNAME.value
+            self.observable[fname] = set()
+            for op in statements(fdef.FBODY):
+                self.uses(fname, op)
+        return self
+
+    #===== Query interface =====#
+    def var_type(self, fname, var):
+        return self.vars.get(fname, {}).get(var) or UNKNOWN
+
+    def expr_type(self, node, fname):
+        return self.exprs.get(fname, {}).get(node) or UNKNOWN
+
+    def return_type(self, fname):
+        return self.returns.get(fname) or UNKNOWN
+
+    def is_observable(self, fname, var):
+        # False when every use of 'var' converts it to float anyway,
+        # so an int read into it can be parsed as float right away
+        return var in self.observable.get(fname, {var})
+
+    #===== Lattice updates =====#
+    def update_var(self, fname, var, type_):
+        env = self.vars[fname]
+        new = join(env.get(var), type_)
+        if new != env.get(var):
+            env[var] = new
+            self.changed = True
+
+    def update_return(self, fname, type_):
+        new = join(self.returns[fname], type_)
+        if new != self.returns[fname]:
+            self.returns[fname] = new
+            self.changed = True
+
+    #===== Statements =====#
+    def statement(self, fname, op):
+        # statements of nested branches are walked with an explicit stack
+        walk(op, self.enter_statement, context=fname)
+
+    def enter_statement(self, op, fname):
+        if named(op, "VARASGN"):
+            self.update_var(fname, op.VAR.value, self.expression(fname, op.value[1]))
+        elif named(op, "READ"):
+            self.update_var(fname, op.VAR.value, NUM)
+        elif named(op, "RETURN"):
+            self.update_return(fname, self.expression(fname, op.value[0]))
+        elif named(op, "WRITE"):
+            self.expression(fname, op.value[0])
+        elif named(op, "IF") or named(op, "WHILE"):
+            self.expression(fname, op.COND.value[0])
+            return [(sub, fname) for branch in op.value[1:] for sub in statements(branch)]
+        else:
+            self.expression(fname, op)
+        return []
+
+    #===== Expressions =====#
+    def expression(self, fname, node):
+        # types of subexpressions first, every one is kept in 'exprs'
+        self.fname = fname
+        return fold(node, self.leave)
+
+    def leave(self, node, types):
+        # 'types' are types of children
+        name = node.name
+        fname = self.fname
+        if name == "VAR":
+            type_ = self.vars[fname].get(node.value)
+        elif name == "INT":
+            type_ = INT
+        elif name in self.arith_ops:
+            t1, t2 = types
+            if name == "DIV":
+                type_ = arith(arith(t1, t2), FLOAT)
+            elif name == "POW":
+                type_ = self.pow_type(node, t1, t2)
+            else:
+                type_ = arith(t1, t2)
+        elif name in self.bool_ops:
+            type_ = BOOL
+        elif name == "FLOAT":
+            type_ = FLOAT
+        elif name == "NEG":
+            type_ = arith(types[0], INT)
+        elif name == "FCALL":
+            callee = node.value[0].value
+            if callee not in self.functions:
+                type_ = UNKNOWN
+            else:
+                for param, arg in zip(self.params[callee], types[1:]):
+                    self.update_var(callee, param, arg)
+                type_ = self.returns[callee]
+        elif name == "FNAME":
+            return None
+        else:
+            type_ = UNKNOWN
+        self.exprs[fname][node] = type_
+        return type_
+
+    def pow_type(self, node, t1, t2):
+        if t1 is None or t2 is None:
+            return None
+        if t1 not in NUMERIC or t2 not in NUMERIC:
+            return UNKNOWN
+        exponent = int_literal(node.value[1])
+        if exponent is not None:
+            return t1 if exponent >= 0 else FLOAT
+        base = node.value[0]
+        if (named(base, "INT") or named(base, "FLOAT")) and base.value >= 0:
+            # non-negative base never gives a complex result
+            return NUM if t1 == INT and t2 != FLOAT else FLOAT
+        if t1 == INT and t2 == INT:
+            return NUM
+        # negative float base with fractional exponent gives complex
+        return UNKNOWN
+
+    #===== Variable uses =====#
+    def uses(self, fname, node):
+        walk(node, self.enter_use, context=fname)
+
+    def enter_use(self, node, fname):
+        if not isinstance(node.value, tuple):
+            if node.name == "VAR":
+                self.observable[fname].add(node.value)
+            return []
+        if node.name in self.arith_ops:
+            # int operand meets a float one: python converts it to float
+            return [(child, fname) for child, sibling in zip(node.value, reversed(node.value))
+                    if not (named(child, "VAR") and self.expr_type(sibling, fname) == FLOAT)]
+        if node.name == "READ":
+            return []
+        if node.name == "VARASGN":
+            return [(node.value[1], fname)]
+        return None
@@ -0,0 +1,242 @@
+from LParser import Node
+from LWalk import walk, fold
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def named(obj_, name_):
+    return isinstance(obj_, Node) and obj_.name == name_
+
+def power(base, exp):
+    # python gives float for int ** negative int, numpy raises instead
+    base, exp = np.asarray(base), np.asarray(exp)
+    if base.dtype.kind in "iu" and exp.dtype.kind in "iu" and (exp < 0).any():
+        base = base.astype(np.float64)
+    return np.power(base, exp)
+
+
+##########################
+#####   VECTORIZER   #####
+##########################
+class LVectorizeError(Exception):
+    def __init__(self, *args: object):
+        super().__init__(*args)
+
+# markers walked between branches of 'if' and after them
+ELSE = Node("ELSE", None)
+END_IF = Node("END_IF", None)
+
+# Compiles pure arithmetic FDEF into a function over numpy arrays.
+# Body may contain only assignments, returns and if statements. Both
+# branches of every 'if' are evaluated for all elements and merged with
+# np.where. Unlike scalar code, division by zero gives inf/nan and
+# integer arithmetic is limited to int64.
+class LVectorizer:
+    indent = " "*4
+
+    def __init__(self) -> None:
+        self.lines = []
+        self.temps = 0
+        self.returns = []
+        self.env = {}
+        # hooks by node name
+        self.expressions = {name: getattr(self, name) for name in (
+            "VAR", "INT", "FLOAT", "ADD", "SUB", "MUL", "DIV", "POW", "NEG",
+            "AND", "OR", "NOT", "EQU", "NEQ", "LEQ", "LES", "GEQ", "GRT",
+        )}
+
+    def compile(self, fdef: Node):
+        if not named(fdef, "FDEF"):
+            raise LVectorizeError(f"Node[{fdef.name!r}] passed instead of FDEF")
+        name = fdef.FNAME.value
+        args = [arg.value for arg in fdef.FARGS.value or [] if named(arg, "FARG")]
+        self.lines = []
+        self.temps = 0
+        self.returns = []
+
+        env = {arg: self.emit(f"_lnp.asarray({arg})") for arg in args}
+        shape = f"_lnp.broadcast_shapes({', '.join(f'_lnp.shape({env[arg]})' for arg in args)})"
+        env, terminated = self.block(fdef.FBODY, env, None)
+        if not terminated:
+            raise LVectorizeError(f"Not every path of {name!r} returns a value")
+
+        result = self.returns[-1][1]
+        for mask, value in reversed(self.returns[:-1]):
+            result = self.emit(f"_lnp.where({mask}, {value}, {result})")
+
+        return [
+            f"def {name}({', '.join(args)}):",
+            self.indent+"with _lnp.errstate(all='ignore'):",
+            *[self.indent*2+line for line in self.lines],
+            self.indent*2+f"return _lnp.array(_lnp.broadcast_to({result}, {shape}))",
+            "",
+        ]
+
+    def emit(self, code):
+        name = f"_t{self.temps}"
+        self.temps += 1
+        self.lines.append(f"{name} = {code}")
+        return name
+
+    def mask(self, mask, cond):
+        if mask is None:
+            return cond
+        return self.emit(f"_lnp.logical_and({mask}, {cond})")
+
+    #===== Statements =====#
+    # Walked with an explicit stack: 'env' (variable -> temporary), 'mask'
+    # (path condition) and whether the current block returned are kept while
+    # statements are entered, markers after branches of 'if' merge them
+    def block(self, fbody, env, mask):
+        done = False
+        def enter(op, frame):
+            nonlocal env, mask, done
+            if op is ELSE:
+                frame["then"] = (env, done)
+                env, mask, done = dict(frame["env"]), frame["mask_else"], False
+                return []
+            if op is END_IF:
+                env, mask, done = self.merge(frame, env, done)
+                return []
+            if done or not isinstance(op, Node):
+                return []
+            if op.name == "FBODY" or op.name == "BRANCH":
+                return None
+            if named(op, "VARASGN"):
+                env[op.VAR.value] = self.emit(self.expression(op.value[1], env))
+            elif named(op, "RETURN"):
+                self.returns.append((mask, self.emit(self.expression(op.value[0], env))))
+                done = True
+            elif named(op, "IF"):
+                cond = self.emit(self.expression(op.COND.value[0], env))
+                ncond = self.emit(f"_lnp.logical_not({cond})")
+                frame = {"cond": cond, "env": env, "mask": mask,
+                         "mask_then": self.mask(mask, cond), "mask_else": self.mask(mask, ncond)}
+                env, mask = dict(env), frame["mask_then"]
+                return [(op.BRANCH0, None), (ELSE, frame), (op.BRANCH1, None), (END_IF, frame)]
+            elif op.name in ("READ", "WRITE", "WHILE"):
+                raise LVectorizeError(f"{op.name} can't be vectorized")
+            else:
+                # expression statement has no effect in pure code
+                self.expression(op, env)
+            return []
+        env = dict(env)
+        walk(fbody, enter)
+        return env, done
+
+    def merge(self, frame, env_else, else_ret):
+        # -> (env, mask, returned) after an 'if'
+        env_then, then_ret = frame["then"]
+        # returns recorded earlier take precedence when results are merged,
+        # so masks only need to cover the path condition
+        if then_ret and else_ret:
+            return frame["env"], frame["mask"], True
+        if then_ret:
+            return env_else, frame["mask_else"], False
+        if else_ret:
+            return env_then, frame["mask_then"], False
+
+        merged = {}
+        for var in env_then.keys() & env_else.keys():
+            if env_then[var] == env_else[var]:
+                merged[var] = env_then[var]
+            else:
+                merged[var] = self.emit(f"_lnp.where({frame['cond']}, {env_then[var]}, {env_else[var]})")
+        # variables assigned in only one branch stay undefined, as in scalar code
+        return merged, frame["mask"], False
+
+    #===== Expressions =====#
+    # folded bottom up, methods get codes of the operands
+    def expression(self, node, env):
+        self.env = env
+        return fold(node, self.leave, self.enter)
+
+    def enter(self, node):
+        # unsupported nodes fail before their operands
+        if node.name not in self.expressions:
+            raise LVectorizeError(f"{node.name} can't be vectorized")
+        return None
+
+    def leave(self, node, codes):
+        return self.expressions[node.name](node, codes)
+
+    def __bin_op(self, codes, op):
+        return f"({codes[0]} {op} {codes[1]})"
+
+    def __func(self, codes, func):
+        return f"{func}({', '.join(codes)})"
+
+    def VAR(self, node, codes):
+        if node.value not in self.env:
+            raise LVectorizeError(f"Variable {node.value!r} may be used before assignment")
+        return self.env[node.value]
+
+    def INT(self, node, codes):
+        return repr(node.value)
+
+    def FLOAT(self, node, codes):
+        return repr(node.value)
+
+    def ADD(self, node, codes):
+        return self.__bin_op(codes, "+")
+
+    def SUB(self, node, codes):
+        return self.__bin_op(codes, "-")
+
+    def MUL(self, node, codes):
+        return self.__bin_op(codes, "*")
+
+    def DIV(self, node, codes):
+        return self.__func(codes, "_lnp.true_divide")
+
+    def POW(self, node, codes):
+        return self.__func(codes, "_lpower")
+
+    def NEG(self, node, codes):
+        return self.__func(codes, "_lnp.negative")
+
+    def AND(self, node, codes):
+        return self.__func(codes, "_lnp.logical_and")
+
+    def OR(self, node, codes):
+        return self.__func(codes, "_lnp.logical_or")
+
+    def NOT(self, node, codes):
+        return self.__func(codes, "_lnp.logical_not")
+
+    def EQU(self, node, codes):
+        return self.__bin_op(codes, "==")
+
+    def NEQ(self, node, codes):
+        return self.__bin_op(codes, "!=")
+
+    def LEQ(self, node, codes):
+        return self.__bin_op(codes, "<=")
+
+    def LES(self, node, codes):
+        return self.__bin_op(codes, "<")
+
+    def GEQ(self, node, codes):
+        return self.__bin_op(codes, ">=")
+
+    def GRT(self, node, codes):
+        return self.__bin_op(codes, ">")
+
+
+def vectorize(fdef: Node):
+    if np is None:
+        raise LVectorizeError("'numpy' not found. Try 'pip install numpy'")
+    lines = LVectorizer().compile(fdef)
+    source = "\n".join(lines)
+    # aliased, L functions and parameters of the same names would replace them
+    namespace = {"_lnp": np, "_lpower": power}
+    exec(compile(source, f"<vectorized {fdef.FNAME.value}>", "exec"), namespace)
+    func = namespace[fdef.FNAME.value]
+    func.source = source
+    return func
@@ -0,0 +1,104 @@
+# Iterative walks over trees, shared by tree consumers ('Node.__str__',
+# renderers of LParser, LTranslator, LTypes). Explicit stacks instead of
+# recursion: depth of a tree is limited by memory only and no python frame
+# is paid per node.
+#
+#   walk(root, enter, leave=None, context=None)
+#       depth first. 'enter(node, context)' runs before children of a node,
+#       'leave(node, context)' after them. 'enter' returns None to walk all
+#       children with the same context, or a list of (child, context) pairs
+#       to walk instead ([] skips the subtree). Pairs may hold marker objects
+#       which are not nodes, they are passed to 'enter' as they are.
+#   fold(root, leave, enter=None) -> value of root
+#       post order. 'leave(node, values)' gets values of children in order
+#       and returns value of the node. 'enter(node)' returning anything but
+#       None gives value of the whole subtree, which is not walked then.
+#   transform(root, leave=rebuild) -> tree
+#       fold into a new tree, 'leave(node, children)' returns a node built
+#       from transformed children, unchanged subtrees stay shared.
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def children(node):
+    # child nodes in order, empty slots (None) are skipped
+    value = node.value
+    if type(value) is not tuple:
+        return ()
+    return [child for child in value if child is not None] if None in value else value
+
+def rebuild(node, new_children):
+    # 'node' itself when no child changed, else a copy with the new children
+    old = children(node)
+    if len(old) == len(new_children) and all(a is b for a, b in zip(old, new_children)):
+        return node
+    from LParser import Node
+    return Node(node.name, tuple(new_children), node.lineno, node.index)
+
+
+##########################
+#####     WALKS      #####
+##########################
+LEAVE = object()
+
+def walk(root, enter, leave=None, context=None):
+    # stack holds (node, context) pairs to enter, a node waiting for
+    # 'leave' is pushed as (LEAVE, (node, context))
+    stack = [(root, context)]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node, context = pop()
+        if node is LEAVE:
+            leave(*context)
+            continue
+        pairs = enter(node, context)
+        if leave is not None:
+            push((LEAVE, (node, context)))
+        if pairs is None:
+            stack.extend([(child, context) for child in reversed(children(node))])
+        elif pairs:
+            stack.extend(reversed(pairs))
+
+def fold(root, leave, enter=None):
+    # Stack holds nodes to enter, a node waiting for 'leave' is pushed with
+    # the number of its children on top. Values of finished subtrees wait on
+    # 'values' for their parent. Leaves (most of the nodes) and nodes with one
+    # or two children take shortcuts, no marker or slice is allocated for them
+    values = []
+    stack = [root]
+    pop, push, extend = stack.pop, stack.append, stack.extend
+    append, pop_value = values.append, values.pop
+    while stack:
+        item = pop()
+        if type(item) is int:
+            node = pop()
+            if item == 2:
+                last = pop_value()
+                values[-1] = leave(node, (values[-1], last))
+            elif item == 1:
+                values[-1] = leave(node, (values[-1],))
+            else:
+                node_values = values[-item:]
+                del values[-item:]
+                append(leave(node, node_values))
+            continue
+        if enter is not None:
+            value = enter(item)
+            if value is not None:
+                append(value)
+                continue
+        value = item.value
+        if type(value) is tuple:
+            if None in value:
+                value = [child for child in value if child is not None]
+            if value:
+                push(item)
+                push(len(value))
+                extend(reversed(value))
+                continue
+        append(leave(item, ()))
+    return values[0]
+
+def transform(root, leave=rebuild):
+    return fold(root, leave)
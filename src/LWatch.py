@@ -0,0 +1,253 @@
+import sys, getopt, os, time, json, hashlib
+
+from LLang import compile_text, LError, LSyntaxError
+from LTranslator import atomic_file, copy_runtime
+
+# Watch mode: a source tree is polled for changed '.l' files, only changed
+# files are translated again. The process stays alive, so parser tables and
+# imported modules are built once for the whole session.
+#
+# A file is a candidate when its mtime or size changes, it is translated
+# once it stays unchanged for 'debounce' seconds (editors save in bursts)
+# and only if content hash differs from the last translated one. Output is
+# written into a temporary file and moved over the old one, so readers never
+# see a half-written file. Latency is measured from the last save (mtime).
+# Errors are logged per file: a broken source is not translated again until
+# edited, one that failed to be read or written is retried on its next change.
+
+
+##########################
+##### UTIL FUNCTIONS #####
+##########################
+def write_atomic(path, data: str):
+    with atomic_file(path) as fp:
+        fp.write(data)
+
+def digest(data: bytes):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+##########################
+#####    WATCHER     #####
+##########################
+class LWatcher:
+    def __init__(self, source_dir, output_dir=None, interval=0.2, debounce=0.3,
+                 runtime=False, source_map=False, log=print) -> None:
+        self.source_dir = source_dir
+        self.output_dir = output_dir or source_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.runtime = runtime
+        self.source_map = source_map
+        self.log = log
+        self.seen = {}          # path -> (mtime_ns, size) of the last scan
+        self.hashes = {}        # path -> content hash of the last translation
+        self.broken = {}        # path -> content hash of the last source failing to translate
+        self.pending = {}       # path -> time when a change was noticed last
+
+    def sources(self):
+        for root, dirs, files in os.walk(self.source_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if name.endswith(".l"):
+                    yield os.path.join(root, name)
+
+    def output_path(self, path):
+        relative = os.path.relpath(path, self.source_dir)
+        return os.path.join(self.output_dir, os.path.splitext(relative)[0] + ".py")
+
+    def scan(self, now):
+        # stat() only, content is read when a file is due
+        current = {}
+        for path in self.sources():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            current[path] = (stat.st_mtime_ns, stat.st_size)
+            if self.seen.get(path) != current[path]:
+                self.pending[path] = now
+        for path in self.seen.keys() - current.keys():
+            self.pending.pop(path, None)
+            self.hashes.pop(path, None)
+            self.broken.pop(path, None)
+            self.log(f"{path}: removed")
+        self.seen = current
+
+    def start(self):
+        # files with up to date output are not translated on start
+        self.scan(time.monotonic())
+        for path in list(self.pending):
+            output = self.output_path(path)
+            if os.path.exists(output) and os.stat(output).st_mtime_ns >= self.seen[path][0]:
+                del self.pending[path]
+        return self.poll(force=True)
+
+    def poll(self, force=False):
+        # -> list of translated paths
+        now = time.monotonic()
+        self.scan(now)
+        due = [path for path, changed in self.pending.items() if force or now - changed >= self.debounce]
+        translated = []
+        for path in due:
+            del self.pending[path]
+            if self.translate(path):
+                translated.append(path)
+        return translated
+
+    def translate(self, path):
+        start = time.perf_counter()
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+        except IOError as error:
+            self.log(f"{path}: {error}")
+            return False
+        content_hash = digest(data)
+        if content_hash == self.hashes.get(path):
+            # back to the translated source, its output is still there
+            self.broken.pop(path, None)
+            return False
+        if content_hash == self.broken.get(path):
+            return False
+
+        try:
+            result = compile_text(data.decode("utf-8"), runtime=self.runtime, source_map=self.source_map)
+        except (LError, UnicodeDecodeError) as error:
+            # same source fails the same way, it is not parsed again until edited
+            self.broken[path] = content_hash
+            for message in error.errors if isinstance(error, LSyntaxError) else [error]:
+                self.log(f"{path}: {message}")
+            return False
+        lines = result.lines
+
+        output = self.output_path(path)
+        try:
+            write_atomic(output, "".join(line + "\n" for line in lines))
+            if self.source_map:
+                write_atomic(f"{output}.map", json.dumps(result.source_map(path, output), separators=(",", ":")))
+            if self.runtime:
+                copy_runtime(os.path.dirname(os.path.abspath(output)))
+        except OSError as error:
+            self.log(f"{path}: {error}")
+            return False
+        self.hashes[path] = content_hash
+        self.broken.pop(path, None)
+        for warn in result.warns:
+            self.log(f"{path}: WARNING::{warn}")
+
+        elapsed = time.perf_counter() - start
+        latency = time.time() - self.seen.get(path, (time.time_ns(), 0))[0] / 1e9
+        self.log(f"{path} -> {output} in {elapsed:.3f}s, {latency:.3f}s after save")
+        return True
+
+    def run(self):
+        self.start()
+        self.log(f"Watching {self.source_dir!r}, Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+
+
+##########################
+#### ARGUMENTS PARSER ####
+##########################
+def parse_cliargs(shortopts:str="", longopts:list[str]=[]):
+    argv = sys.argv[1:]
+    options = []
+    arguments = []
+
+    while(True):
+        opts, argv = getopt.getopt(argv, shortopts, longopts)
+        options.extend(opts)
+        if not argv: break
+        arguments.append(argv.pop(0))
+
+    return options, arguments
+
+
+def make_options(opts, args):
+    options = {
+        'sourcedir': None,
+        'outputdir': None,
+        'interval': 0.2,
+        'debounce': 0.3,
+        'runtime': False,
+        'sourcemap': False,
+        'once': False,
+    }
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print_help()
+            exit(0)
+        elif opt in ["-o", "--output"]:
+            if arg == "":
+                print("Output directory can't be empty")
+                exit(1)
+            options['outputdir'] = arg
+        elif opt in ["-i", "--interval", "-d", "--debounce"]:
+            try:
+                seconds = float(arg)
+            except ValueError:
+                seconds = -1
+            if seconds < 0:
+                print(f"{opt} must be a non-negative number of seconds, got {arg!r}")
+                exit(1)
+            options['interval' if opt in ["-i", "--interval"] else 'debounce'] = seconds
+        elif opt in ["-r", "--runtime"]:
+            options['runtime'] = True
+        elif opt in ["-m", "--source-map"]:
+            options['sourcemap'] = True
+        elif opt == "--once":
+            options['once'] = True
+    if not args:
+        print("Source directory not specified. Use 'LWatch.py -h' for help")
+        exit(1)
+    if not os.path.isdir(args[0]):
+        print(f"{args[0]!r} is not a directory")
+        exit(1)
+    options['sourcedir'] = args[0]
+    return options
+
+def print_help():
+    print("NAME:")
+    print("\tLWatch - translate changed L files of a directory into python")
+
+    print("SYNOPSIS:")
+    print("\tLWatch [options]... source_dir")
+
+    print("DESCRIPTION:")
+    print("\tPoll source_dir for '.l' files and translate the changed ones.\n")
+    print("\tOptions:")
+    print("\t  -h,    --help\t\t\tDisplay info about program.")
+    print("\t  -o[=], --output[=]\t\tOutput directory. Next to sources if not specified.")
+    print("\t  -i[=], --interval[=]\t\tSeconds between polls, 0.2 by default.")
+    print("\t  -d[=], --debounce[=]\t\tSeconds a file must stay unchanged to be translated, 0.3 by default.")
+    print("\t  -r,    --runtime\t\tUse buffered I/O of 'LRuntime' module in translated code.")
+    print("\t  -m,    --source-map\t\tWrite source maps next to translated files.")
+    print("\t         --once\t\t\tTranslate files with outdated output and exit.")
+
+    print("\tArguments:")
+    print("\t  source_dir\t\t\tRequired. Directory with L lang sources, searched recursively.\n")
+
+
+if __name__ == "__main__":
+    try:
+        opts, args = parse_cliargs("ho:i:d:rm", ["help", "output=", "interval=", "debounce=", "runtime", "source-map", "once"])
+    except getopt.GetoptError as e:
+        print(e)
+        print("use 'LWatch -h' for help")
+        exit(2)
+
+    options = make_options(opts, args)
+    watcher = LWatcher(
+        options['sourcedir'], options['outputdir'], options['interval'], options['debounce'],
+        options['runtime'], options['sourcemap'],
+    )
+    if options['once']:
+        watcher.start()
+    else:
+        watcher.run()
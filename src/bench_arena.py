@@ -0,0 +1,52 @@
+import sys, getopt, gc, time, tracemalloc
+
+from LLexer import LLexer
+from LParser import LParser, dump_ast
+from LArena import LArena
+from LTranslator import LTranslator
+from LStats import count_nodes, human_bytes
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Memory held by a tree of 'Node' objects and by an 'LArena' of the same
+# program, and time to translate both. Outputs are checked to be the same.
+# Usage: python bench_arena.py [-s 100KB,1MB,10MB]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def parse(text, tokens, arena):
+    # -> tree, parse time, memory retained by the tree
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    ast, elapsed = timed(LParser(text, arena=arena).parse, iter(tokens))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return ast, elapsed, retained
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:", ["sizes="])
+    sizes = "100KB,1MB"
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+
+    print(f"{'size':>6}{'nodes':>10}{'Node mem':>11}{'arena mem':>11}{'saved':>7}"
+          f"{'parse, s':>10}{'arena, s':>10}{'transl, s':>11}{'arena, s':>10}  same")
+    for size in sizes.split(","):
+        text = generate(parse_size(size))
+        tokens = list(LLexer().tokenize(text))
+        tree, tree_parse, tree_memory = parse(text, tokens, None)
+        view, arena_parse, arena_memory = parse(text, tokens, LArena())
+        tree_lines, tree_translate = timed(LTranslator().translate, tree)
+        view_lines, view_translate = timed(LTranslator().translate, view)
+        same = tree_lines == view_lines and dump_ast(tree) == dump_ast(view)
+        print(f"{size:>6}{count_nodes(tree):>10,}{human_bytes(tree_memory):>11}{human_bytes(arena_memory):>11}"
+              f"{1 - arena_memory/tree_memory:>7.0%}{tree_parse:>10.3f}{arena_parse:>10.3f}"
+              f"{tree_translate:>11.3f}{view_translate:>10.3f}  {same}")
+        del tree, view, tree_lines, view_lines
@@ -0,0 +1,54 @@
+import sys, getopt, asyncio, time
+
+from LCompiler import LCompiler, CompileContext, compile_context
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Throughput of 'LCompiler.compile' with thread and process executors and
+# responsiveness of the event loop meanwhile: a ticker coroutine sleeps 1ms
+# in a loop and the worst delay of its wakeups is reported. Outputs are
+# checked against serial compilation.
+# Usage: python bench_compiler.py [-s 100KB] [-n 16] [-j workers]
+
+async def ticker(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.001)
+        lags.append(loop.time() - start - 0.001)
+
+async def run(sources, executor, workers):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    async with LCompiler(executor, workers) as compiler:
+        results = await asyncio.gather(*(compiler.compile(source) for source in sources))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return results, elapsed, max(lags, default=0.0)
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:n:j:", ["size=", "requests=", "jobs="])
+    size, requests, workers = "100KB", 16, None
+    for opt, arg in opts:
+        if opt in ["-s", "--size"]:
+            size = arg
+        elif opt in ["-n", "--requests"]:
+            requests = int(arg)
+        elif opt in ["-j", "--jobs"]:
+            workers = int(arg)
+
+    sources = [generate(parse_size(size), seed=seed) for seed in range(requests)]
+    start = time.perf_counter()
+    expected = [compile_context(CompileContext(source)).lines for source in sources]
+    serial = time.perf_counter() - start
+
+    print(f"{requests} x {size} requests")
+    print(f"{'executor':>10}{'time, s':>10}{'req/s':>9}{'max lag, ms':>13}  same")
+    print(f"{'serial':>10}{serial:>10.3f}{requests/serial:>9.1f}{'-':>13}  True")
+    for executor in ("thread", "process"):
+        results, elapsed, lag = asyncio.run(run(sources, executor, workers))
+        same = [result.lines for result in results] == expected
+        print(f"{executor:>10}{elapsed:>10.3f}{requests/elapsed:>9.1f}{lag*1000:>13.1f}  {same}")
@@ -0,0 +1,112 @@
+import sys, getopt, os, gc, json, statistics, platform
+
+from LGenerator import parse_size
+from bench_pipeline import generate, run_stages
+
+# Performance regression gate. Runs lexer/parser/translator benchmarks
+# several times and compares median throughput and peak memory with the
+# committed baseline. Exits with 1 when any stage regressed more than allowed:
+# the throughput threshold widened by the spreads of the baseline and of the
+# current runs, a stage as noisy as its margin is not failed by noise.
+#
+# Usage: python bench_gate.py [-b baseline.json] [-r repeats] [-t threshold]
+#                             [-m memory_threshold] [-s 10KB,100KB] [--update]
+#
+# Baseline numbers depend on the machine, regenerate them with '--update'
+# on the box the gate runs on.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+def collect(sizes, repeats):
+    results = {}
+    for size in sizes:
+        text = generate(parse_size(size))
+        runs = []
+        for _ in range(repeats):
+            gc.collect()
+            runs.append(run_stages(text, trace_memory=False))
+        gc.collect()
+        memory = run_stages(text, trace_memory=True)
+        for index, stage in enumerate(runs[0]):
+            throughputs = [run[index]["items"] / run[index]["wall_time"] for run in runs]
+            median = statistics.median(throughputs)
+            results[f"{size}:{stage['stage']}"] = {
+                "throughput": median,
+                # median absolute deviation, relative to median
+                "spread": statistics.median(abs(value - median) for value in throughputs) / median,
+                "peak_memory": memory[index]["peak_memory"],
+            }
+    return results
+
+def compare(results, baseline, threshold, memory_threshold):
+    report, failed = [], False
+    report.append(f"{'stage':<18}{'baseline':>14}{'current':>14}{'change':>9}{'spread':>8}{'allowed':>9}"
+                  f"{'base mem':>12}{'cur mem':>12}{'change':>9}  status")
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            report.append(f"{key:<18}{'-':>14}{current['throughput']:>14,.0f}{'':>9}{current['spread']:>8.1%}{'':>9}"
+                          f"{'-':>12}{current['peak_memory']:>12,}{'':>9}  NEW")
+            continue
+        speed = current["throughput"] / base["throughput"] - 1
+        memory = current["peak_memory"] / base["peak_memory"] - 1
+        allowed = threshold + base["spread"] + current["spread"]
+        problems = []
+        if speed < -allowed:
+            problems.append("SLOWER")
+        if memory > memory_threshold:
+            problems.append("MEMORY")
+        failed = failed or bool(problems)
+        report.append(f"{key:<18}{base['throughput']:>14,.0f}{current['throughput']:>14,.0f}{speed:>+9.1%}"
+                      f"{current['spread']:>8.1%}{-allowed:>+9.1%}{base['peak_memory']:>12,}{current['peak_memory']:>12,}"
+                      f"{memory:>+9.1%}  {' '.join(problems) or 'OK'}")
+    return "\n".join(report), failed
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "b:r:t:m:s:", [
+        "baseline=", "repeats=", "threshold=", "memory-threshold=", "sizes=", "update"
+    ])
+    baseline_path, repeats, threshold, memory_threshold = DEFAULT_BASELINE, 5, 0.1, 0.1
+    sizes, update = ["10KB", "100KB"], False
+    for opt, arg in opts:
+        if opt in ["-b", "--baseline"]:
+            baseline_path = arg
+        elif opt in ["-r", "--repeats"]:
+            repeats = int(arg)
+        elif opt in ["-t", "--threshold"]:
+            threshold = float(arg)
+        elif opt in ["-m", "--memory-threshold"]:
+            memory_threshold = float(arg)
+        elif opt in ["-s", "--sizes"]:
+            sizes = arg.split(",")
+        elif opt == "--update":
+            update = True
+
+    results = collect(sizes, repeats)
+
+    if update:
+        with open(baseline_path, "w") as fp:
+            json.dump({
+                "machine": platform.platform(),
+                "python": platform.python_version(),
+                "repeats": repeats,
+                "stages": results,
+            }, fp, indent=2)
+        print(f"Baseline written into {os.path.abspath(baseline_path)}")
+        exit(0)
+
+    try:
+        with open(baseline_path) as fp:
+            baseline = json.load(fp)
+    except IOError as error:
+        print(error)
+        print("Create baseline with '--update'")
+        exit(2)
+
+    report, failed = compare(results, baseline["stages"], threshold, memory_threshold)
+    print(report)
+    if failed:
+        print(f"\nPerformance regressed: throughput threshold {threshold:.0%} + spread, memory threshold {memory_threshold:.0%}")
+        exit(1)
+    print("\nNo regressions")
@@ -0,0 +1,58 @@
+import sys, getopt, gc, time, tracemalloc
+
+from LLexer import LLexer
+from LParser import LParser, dump_ast
+from LTranslator import LTranslator
+from LStats import count_nodes, human_bytes
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Memory held by the tree of plain and hash-consing parsers.
+# Usage: python bench_hashcons.py [-s 10KB,100KB,1MB]
+
+def unique_nodes(ast):
+    seen = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if node is None or id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node.value, tuple):
+            stack.extend(node.value)
+    return len(seen)
+
+def parse(text, tokens, hash_cons):
+    # -> tree, parse time, memory retained by the tree
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    ast = LParser(text, hash_cons=hash_cons).parse(iter(tokens))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return ast, elapsed, retained
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:", ["sizes="])
+    sizes = "10KB,100KB,1MB"
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+
+    print(f"{'size':>6}{'nodes':>10}{'shared':>10}{'plain mem':>12}{'shared mem':>12}{'saved':>8}"
+          f"{'plain, s':>10}{'shared, s':>11}  same")
+    for size in sizes.split(","):
+        text = generate(parse_size(size))
+        tokens = list(LLexer().tokenize(text))
+        plain, plain_time, plain_memory = parse(text, tokens, False)
+        shared, shared_time, shared_memory = parse(text, tokens, True)
+        same = (dump_ast(plain) == dump_ast(shared)
+                and LTranslator().translate(plain) == LTranslator().translate(shared))
+        print(f"{size:>6}{count_nodes(plain):>10,}{unique_nodes(shared):>10,}"
+              f"{human_bytes(plain_memory):>12}{human_bytes(shared_memory):>12}{1 - shared_memory/plain_memory:>8.0%}"
+              f"{plain_time:>10.3f}{shared_time:>11.3f}  {same}")
+        del plain, shared
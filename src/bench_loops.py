@@ -0,0 +1,93 @@
+import sys, getopt, os, subprocess, tempfile, time
+
+from LLexer import LLexer
+from LParser import LParser
+from LTranslator import LTranslator
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Run time of translated loop-heavy programs with counted loops emitted as
+# 'for' over range against the same programs with every loop kept a 'while'.
+# Kernels are nested counted loops (up, down, stepped, with calls in the
+# body) over 'n' iterations, generated programs have many short loops.
+# Outputs of both translations must be the same.
+# Usage: python bench_loops.py [-n 1000,3000] [-s 100KB] [-r 3]
+
+KERNELS = {
+    "nested": """
+        function main() {
+            n = {n}; s = 0; i = 0;
+            while (i < n) { j = 0; while (j < n) { s = s + i * j; j = j + 1; } i = i + 1; }
+            write(s);
+        }""",
+    "down": """
+        function main() {
+            n = {n}; s = 0; i = n;
+            while (i > 0) { j = n; while (j >= i) { s = s + j - i; j = j - 1; } i = i - 1; }
+            write(s); write(i);
+        }""",
+    "stepped": """
+        function main() {
+            n = {n}; s = 0.0; i = 0;
+            while (i <= n) { j = 1; while (n * 2 > j) { s = s + j / 2; j = j + 3; } i = i + 2; }
+            write(s); write(i);
+        }""",
+    "calls": """
+        function f(a, b) { return a * b - b; }
+        function main() {
+            n = {n}; s = 0; i = 0;
+            while (i < n) { j = 0; while (j < n) { s = s + f(i, j); j = j + 1; } i = i + 1; }
+            write(s);
+        }""",
+}
+
+
+class WhileTranslator(LTranslator):
+    # every loop stays a 'while'
+    def counted_loops(self, fbody):
+        return {}
+
+def translate(translator, text, path):
+    ast = LParser(text).parse(LLexer().tokenize(text))
+    with open(path, "w") as fp:
+        fp.write("\n".join(translator.translate(ast)))
+    return path
+
+def run(path, repeat):
+    # -> (stdout, best time)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, path], input=b"1\n" * 100, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return result.stdout, min(times)
+
+def compare(name, text, workdir, repeat):
+    loops = translate(WhileTranslator(), text, os.path.join(workdir, "while.py"))
+    counted = translate(LTranslator(), text, os.path.join(workdir, "for.py"))
+    with open(counted) as fp:
+        ranges = fp.read().count(" in _lrange(")
+    loops_out, loops_time = run(loops, repeat)
+    counted_out, counted_time = run(counted, repeat)
+    print(f"{name:>16} {ranges:>8} {loops_time:>10.3f}s {counted_time:>10.3f}s "
+          f"{loops_time / counted_time:>8.2f}x   {loops_out == counted_out}")
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "n:s:r:", ["iterations=", "sizes=", "repeat="])
+    iterations, sizes, repeat = [1000, 3000], ["100KB"], 3
+    for opt, arg in opts:
+        if opt in ["-n", "--iterations"]:
+            iterations = [int(n) for n in arg.split(",")]
+        elif opt in ["-s", "--sizes"]:
+            sizes = arg.split(",")
+        elif opt in ["-r", "--repeat"]:
+            repeat = int(arg)
+
+    print(f"{'program':>16} {'ranges':>8} {'while':>11} {'for':>11} {'speedup':>9}   same output")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in iterations:
+            for name, kernel in KERNELS.items():
+                compare(f"{name} n={n}", kernel.replace("{n}", str(n)), workdir, repeat)
+        for size in sizes:
+            compare(f"generated {size}", generate(parse_size(size), nesting=3), workdir, repeat)
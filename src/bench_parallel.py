@@ -0,0 +1,39 @@
+import sys, getopt, os, time
+
+from LLexer import LLexer
+from LParser import LParser, dump_ast
+from LParallel import LParallelParser
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Scaling of the parallel front end from 1 to N processes against the
+# serial parser. Both include lexing. Trees are checked to be the same.
+# Usage: python bench_parallel.py [-s 1MB] [-j max_jobs] [-t]
+#   -t  translate in workers too (without type inference)
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:j:t", ["size=", "jobs=", "translate"])
+    size, max_jobs, translate = "1MB", os.cpu_count() or 1, False
+    for opt, arg in opts:
+        if opt in ["-s", "--size"]:
+            size = arg
+        elif opt in ["-j", "--jobs"]:
+            max_jobs = int(arg)
+        elif opt in ["-t", "--translate"]:
+            translate = True
+
+    text = generate(parse_size(size))
+    ast, serial_time = timed(lambda: LParser(text).parse(LLexer().tokenize(text)))
+    expected = dump_ast(ast, "txt")
+    print(f"{size} source, {len(ast.value)} functions, {os.cpu_count()} CPUs")
+    print(f"{'jobs':>6}{'time, s':>10}{'speedup':>9}  same")
+    print(f"{'serial':>6}{serial_time:>10.3f}{1:>8.2f}x  True")
+    for jobs in range(1, max_jobs + 1):
+        result, elapsed = timed(LParallelParser(jobs).parse, text, translate=translate)
+        print(f"{jobs:>6}{elapsed:>10.3f}{serial_time/elapsed:>8.2f}x  {dump_ast(result, 'txt') == expected}")
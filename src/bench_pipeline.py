@@ -0,0 +1,92 @@
+import sys, getopt, json, gc
+
+from LLexer import LLexer
+from LParser import LParser
+from LTranslator import LTranslator
+from LGenerator import LGenerator, parse_size
+from LStats import LStats, count_nodes, human_bytes
+
+# Throughput and peak memory of lexer, parser and translator on generated
+# programs of growing size.
+# Usage: python bench_pipeline.py [-s 1KB,10KB,100KB,1MB] [-o results.json] [--no-memory]
+#                                 [--functions= --statements= --depth= --fanout= --nesting=]
+
+DEFAULT_SIZES = "1KB,10KB,100KB,1MB"
+ALL_SIZES = "1KB,10KB,100KB,1MB,10MB,100MB"
+
+def generate(size, seed=0, **shape):
+    return "".join(LGenerator(seed=seed, **shape).chunks(size))
+
+def run_stages(text, trace_memory):
+    stats = LStats(trace_memory=trace_memory)
+    with stats.stage("lex") as record:
+        tokens = list(LLexer().tokenize(text))
+        record["items"] = len(tokens)
+    with stats.stage("parse") as record:
+        ast = LParser(text).parse(iter(tokens))
+    # counted out of the stage, its time is parsing only
+    record["items"] = count_nodes(ast)
+    del tokens
+    with stats.stage("translate") as record:
+        record["items"] = len(LTranslator().translate(ast))
+    stats.stop()
+    return stats.stages
+
+def measure(text, memory=True):
+    gc.collect()
+    stages = run_stages(text, trace_memory=False)
+    if memory:
+        # tracemalloc slows everything down, so memory is measured in a separate run
+        gc.collect()
+        for stage, traced in zip(stages, run_stages(text, trace_memory=True)):
+            stage["peak_memory"] = traced["peak_memory"]
+    return {
+        stage["stage"]: {
+            "items": stage["items"],
+            "wall_time": stage["wall_time"],
+            "cpu_time": stage["cpu_time"],
+            "throughput": stage["items"] / stage["wall_time"],
+            "peak_memory": stage.get("peak_memory"),
+        } for stage in stages
+    }
+
+def print_results(results, file=sys.stdout):
+    units = {"lex": "tokens/s", "parse": "nodes/s", "translate": "lines/s"}
+    print(f"{'size':>8}  {'stage':<10}{'items':>12}{'time, s':>10}{'throughput':>16}  {'':<9}{'peak mem':>10}", file=file)
+    for result in results:
+        for stage, data in result["stages"].items():
+            peak = human_bytes(data["peak_memory"]) if data["peak_memory"] is not None else "-"
+            print(f"{result['size']:>8}  {stage:<10}{data['items']:>12,}{data['wall_time']:>10.3f}"
+                  f"{data['throughput']:>16,.0f}  {units[stage]:<9}{peak:>10}", file=file)
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:o:", [
+        "sizes=", "output=", "no-memory", "all",
+        "seed=", "functions=", "statements=", "depth=", "fanout=", "nesting=",
+    ])
+    sizes, output, memory, shape = DEFAULT_SIZES, None, True, {}
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+        elif opt == "--all":
+            sizes = ALL_SIZES
+        elif opt in ["-o", "--output"]:
+            output = arg
+        elif opt == "--no-memory":
+            memory = False
+        elif opt == "--depth":
+            shape["expr_depth"] = int(arg)
+        else:
+            shape[opt[2:]] = int(arg)
+
+    results = []
+    for size in sizes.split(","):
+        text = generate(parse_size(size), **shape)
+        results.append({"size": size, "bytes": len(text), "stages": measure(text, memory)})
+        print_results(results[-1:])
+        del text
+
+    if output:
+        with open(output, "w") as fp:
+            json.dump({"shape": shape, "results": results}, fp, indent=2)
@@ -0,0 +1,37 @@
+import sys, getopt, time
+
+from LLexer import LLexer
+from LParser import LParser
+from LPratt import LPrattParser
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Parse time of the LALR parser (sly) and the hand-written Pratt one on the
+# same tokens of generated programs, best of 'repeat' runs.
+# Usage: python bench_pratt.py [-s 10KB,100KB,1MB] [-r 3]
+
+def best(parser_class, text, tokens, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser_class(text).parse(iter(tokens))
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:r:", ["sizes=", "repeat="])
+    sizes, repeat = "10KB,100KB,1MB", 3
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+        elif opt in ["-r", "--repeat"]:
+            repeat = int(arg)
+
+    print(f"{'size':>6}{'tokens':>10}{'lalr, s':>10}{'pratt, s':>10}{'speedup':>9}")
+    for size in sizes.split(","):
+        text = generate(parse_size(size))
+        tokens = list(LLexer().tokenize(text))
+        lalr = best(LParser, text, tokens, repeat)
+        pratt = best(LPrattParser, text, tokens, repeat)
+        print(f"{size:>6}{len(tokens):>10}{lalr:>10.3f}{pratt:>10.3f}{lalr / pratt:>8.1f}x")
@@ -0,0 +1,58 @@
+import sys, getopt, time, tracemalloc
+
+from LLexer import LLexer
+from LParser import LParser, iterable, dump_ast
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+from anytree import Node as TreeNode, RenderTree
+from anytree.exporter import JsonExporter
+
+# Native AST rendering against the anytree copy + RenderTree/JsonExporter path.
+# Usage: python bench_render.py [-s 10KB,100KB,1MB]
+
+def build_tree(node, parent=None):
+    if iterable(node.value):
+        tree_node = TreeNode(node.name, parent=parent)
+        for child in node.value:
+            build_tree(child, tree_node)
+        return tree_node
+    else:
+        return TreeNode(f"{node.name}[{node.value}]", parent=parent)
+
+def anytree_dump(ast, format):
+    tree = build_tree(ast)
+    if format == "txt":
+        output = ""
+        for pre, _, node in RenderTree(tree):
+            output += f"{pre}{node.name}\n"
+        return output
+    return JsonExporter(indent=2, sort_keys=False).export(tree)
+
+def measure(func, *args):
+    start = time.perf_counter()
+    output = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return output, elapsed, peak
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:", ["sizes="])
+    sizes = "10KB,100KB,1MB"
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+
+    for size in sizes.split(","):
+        text = generate(parse_size(size))
+        ast = LParser(text).parse(LLexer().tokenize(text))
+        for format in ("txt", "json"):
+            old, old_time, old_peak = measure(anytree_dump, ast, format)
+            new, new_time, new_peak = measure(dump_ast, ast, format)
+            print(f"{size:>6} {format:<5} anytree {old_time:8.3f}s {old_peak/2**20:8.1f}MiB   "
+                  f"native {new_time:8.3f}s {new_peak/2**20:8.1f}MiB   "
+                  f"x{old_time/new_time:.1f}  same: {old == new}")
@@ -0,0 +1,55 @@
+import sys, getopt, os, shutil, subprocess, tempfile, time
+
+from LLexer import LLexer
+from LParser import LParser
+from LTranslator import LTranslator
+
+# Throughput of translated I/O: print()/input() against LRuntime buffered I/O.
+# Usage: python bench_runtime.py [-s 5,6]
+
+SOURCE = """
+function main() {
+    n = read();
+    i = 0;
+    while (i < n) {
+        v = read();
+        write(v * 2);
+        i = i + 1;
+    }
+    return 0;
+}
+"""
+
+def translate(runtime, path):
+    ast = LParser(SOURCE).parse(LLexer().tokenize(SOURCE))
+    with open(path, "w") as fp:
+        fp.write("\n".join(LTranslator(runtime=runtime).translate(ast)))
+
+def run(path, data):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, path], input=data, capture_output=True, check=True)
+    return result.stdout, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:", ["sizes="])
+    sizes = [5, 6]
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = [int(power) for power in arg.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, buffered = os.path.join(tmp, "plain.py"), os.path.join(tmp, "buffered.py")
+        translate(False, plain)
+        translate(True, buffered)
+        shutil.copyfile(os.path.join(os.path.dirname(os.path.abspath(__file__)), "LRuntime.py"), os.path.join(tmp, "LRuntime.py"))
+
+        for power in sizes:
+            count = 10**power
+            values = (str(i) if i % 2 else f"{i}.5" for i in range(count))
+            data = f"{count}\n{os.linesep.join(values)}\n".encode()
+            plain_out, plain_time = run(plain, data)
+            buffered_out, buffered_time = run(buffered, data)
+            print(f"10^{power} values: print/input {count / plain_time:>12,.0f} values/s, "
+                  f"LRuntime {count / buffered_time:>12,.0f} values/s, "
+                  f"x{plain_time / buffered_time:.1f}, same output: {plain_out == buffered_out}")
@@ -0,0 +1,40 @@
+import sys, getopt, time
+
+from LLexer import LLexer
+from LParser import LParser, dump_ast
+from LSerialize import dump_binary, load_binary, load_json
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Loading a dumped AST against parsing the source again.
+# Usage: python bench_serialize.py [-s 10KB,100KB,1MB]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def parse(text):
+    return LParser(text).parse(LLexer().tokenize(text))
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:", ["sizes="])
+    sizes = "10KB,100KB,1MB"
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+
+    print(f"{'size':>6}{'parse, s':>10}{'dump, s':>10}{'bin load':>10}{'json load':>11}"
+          f"{'bin':>12}{'json':>12}{'speedup':>9}  same")
+    for size in sizes.split(","):
+        text = generate(parse_size(size))
+        ast, parse_time = timed(parse, text)
+        data, dump_time = timed(dump_binary, ast)
+        json_text = dump_ast(ast, "json")
+        from_bin, bin_time = timed(load_binary, data)
+        from_json, json_time = timed(load_json, json_text)
+        expected = dump_ast(ast, "txt")
+        same = dump_ast(from_bin, "txt") == expected and dump_ast(from_json, "txt") == expected
+        print(f"{size:>6}{parse_time:>10.3f}{dump_time:>10.3f}{bin_time:>10.3f}{json_time:>11.3f}"
+              f"{len(data):>12,}{len(json_text):>12,}{parse_time/bin_time:>8.1f}x  {same}")
@@ -0,0 +1,44 @@
+import sys, getopt, gc, os, time, tracemalloc
+
+from LLang import compile_text, stream_text
+from LGenerator import parse_size
+from LStats import human_bytes
+from bench_pipeline import generate
+
+# Peak memory and time of whole-tree translation ('compile_text', output
+# written after translation) and streaming one ('stream_text', output
+# written function by function) on generated programs of growing size.
+# Source text is allocated before tracing starts and is not counted.
+# Usage: python bench_stream.py [-s 1MB,4MB,16MB]
+
+def measure(function, text):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as fp:
+        function(text, fp)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def whole(text, fp):
+    fp.write(compile_text(text).code())
+
+def streamed(text, fp):
+    stream_text(text, lambda lines: fp.writelines(line + "\n" for line in lines))
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:", ["sizes="])
+    sizes = "1MB,4MB,16MB"
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+
+    print(f"{'size':>8}{'whole, s':>10}{'whole peak':>12}{'stream, s':>11}{'stream peak':>13}")
+    for size in sizes.split(","):
+        text = generate(parse_size(size), seed=0)
+        whole_time, whole_peak = measure(whole, text)
+        stream_time, stream_peak = measure(streamed, text)
+        print(f"{size:>8}{whole_time:>10.2f}{human_bytes(whole_peak):>12}{stream_time:>11.2f}{human_bytes(stream_peak):>13}")
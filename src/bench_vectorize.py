@@ -0,0 +1,76 @@
+import sys, getopt, time
+
+import numpy as np
+
+from LLexer import LLexer
+from LParser import LParser
+from LTranslator import LTranslator
+from LVectorize import vectorize
+
+# Benchmark of vectorized FDEF evaluation against translated scalar python.
+# Usage: python bench_vectorize.py [-i input_file] [-n function] [-s 6,7,8]
+
+DEFAULT_SOURCE = """
+function f(x, y) {
+    a = x * 2 + y ^ 2;
+    if (a > 10 && y != 0) {
+        b = a / y;
+        if (b < 0) return -b;
+    } else b = 1.5;
+    return b - x ^ -1 + 0.5 * a;
+}
+"""
+
+def scalar_function(ast, name):
+    namespace = {"__name__": "bench"}
+    exec("\n".join(LTranslator().translate(ast)), namespace)
+    return namespace[name]
+
+def inputs(size, nargs, rng):
+    # non-zero integers keep 'x ^ -1' defined for the scalar code
+    return [rng.integers(1, 100, size) * rng.choice([-1, 1], size) for _ in range(nargs)]
+
+def check(scalar, vector, nargs, rng, size=10_000):
+    args = inputs(size, nargs, rng)
+    expected = np.array([scalar(*map(int, row)) for row in zip(*args)], dtype=np.float64)
+    got = vector(*args).astype(np.float64)
+    return int(np.count_nonzero(~np.isclose(expected, got, equal_nan=True)))
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "i:n:s:", ["input=", "name=", "sizes="])
+    source, name, sizes = DEFAULT_SOURCE, "f", [6, 7]
+    for opt, arg in opts:
+        if opt in ["-i", "--input"]:
+            with open(arg) as fp:
+                source = fp.read()
+        elif opt in ["-n", "--name"]:
+            name = arg
+        elif opt in ["-s", "--sizes"]:
+            sizes = [int(power) for power in arg.split(",")]
+
+    ast = LParser(source).parse(LLexer().tokenize(source))
+    fdef = next(node for node in ast.value if node.FNAME.value == name)
+    nargs = len(fdef.FARGS.value or [])
+    scalar = scalar_function(ast, name)
+    vector = vectorize(fdef)
+    rng = np.random.default_rng(0)
+
+    mismatches = check(scalar, vector, nargs, rng)
+    print(f"agreement check: {mismatches} mismatches on 10^4 tuples")
+
+    args = inputs(10**5, nargs, rng)
+    rows = list(zip(*(arg.tolist() for arg in args)))
+    start = time.perf_counter()
+    for row in rows:
+        scalar(*row)
+    scalar_rate = len(rows) / (time.perf_counter() - start)
+    print(f"scalar:     {scalar_rate:>14,.0f} tuples/s")
+
+    for power in sizes:
+        args = inputs(10**power, nargs, rng)
+        start = time.perf_counter()
+        vector(*args)
+        elapsed = time.perf_counter() - start
+        print(f"vector 10^{power}: {10**power / elapsed:>14,.0f} tuples/s  ({elapsed:.3f}s, x{10**power / elapsed / scalar_rate:.0f})")
+        del args
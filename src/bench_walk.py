@@ -0,0 +1,63 @@
+import sys, getopt, time
+
+from LLexer import LLexer
+from LParser import LParser, dump_ast
+from LTranslator import LTranslator
+from LCTranslator import LCTranslator
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Time of tree consumers built on LWalk ('Node.__str__', txt renderer,
+# python and C translators, type inference included) on generated programs and on deep
+# trees: 'a + a + ... + a' chains (deep on the left), '1 ^ 1 ^ ... ^ 1'
+# chains (deep on the right) and nested 'if's.
+# Walks use explicit stacks, so depth is limited by memory only.
+# Usage: python bench_walk.py [-s 100KB,1MB] [-d 1000,10000,100000] [-r 3]
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def deep(kind, depth):
+    if kind == "chain":
+        return "function main() { a = 1; write(" + " + ".join(["a"] * depth) + "); }"
+    if kind == "pow":
+        return "function main() { write(" + "1 ^ " * depth + "1); }"
+    # output of nested blocks grows with depth squared (indentation)
+    return "function main() { a = 1; " + "if (a > 0) { " * depth + "write(a);" + " }" * depth + " }"
+
+def run(name, text, repeat, render=True):
+    ast = LParser(text).parse(LLexer().tokenize(text))
+    columns = ["-", "-"]
+    if render:
+        columns = [f"{best(lambda: str(ast), repeat):.3f}", f"{best(lambda: dump_ast(ast, 'txt'), repeat):.3f}"]
+    columns.append(f"{best(lambda: LTranslator().translate(ast), repeat):.3f}")
+    columns.append(f"{best(lambda: LCTranslator().translate(ast), repeat):.3f}")
+    print(f"{name:>12}" + "".join(f"{column:>14}" for column in columns))
+
+
+if __name__ == "__main__":
+    opts, _ = getopt.getopt(sys.argv[1:], "s:d:r:", ["sizes=", "depths=", "repeat="])
+    sizes, depths, repeat = "100KB,1MB", "1000,10000,100000", 3
+    for opt, arg in opts:
+        if opt in ["-s", "--sizes"]:
+            sizes = arg
+        elif opt in ["-d", "--depths"]:
+            depths = arg
+        elif opt in ["-r", "--repeat"]:
+            repeat = int(arg)
+
+    print(f"{'tree':>12}{'str, s':>14}{'txt, s':>14}{'translate, s':>14}{'C, s':>14}")
+    for size in sizes.split(","):
+        run(size, generate(parse_size(size)), repeat)
+    for depth in map(int, depths.split(",")):
+        for kind in ("chain", "pow", "ifs"):
+            # indentation makes renders of deep trees and code of nested
+            # blocks grow with depth squared
+            if kind == "ifs" and depth > 10000:
+                continue
+            run(f"{kind} {depth}", deep(kind, depth), repeat, render=depth <= 2000)
@@ -0,0 +1,190 @@
+import sys, getopt, os, glob, subprocess, tempfile, time
+
+from LLang import compile_text, parse, LSyntaxError
+from LSemantic import LSemantic
+from LCTranslator import LCTranslator, compile_c
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Conformance of the C backend: every program is translated into python and
+# into C, both are run with the same input and their stdout and exit codes
+# must be equal. Programs are examples/*.l, the cases below and generated
+# ones. Programs which call undefined functions are skipped, they stop at
+# the first such call in C but may call a python builtin in python.
+
+USAGE = """Usage: python conformance_c.py [-n generated] [-s 2KB] [-v]
+  -n, --generated     number of generated programs, 20 by default
+  -s, --size          size of a generated program, 2KB by default
+  -v, --verbose       print line count and exit code of every program"""
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+STDIN = "7\n2.5\n-3\n0.1\n1e300\n" * 8
+
+CASES = {
+    "ints": """
+        function main() {
+            a = 7; b = 2;
+            write(a + b); write(a - b * 3); write(a * -b); write(a / b); write(a ^ b); write(b ^ 62);
+            write(-a ^ 3); write(a ^ -1); write(0 ^ 0); write(0b101 * 3);
+            return a;
+        }""",
+    "floats": """
+        function main() {
+            x = 0.1 + 0.2; write(x); write(1.0 / 3); write(2.5 ^ 2); write(2 ^ 0.5);
+            write(10000000000000000.0); write(0.00000015); write(0.0001); write(123456789.125);
+            write(-0.0 * 1); write(10.0 ^ 300 * 10.0 ^ 300); write(-(10.0 ^ 300) * 10.0 ^ 300);
+            write(100.0); write(10.0 ^ 22); write(2.0 ^ 0.5 * 1000000);
+            return 0.0;
+        }""",
+    "mixed": """
+        function f(v) { if (v > 2) { return v * 2; } return v / 4; }
+        function main() {
+            i = 0;
+            while (i < 5) { write(f(i)); i = i + 1; }
+            a = 1; a = a + 0.5; write(a);
+            return f(10);
+        }""",
+    "bools": """
+        function main() {
+            write(1 < 2); write(!(1 < 2)); write(1 == 1.0 && 2 != 3 || 1 > 2);
+            if (0.1 + 0.2 == 0.3) { write(1); } else { write(0); }
+            if (0 ^ -1.0 > 1) { write(1); }
+            return 0;
+        }""",
+    "none": """
+        function g(v) { if (v > 0) { return v; } }
+        function main() { write(g(1)); write(g(-1)); write(g(-1) == g(-2)); return g(0); }""",
+    "read": """
+        function main() {
+            a = read(); b = read(); c = read(); d = read(); e = read();
+            write(a + b); write(a * c); write(d * 3); write(e * e); write(a / 2);
+            return a;
+        }""",
+    "recursion": """
+        function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }
+        function fact(n) { if (n < 1) { return 1; } return n * fact(n - 1); }
+        function main() { write(fib(20)); write(fact(20)); write(fact(10.0)); return 0; }""",
+    "zerodiv": """
+        function main() { write(1); write(1 / 0); write(2); }""",
+    "negpow": """
+        function main() { write(0.0 ^ -1); }""",
+    "overflow": """
+        function main() { write(10.0 ^ 400); }""",
+    "redefined": """
+        function f() { return 1; }
+        function f() { return 2; }
+        function main() { write(f()); }""",
+    "order": """
+        function w(v) { write(v); return v; }
+        function main() {
+            write(w(1) + w(2) * w(3));
+            write(w(4) > 0 && w(5) + w(6) > 0 || w(7) > w(8));
+            i = 0;
+            while (w(i) + w(10) < 13) { i = i + 1; }
+            write(w(9) + 1 / 0);
+        }""",
+    "nomain": """
+        function f() { write(1); }""",
+    "unassigned": """
+        function main() { write(1); write(x); write(2); }""",
+    "unbound": """
+        function main() { a = read(); if (a > 100) { x = 1; } write(x); }""",
+    "bound": """
+        function f(v) {
+            if (v > 0) { x = 1; } else { x = 2.5; }
+            i = 0; while (i < v) { y = i; i = i + 1; }
+            if (v > 1) { write(y); }
+            if (v > 5) { z = 1; return z; }
+            return x + v * 0;
+        }
+        function main() { write(f(3)); write(f(0)); write(f(7)); i = 0; while (i < 2) { i = i + 1; } write(f(y)); }""",
+}
+
+
+def run(command, stdin):
+    result = subprocess.run(command, input=stdin.encode(), capture_output=True, timeout=60)
+    return result.stdout.decode(errors="replace"), result.returncode
+
+def check(name, text, workdir, verbose=False):
+    # -> None if skipped, else (python time, C time, list of differences)
+    try:
+        ast = parse(text).ast
+    except LSyntaxError:
+        return None
+    semantic = LSemantic(text).analyze(ast)
+    if semantic.errors:
+        return None
+
+    python_file = os.path.join(workdir, f"{name}.py")
+    with open(python_file, "w", encoding="utf-8") as fp:
+        fp.write(compile_text(text).code())
+    binary = compile_c("\n".join(LCTranslator().translate(ast, semantic)))
+
+    start = time.perf_counter()
+    expected = run([sys.executable, python_file], STDIN)
+    python_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = run([binary], STDIN)
+    c_time = time.perf_counter() - start
+
+    differences = []
+    if expected[1] != actual[1]:
+        differences.append(f"exit code {expected[1]} != {actual[1]}")
+    expected_lines, actual_lines = expected[0].splitlines(), actual[0].splitlines()
+    for number, (line, other) in enumerate(zip(expected_lines, actual_lines), 1):
+        if line != other:
+            differences.append(f"line {number}: {line!r} != {other!r}")
+            break
+    if len(expected_lines) != len(actual_lines):
+        differences.append(f"{len(expected_lines)} lines != {len(actual_lines)} lines")
+    if verbose:
+        print(f"{name}: {len(expected_lines)} lines, exit {expected[1]}")
+    return python_time, c_time, differences
+
+
+if __name__ == "__main__":
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "hn:s:v", ["help", "generated=", "size=", "verbose"])
+    except getopt.GetoptError as error:
+        print(error)
+        print(USAGE)
+        exit(2)
+    generated, size, verbose = 20, "2KB", False
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print(USAGE)
+            exit(0)
+        elif opt in ["-n", "--generated"]:
+            generated = int(arg)
+        elif opt in ["-s", "--size"]:
+            size = arg
+        elif opt in ["-v", "--verbose"]:
+            verbose = True
+
+    programs = {}
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, "*.l"))):
+        with open(path, encoding="utf-8") as fp:
+            programs[os.path.splitext(os.path.basename(path))[0]] = fp.read()
+    programs.update(CASES)
+    for seed in range(generated):
+        programs[f"gen{seed}"] = generate(parse_size(size), seed=seed)
+
+    failed = skipped = 0
+    python_total = c_total = 0.0
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, text in programs.items():
+            result = check(name, text, workdir, verbose)
+            if result is None:
+                skipped += 1
+                continue
+            python_time, c_time, differences = result
+            python_total += python_time
+            c_total += c_time
+            if differences:
+                failed += 1
+                print(f"FAIL {name}: {'; '.join(differences)}")
+
+    checked = len(programs) - skipped
+    print(f"{checked - failed}/{checked} programs agree, {skipped} skipped")
+    print(f"run time: python {python_total:.3f}s, C {c_total:.3f}s")
+    exit(1 if failed else 0)
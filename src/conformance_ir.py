@@ -0,0 +1,238 @@
+import sys, getopt, os, glob, random, subprocess, tempfile
+
+from LLang import parse, translate, LSyntaxError
+from LIR import lower_program, verify, LIRError
+from LGenerator import parse_size
+from bench_pipeline import generate
+from conformance_c import CASES, STDIN
+
+# Conformance of python emitted from the SSA form (LIRTranslator) with the
+# one of LTranslator: every program is translated both ways, both are run
+# with the same input and their stdout, exit codes and exception types must
+# be equal. Every function must pass 'verify' too. Programs are
+# examples/*.l, the cases of conformance_c.py and below, generated ones and
+# random ones with nested control flow, short-circuits with side effects,
+# returns inside loops, variables unassigned on some paths and loops of
+# every shape LTranslator emits as counted ones. Named programs are also run
+# translated with profiling, the output must stay the same.
+
+USAGE = """Usage: python conformance_ir.py [-n generated] [-s 2KB] [-m random] [--seed 0]
+  -n, --generated     number of generated programs, 20 by default
+  -s, --size          size of a generated program, 2KB by default
+  -m, --random        number of random programs, 300 by default
+      --seed          seed of generated and random programs, 0 by default"""
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+MIRROR = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+IR_CASES = {
+    "swap": """
+        function main() {
+            a = 1; b = 2; i = 0;
+            while (i < 3) { t = a; a = b; b = t; write(a - b); i = i + 1; }
+            return a * 10 + b;
+        }""",
+    "paths": """
+        function f(v) { if (v > 0) { x = v; } if (v > 1) { write(x); } return x; }
+        function main() { write(f(2)); write(f(1)); write(f(0)); }""",
+    "dead": """
+        function main() { write(1); return 2; write(3); a = 4; }""",
+    "nested": """
+        function main() {
+            i = 0; s = 0;
+            while (i < 4) {
+                j = 0;
+                while (j < i) { if (j == 2) return s; s = s + j; j = j + 1; }
+                i = i + 1;
+            }
+            write(s);
+        }""",
+    "short": """
+        function w(v) { write(v); return v; }
+        function main() {
+            a = w(1) > 0 && w(0) > 0 || w(2) > 1; write(a);
+            write(w(0) + 1 > 1 || !(w(3) < 2) && w(4) > 0);
+            i = 0;
+            while (i < 5 && w(i) != 3 || i == 4) { i = i + 1; }
+            return i;
+        }""",
+    "empty": """
+        function f() {}
+        function g(a) { if (a > 0) {} else {} while (a < 0) {} }
+        function main() { write(f()); write(g(1)); }""",
+    "statements": """
+        function main() { a = 1; a; 2; a + 1; main2(); }
+        function main2() { write(7); }""",
+    "names": """
+        function _t1() { return 5; }
+        function main() { _t2 = 1; write(_t1() + _t2 * 2 > 1 && _t2 < 3); }""",
+    "modules": """
+        function time(x) { return x * 2; }
+        function os(x) { return x + 1; }
+        function json(x) { return x - 1; }
+        function atexit() { write(0); }
+        function main() { i = 0; while (i < 3) { write(time(os(json(i)))); i = i + 1; } atexit(); }""",
+    "builtins": """
+        function range(a, b) { return 0; }
+        function len(a) { return 1; }
+        function main() {
+            i = 0; while (i < 5) { write(i); i = i + 1; }
+            j = 0; while (j < 7) { j = j + 2; }
+            write(len(j));
+            return i + j;
+        }""",
+}
+
+
+def run(path, stdin):
+    # -> (stdout, exit code, type of the exception)
+    result = subprocess.run([sys.executable, path], input=stdin.encode(), capture_output=True, timeout=60)
+    errors = result.stderr.decode(errors="replace").strip().splitlines()
+    exception = errors[-1].split(":")[0] if errors else ""
+    return result.stdout.decode(errors="replace"), result.returncode, exception
+
+def check(name, text, workdir, profile=False):
+    # -> None if skipped, else list of differences to the LTranslator output
+    try:
+        ast = parse(text).ast
+    except LSyntaxError:
+        return None
+    try:
+        for function in lower_program(ast):
+            verify(function)
+    except LIRError as error:
+        return [f"verify: {error}"]
+
+    outcomes = {}
+    for variant in ("", "ir", "profile")[:3 if profile else 2]:
+        path = os.path.join(workdir, f"{name}{variant and '-'}{variant}.py")
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(translate(ast, text, ir=variant == "ir", profile=variant == "profile").code())
+        outcomes[variant] = run(path, STDIN)
+    out, code, exception = outcomes.pop("")
+
+    differences = []
+    for variant, (other_out, other_code, other_exception) in outcomes.items():
+        if (code, exception) != (other_code, other_exception):
+            differences.append(f"{variant}: exit {code} {exception} != {other_code} {other_exception}")
+        if out != other_out:
+            lines, other_lines = out.splitlines(), other_out.splitlines()
+            number = next((number for number, (line, other) in enumerate(zip(lines, other_lines), 1) if line != other),
+                          min(len(lines), len(other_lines)) + 1)
+            differences.append(f"{variant}: output differs at line {number}")
+    return differences
+
+
+def expression(rng, depth):
+    if depth <= 0 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "c", "1", "2", "0.5", "w(a)"])
+    choice = rng.randrange(5)
+    if choice == 0:
+        return f"-{expression(rng, depth-1)}"
+    if choice == 1:
+        return f"w({expression(rng, depth-1)})"
+    return f"({expression(rng, depth-1)} {rng.choice('+-*')} {expression(rng, depth-1)})"
+
+def condition(rng, depth):
+    choice = rng.randrange(4) if depth > 0 else 0
+    if choice <= 1:
+        return f"{expression(rng, 2)} {rng.choice(['<', '==', '>=', '!='])} {expression(rng, 2)}"
+    if choice == 2:
+        return f"({condition(rng, depth-1)} {rng.choice(['&&', '||'])} {condition(rng, depth-1)})"
+    return f"!({condition(rng, depth-1)})"
+
+def statements(rng, depth, loops):
+    # loops count with their own variables, which are never assigned elsewhere
+    result = []
+    for _ in range(rng.randint(1, 4)):
+        choice = rng.randrange(8) if depth > 0 else rng.randrange(4)
+        if choice <= 1:
+            result.append(f"{rng.choice('abc')} = {expression(rng, 2)};")
+        elif choice == 2:
+            result.append(f"write({condition(rng, 1) if rng.random() < 0.3 else expression(rng, 2)});")
+        elif choice == 3:
+            if rng.random() < 0.3:
+                result.append(f"return {expression(rng, 1)};")
+        elif choice <= 5:
+            tail = f" else {{ {statements(rng, depth-1, loops)} }}" if rng.random() < 0.6 else ""
+            result.append(f"if ({condition(rng, 1)}) {{ {statements(rng, depth-1, loops)} }}{tail}")
+        else:
+            result.append(loop(rng, depth, loops))
+    return " ".join(result)
+
+def loop(rng, depth, loops):
+    # counted one way or another, 'n' is an int bound nothing else writes
+    k = f"k{len(loops)}"
+    loops.append(k)
+    step = rng.randint(1, 2)
+    if rng.random() < 0.5:
+        start, test, update = 0, f"{k} {rng.choice(['<', '<='])} {rng.choice(['2', 'n'])}", f"{k} + {step}"
+    else:
+        start, test, update = 3, f"{k} {rng.choice(['>', '>='])} {rng.choice(['0', 'n - 2'])}", f"{k} - {step}"
+    if rng.random() < 0.2:
+        # 'n > k' instead of 'k < n'
+        left, operator, right = test.split(" ", 2)
+        test = f"{right} {MIRROR[operator]} {left}"
+    if rng.random() < 0.3:
+        test += f" && {condition(rng, 0)}"
+    after = f" write({k});" if rng.random() < 0.3 else ""
+    return (f"n = 2; {k} = {start}; while ({test}) "
+            f"{{ {statements(rng, depth-1, loops)} {k} = {update}; }}{after}")
+
+def program(rng):
+    body = statements(rng, 3, [])
+    return ("function w(v) { write(v); return v; }\n"
+            f"function f(a, b) {{ {body} }}\n"
+            "function main() { write(f(1, 2)); write(f(2.5, -1)); c = read(); write(f(c, 0)); }\n")
+
+
+if __name__ == "__main__":
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "hn:s:m:", ["help", "generated=", "size=", "random=", "seed="])
+    except getopt.GetoptError as error:
+        print(error)
+        print(USAGE)
+        exit(2)
+    generated, size, randoms, seed = 20, "2KB", 300, 0
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print(USAGE)
+            exit(0)
+        elif opt in ["-n", "--generated"]:
+            generated = int(arg)
+        elif opt in ["-s", "--size"]:
+            size = arg
+        elif opt in ["-m", "--random"]:
+            randoms = int(arg)
+        elif opt == "--seed":
+            seed = int(arg)
+
+    rng = random.Random(seed)
+    programs = {}
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, "*.l"))):
+        with open(path, encoding="utf-8") as fp:
+            programs[os.path.splitext(os.path.basename(path))[0]] = fp.read()
+    programs.update(CASES)
+    programs.update(IR_CASES)
+    named = set(programs)
+    for number in range(generated):
+        programs[f"gen{number}"] = generate(parse_size(size), seed=seed + number)
+    for number in range(randoms):
+        programs[f"random{number}"] = program(rng)
+
+    failed = skipped = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, text in programs.items():
+            differences = check(name, text, workdir, profile=name in named)
+            if differences is None:
+                skipped += 1
+                continue
+            if differences:
+                failed += 1
+                print(f"FAIL {name}: {'; '.join(differences)}")
+                if name.startswith("random"):
+                    print(f"    {text}")
+
+    checked = len(programs) - skipped
+    print(f"{checked - failed}/{checked} programs agree, {skipped} skipped")
+    exit(1 if failed else 0)
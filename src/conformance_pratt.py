@@ -0,0 +1,209 @@
+import sys, getopt, os, re, glob, random
+
+from LLexer import LLexer
+from LParser import LParser, YaccError, Node
+from LPratt import LPrattParser
+from LGenerator import parse_size
+from bench_pipeline import generate
+
+# Differential check of the Pratt parser against the LALR one: both parse the
+# same programs, trees (with positions), warnings and errors must be
+# equal. Programs are examples/*.l, generated ones, generated ones with a
+# random edit (mostly broken), random sentences of the grammar (every other
+# one edited) and short random token soups inside 'main', which hit error
+# states of every rule. Named programs of RECOVERY must report errors at
+# the given positions with 'recover=True', none of them may be lost.
+
+USAGE = """Usage: python conformance_pratt.py [-n generated] [-s 2KB] [-m soups] [--seed 0]
+  -n, --generated     number of generated programs, 20 by default
+  -s, --size          size of a generated program, 2KB by default
+  -m, --soups         number of token soups and of random sentences, 5000 by default
+      --seed          seed of generated programs, edits, soups and sentences, 0 by default"""
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+SOUP = ["a", "b", "f", "1", "2.5", "0b11", "(", ")", "+", "-", "*", "/", "^",
+        "<", "==", ">=", "&&", "||", "!", ",", ";", "{", "}", "if", "else",
+        "while", "=", "read", "write", "return", "$"]
+
+# program -> positions of its errors (line:column)
+RECOVERY = {
+    "braces": ("""function main() {
+    if (a < ) { write(1); }
+    w = 3 $ 4;
+    x = ;
+}""", ["2:13", "3:11", "4:9"]),
+    "else": ("""function main() {
+    if (a < ) { b = ; } else { c = 1 }
+    while (x > ) { write(1) } return 1;
+}
+function f() { { a = ; } x = ; }""", ["2:13", "2:21", "2:38", "3:16", "3:29", "5:22", "5:30"]),
+}
+
+
+def result(parser_class, text, **options):
+    # -> (ast or None, warns, errors or error message). Other exceptions
+    # are outcomes too, both engines build nodes by the same factories
+    parser = parser_class(text, **options)
+    try:
+        ast = parser.parse(LLexer().tokenize(text))
+    except YaccError as error:
+        return None, [], str(error)
+    except Exception as error:
+        return None, [], f"{type(error).__name__}: {error}"
+    return ast, list(parser.warns), list(parser.errors)
+
+def same(a, b):
+    # 'same_tree' with positions and without shortcuts of shared nodes
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if type(a) is not type(b):
+            return False
+        if isinstance(a, tuple):
+            if len(a) != len(b):
+                return False
+            stack.extend(zip(a, b))
+        elif isinstance(a, Node):
+            if (a.name, a.lineno, a.index) != (b.name, b.lineno, b.index):
+                return False
+            stack.append((a.value, b.value))
+        elif a != b:
+            return False
+    return True
+
+def recovered(text, positions):
+    # -> differences of errors reported with 'recover=True' to 'positions'
+    _, _, errors = result(LParser, text, recover=True)
+    found = [match.group(1) for match in (re.search(r" at (\d+:\d+)$", error) for error in errors) if match]
+    return [] if found == positions else [f"errors at {found} != {positions}"]
+
+def differences(text, **options):
+    expected = result(LParser, text, **options)
+    actual = result(LPrattParser, text, **options)
+    found = []
+    if expected[2] != actual[2]:
+        found.append(f"errors {expected[2]!r} != {actual[2]!r}")
+    if expected[1] != actual[1]:
+        found.append(f"warns {expected[1]!r} != {actual[1]!r}")
+    if (expected[0] is None) != (actual[0] is None):
+        found.append("only one tree")
+    elif expected[0] is not None:
+        if not same(expected[0], actual[0]):
+            found.append("trees differ")
+    return found
+
+def mutate(text, rng):
+    # random edit at a token boundary
+    tokens = list(LLexer().tokenize(text))
+    index = tokens[rng.randrange(len(tokens))].index
+    if rng.random() < 0.5:
+        return text[:index] + text[index+1:]
+    return text[:index] + rng.choice(SOUP) + " " + text[index:]
+
+def expression(rng, depth):
+    if depth <= 0 or rng.random() < 0.3:
+        return rng.choice(["a", "b", "1", "2.5", "0b11", "f()"])
+    choice = rng.randrange(4)
+    if choice == 0:
+        return f"{expression(rng, depth-1)} {rng.choice('+-*/^')} {expression(rng, depth-1)}"
+    if choice == 1:
+        return f"-{expression(rng, depth-1)}"
+    if choice == 2:
+        return f"({expression(rng, depth-1)})"
+    return f"f({', '.join(expression(rng, depth-1) for _ in range(rng.randint(1, 3)))})"
+
+def condition(rng, depth):
+    choice = rng.randrange(5) if depth > 0 else 0
+    if choice <= 1:
+        return f"{expression(rng, depth-1)} {rng.choice(['<', '==', '>=', '!='])} {expression(rng, depth-1)}"
+    if choice == 2:
+        return f"{condition(rng, depth-1)} {rng.choice(['&&', '||'])} {condition(rng, depth-1)}"
+    if choice == 3:
+        return f"!{condition(rng, depth-1)}"
+    return f"({condition(rng, depth-1)})"
+
+def statement(rng, depth):
+    choice = rng.randrange(9) if depth > 0 else rng.randrange(4)
+    if choice == 0:
+        return f"a = {expression(rng, 3)};"
+    if choice == 1:
+        return f"write({condition(rng, 2) if rng.random() < 0.5 else expression(rng, 3)});"
+    if choice == 2:
+        return f"return {expression(rng, 3)};"
+    if choice == 3:
+        return f"{condition(rng, 2) if rng.random() < 0.5 else expression(rng, 2)};"
+    if choice == 4:
+        return "b = read();"
+    if choice <= 6:
+        return "{" + " ".join(statement(rng, depth-1) for _ in range(rng.randint(0, 3))) + "}"
+    if choice == 7:
+        return f"while ({condition(rng, 2)}) {statement(rng, depth-1)}"
+    tail = f" else {statement(rng, depth-1)}" if rng.random() < 0.5 else ""
+    return f"if ({condition(rng, 2)}) {statement(rng, depth-1)}{tail}"
+
+def sentence(rng):
+    # random valid program, a random edit breaks every other one
+    text = " ".join(f"function {name}(a, b) {statement(rng, 4)}" for name in rng.sample(["f", "main", "g"], 2))
+    return mutate(text, rng) if rng.random() < 0.5 else text
+
+def soup(rng):
+    return "function main() {" + " ".join(rng.choice(SOUP) for _ in range(rng.randint(1, 12))) + "}"
+
+
+if __name__ == "__main__":
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "hn:s:m:", ["help", "generated=", "size=", "soups=", "seed="])
+    except getopt.GetoptError as error:
+        print(error)
+        print(USAGE)
+        exit(2)
+    generated, size, soups, seed = 20, "2KB", 5000, 0
+    for opt, arg in opts:
+        if opt in ["-h", "--help"]:
+            print(USAGE)
+            exit(0)
+        elif opt in ["-n", "--generated"]:
+            generated = int(arg)
+        elif opt in ["-s", "--size"]:
+            size = arg
+        elif opt in ["-m", "--soups"]:
+            soups = int(arg)
+        elif opt == "--seed":
+            seed = int(arg)
+
+    rng = random.Random(seed)
+    programs = {}
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, "*.l"))):
+        with open(path, encoding="utf-8") as fp:
+            programs[os.path.basename(path)] = fp.read()
+    for number in range(generated):
+        text = generate(parse_size(size), seed=seed + number)
+        programs[f"gen{number}"] = text
+        programs[f"gen{number}-edit"] = mutate(text, rng)
+    for number in range(soups):
+        programs[f"soup{number}"] = soup(rng)
+        programs[f"sentence{number}"] = sentence(rng)
+
+    failed = valid = 0
+    for name, (text, positions) in RECOVERY.items():
+        programs[name] = text
+        found = recovered(text, positions)
+        if found:
+            failed += 1
+            print(f"FAIL {name}: {'; '.join(found)}")
+    for name, text in programs.items():
+        found = differences(text)
+        # recovery is delegated to LParser, hash-consing shares the node
+        # factory, it is checked on valid programs (errors don't depend on it)
+        found += [f"recover: {problem}" for problem in differences(text, recover=True)]
+        if result(LParser, text)[0] is not None:
+            valid += 1
+            found += [f"hash_cons: {problem}" for problem in differences(text, hash_cons=True)]
+        if found:
+            failed += 1
+            print(f"FAIL {name}: {'; '.join(found)}")
+            if name.startswith(("soup", "sentence")):
+                print(f"    {text}")
+
+    print(f"{len(programs) - failed}/{len(programs)} programs agree, {valid} of them valid")
+    exit(1 if failed else 0)